@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""性能測定用のベンチマーク（リポジトリのルートで python -m benchmarks.<名前> として実行する）"""
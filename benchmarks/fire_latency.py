@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""アラーム発火から画面表示・音声再生開始までの遅れを計測する
+
+    python -m benchmarks.fire_latency --iterations 50 --output fire_latency.json
+
+main.py の AlarmApp をそのまま起動し、スケジューラーは発火時刻の直前から進む時計（FakeClock）で動かす。
+ページは Mock(spec=ft.Page)、プレーヤーは StubAudioSink に置き換える。
+発火時刻を基準に、QuizView の作成・描画・最初の音声サンプルの書き込みまでの時間をミリ秒で出力する。
+"""
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from unittest.mock import Mock, patch
+
+from .harness import FakeClock, StubAudioSink, isolated_workdir, make_alarm, mock_page, summarize, write_report
+
+from main import AlarmApp
+from models.alarm import Alarm
+from ui.quiz_view import QuizView
+from utils.audio_backends import PlayerBackend
+from utils.audio_cache import AudioAssetCache
+from utils.storage import SettingsStorage
+from utils.system_audio import SystemAudioController
+
+
+DEADLINE = datetime(2025, 7, 7, 7, 0)  # 月曜日
+FIRE_LEAD_SECONDS = 0.05  # スケジューラー起動から発火時刻までの秒数
+WARMUP_FIRE_LEAD_SECONDS = 0.5  # warmupありの場合（発火前に準備が終わるだけの時間を空ける）
+TIMEOUT = 10.0
+
+
+def run_once(alarm: Alarm, asset_cache: AudioAssetCache, warmup: bool = False) -> Dict[str, float]:
+    """1回発火させ、発火時刻からの各段階の経過時間（ミリ秒）を返す"""
+    work_dir = os.getcwd()
+    page = mock_page()
+    sink = StubAudioSink()
+    marks: Dict[str, float] = {}
+    views: List[QuizView] = []
+    done = threading.Event()
+    
+    create_quiz_view = AlarmApp._create_quiz_view
+    take_warmed_quiz_view = AlarmApp._take_warmed_quiz_view
+    on_alarm_warmup = AlarmApp._on_alarm_warmup
+    
+    def marked(name: str, method: Callable, before: bool = False) -> Callable:
+        def wrapper(*args, **kwargs):
+            if before:
+                marks[name] = time.perf_counter()
+            result = method(*args, **kwargs)
+            if not before:
+                marks[name] = time.perf_counter()
+            return result
+        return wrapper
+    
+    def instrumented_quiz_view(app: AlarmApp, fired: Alarm) -> QuizView:
+        quiz_view = create_quiz_view(app, fired)
+        system_audio = SystemAudioController(asset_cache=asset_cache, backends=[PlayerBackend("aplay", "aplay")])
+        sink.attach(system_audio)
+        quiz_view.audio_controller.system_audio = system_audio
+        # _on_alarm_trigger は set_page → start_alarm_sound → get_view の順に呼ぶ
+        quiz_view.set_page = marked("constructed", quiz_view.set_page, before=True)
+        quiz_view.start_alarm_sound = marked("sound_started", quiz_view.start_alarm_sound)
+        quiz_view.get_view = marked("rendered", quiz_view.get_view)
+        views.append(quiz_view)
+        return quiz_view
+    
+    def on_update():
+        if "rendered" in marks and not done.is_set():
+            marks["displayed"] = time.perf_counter()
+            done.set()
+    
+    storage = Mock()
+    storage.alarms_file = os.path.join(work_dir, "alarms.json")
+    storage.companion_files = []
+    storage.load_alarms.return_value = [alarm]
+    lead = WARMUP_FIRE_LEAD_SECONDS if warmup else FIRE_LEAD_SECONDS
+    # warmup_lead_seconds が0なら発火前の準備は行われない
+    SettingsStorage().save_settings({"warmup_lead_seconds": lead if warmup else 0})
+    clock = FakeClock(DEADLINE - timedelta(seconds=lead))
+    
+    with patch.object(AlarmApp, '_create_quiz_view', instrumented_quiz_view), \
+         patch.object(AlarmApp, '_take_warmed_quiz_view', marked("trigger", take_warmed_quiz_view, before=True)), \
+         patch.object(AlarmApp, '_on_alarm_warmup', marked("warmed", on_alarm_warmup)):
+        app = AlarmApp(page, alarm_storage=storage, clock=clock)
+        page.update.side_effect = on_update
+        try:
+            if not done.wait(TIMEOUT) or not sink.first_write.wait(TIMEOUT):
+                raise RuntimeError("アラームが発火しませんでした")
+        finally:
+            app.cleanup()
+            for quiz_view in views:
+                quiz_view.audio_controller.stop_alarm()
+    
+    deadline = clock.perf_counter_at(DEADLINE)
+    
+    def to_ms(mark: float) -> float:
+        return (mark - deadline) * 1000
+    
+    sample = {
+        "deadline_to_trigger": to_ms(marks["trigger"]),
+        "quiz_view_construct": (marks["constructed"] - marks["trigger"]) * 1000,
+        "quiz_view_render": (marks["rendered"] - marks["sound_started"]) * 1000,
+        "deadline_to_display": to_ms(marks["displayed"]),
+        "deadline_to_first_audio": to_ms(sink.first_write_at),
+    }
+    if warmup and "warmed" in marks:
+        sample["warmup_margin"] = -to_ms(marks["warmed"])  # 発火時刻の何ミリ秒前に準備が終わったか
+    return sample
+
+
+def run(iterations: int = 30, problem_sets: Optional[List[str]] = None, difficulty: str = "easy",
+        tone: str = "") -> Dict[str, Dict[str, Dict[str, float]]]:
+    """warmupなし・ありのそれぞれでiterations回発火させ、段階ごとのパーセンタイルを返す"""
+    alarm = make_alarm("bench", DEADLINE.strftime("%H:%M"), ["monday"], label="ベンチマーク",
+                       problem_sets=problem_sets or ["statistics"], difficulty=difficulty, tone=tone)
+    modes = {}
+    with isolated_workdir() as work_dir:
+        asset_cache = AudioAssetCache(os.path.join(work_dir, "audio_cache"))
+        for mode, warmup in (("cold", False), ("warm", True)):
+            samples: Dict[str, List[float]] = {}
+            for _ in range(iterations):
+                for stage, value in run_once(alarm, asset_cache, warmup).items():
+                    samples.setdefault(stage, []).append(value)
+            modes[mode] = {stage: summarize(values) for stage, values in samples.items()}
+    return modes
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="アラーム発火から画面表示・音声再生開始までの遅れを計測")
+    parser.add_argument("--iterations", type=int, default=30, help="モードごとの発火回数")
+    parser.add_argument("--problem-sets", nargs="+", default=["statistics"], help="出題する問題セット")
+    parser.add_argument("--difficulty", default="easy")
+    parser.add_argument("--tone", default="", help="合成音（beep/sweep/chime）で鳴らす場合に指定")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args(argv)
+    
+    modes = run(args.iterations, args.problem_sets, args.difficulty, args.tone)
+    return write_report("fire_latency", {
+        "unit": "ms",
+        "iterations": args.iterations,
+        "problem_sets": args.problem_sets,
+        "difficulty": args.difficulty,
+        "tone": args.tone,
+        "modes": modes,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
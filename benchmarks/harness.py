@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from unittest.mock import Mock
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from models.alarm import Alarm, SoundConfig, SnoozeConfig
+from utils.clock import Clock
+
+# alarm_manager が alarm_debug.log を作らないよう、読み込む前にログ出力先を決めておく
+logging.basicConfig(level=logging.WARNING)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """線形補間によるパーセンタイル（sorted_valuesは昇順）"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """パーセンタイル・平均・最大・最小（値の単位はそのまま）"""
+    ordered = sorted(values)
+    summary = {f"p{p}": round(percentile(ordered, p), 3) for p in PERCENTILES}
+    summary.update({
+        "min": round(ordered[0], 3) if ordered else 0.0,
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "count": len(ordered),
+    })
+    return summary
+
+
+def write_report(name: str, results: Dict[str, Any], output: Optional[str] = None) -> Dict[str, Any]:
+    """計測結果をJSONで出力する（outputがなければ標準出力）"""
+    report = {
+        "benchmark": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+@contextmanager
+def isolated_workdir() -> Iterator[str]:
+    """一時ディレクトリで実行する（problems/ は参照のみ、storage/ などは一時ディレクトリに作られる）"""
+    previous = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="alearm-bench-")
+    shutil.copytree(os.path.join(REPO_ROOT, "problems"), os.path.join(work_dir, "problems"))
+    os.chdir(work_dir)
+    try:
+        yield work_dir
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def mock_page() -> Mock:
+    """画面を表示しない ft.Page の代わり（tests/test_alarm_integration.py と同じ形）"""
+    import flet as ft
+    
+    page = Mock(spec=ft.Page)
+    page.overlay = []
+    page.clean = Mock()
+    page.add = Mock()
+    page.update = Mock()
+    return page
+
+
+def make_alarm(alarm_id: str, time: str, days: List[str], enabled: bool = True, label: Optional[str] = None,
+               problem_sets: Optional[List[str]] = None, difficulty: str = "easy", tone: str = "",
+               snooze: bool = False) -> Alarm:
+    """計測用のアラーム（labelを省略した場合はIDを使う）"""
+    return Alarm(
+        id=alarm_id,
+        enabled=enabled,
+        time=time,
+        days=days,
+        label=label or alarm_id,
+        problem_sets=problem_sets or ["math"],
+        difficulty=difficulty,
+        sound=SoundConfig(file="assets/sounds/alarm_default.wav", volume=0.8, loop=True, tone=tone),
+        snooze=SnoozeConfig(enabled=snooze, duration=300, max_count=3)
+    )
+
+
+class FakeClock(Clock):
+    """指定した日時から実時間と同じ速さで進む時計
+    
+    発火時刻の直前から始めることで、実際に待つのは数十ミリ秒で済み、
+    スケジューラーの待機・起床を含めた遅れをそのまま計測できる。
+    """
+    
+    def __init__(self, start: datetime):
+        self.start = start
+        self._origin = time.perf_counter()
+    
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=time.perf_counter() - self._origin)
+    
+    def perf_counter_at(self, when: datetime) -> float:
+        """時計がwhenを指す時点のtime.perf_counter()の値"""
+        return self._origin + (when - self.start).total_seconds()
+
+
+class StubAudioSink:
+    """プレーヤープロセスの代わりにPCMを受け取り、最初に書き込まれた時刻を記録する"""
+    
+    def __init__(self, chunk_delay: float = 0.01):
+        self.chunk_delay = chunk_delay  # 実際のプレーヤーと同様に書き込みを少し待たせる
+        self.first_write_at: Optional[float] = None
+        self.first_write = threading.Event()
+        self.bytes_written = 0
+        self.returncode: Optional[int] = None
+        self.stdin = self
+    
+    def attach(self, controller) -> "StubAudioSink":
+        """SystemAudioControllerが起動するプレーヤーをこのスタブに置き換える"""
+        def start_process(command, stream=False):
+            controller.current_process = self
+            return self
+        controller._start_process = start_process
+        return self
+    
+    def write(self, data) -> int:
+        if self.returncode is not None:
+            raise BrokenPipeError("stub sink closed")
+        if self.first_write_at is None:
+            self.first_write_at = time.perf_counter()
+            self.first_write.set()
+        self.bytes_written += len(data)
+        time.sleep(self.chunk_delay)
+        return len(data)
+    
+    def close(self):
+        pass
+    
+    def poll(self) -> Optional[int]:
+        return self.returncode
+    
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if self.returncode is None:
+            self.returncode = 0
+        return self.returncode
+    
+    def terminate(self):
+        self.returncode = -15
+    
+    def kill(self):
+        self.returncode = -9
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""問題の読み込みと出題開始にかかる時間・ピークメモリを問題数ごとに計測する
+
+    python -m benchmarks.loader_throughput --sizes 1000 10000 100000 --repeat 3 --output loader.json
+
+problem_bank で生成した問題セットに対して、ProblemLoader.load_problem_set
+（キャッシュなし・スナップショットあり・キャッシュ済み）、_validate_problem、
+load_problems_by_difficulty、QuizSession.start_session（JSON・問題パック）を計測し、
+tracemalloc によるピークメモリと合わせてミリ秒・バイト単位のJSONで出力する。
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .harness import isolated_workdir, summarize, write_report
+from .problem_bank import synthetic_set_name, write_problem_set
+
+from question_loader import ProblemLoader, ProblemRepository, get_problem_repository
+from quiz_manager import QuizSession
+from utils.problem_snapshot import ProblemSnapshotCache
+
+
+DIFFICULTY = "medium"
+
+
+def _timed(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """funcの実行時間（ミリ秒）をrepeat回分返す"""
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def _traced(func: Callable[[], Any]) -> Dict[str, int]:
+    """funcの実行中のピークと、実行後も保持されているメモリ（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {"peak_bytes": peak, "retained_bytes": current}
+
+
+def _timed_session_start(problems_dir: str, set_name: str, repeat: int,
+                         setup: Optional[Callable[[], None]] = None) -> Tuple[List[float], List[float]]:
+    """start_sessionが最初の問題を返すまでと、残りの問題の読み込みが終わるまでの時間（ミリ秒）"""
+    first_problem, all_loaded = [], []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        session = QuizSession([set_name], DIFFICULTY, problems_dir=problems_dir)
+        gc.collect()
+        started = time.perf_counter()
+        session.start_session()
+        first_problem.append((time.perf_counter() - started) * 1000)
+        session.wait_until_loaded()
+        all_loaded.append((time.perf_counter() - started) * 1000)
+    return first_problem, all_loaded
+
+
+def measure_size(work_dir: str, count: int, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    problems_dir = os.path.join(work_dir, f"bank_{count}")
+    started = time.perf_counter()
+    path = write_problem_set(problems_dir, count, seed)
+    generate_ms = (time.perf_counter() - started) * 1000
+    file_bytes = os.path.getsize(path)
+    set_name = synthetic_set_name(count)
+    snapshot_dir = os.path.join(work_dir, f"snapshot_{count}")
+    
+    def fresh_loader(use_snapshot: bool = False) -> ProblemLoader:
+        if not use_snapshot:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        return ProblemLoader(problems_dir, repository=ProblemRepository(),
+                             snapshot_cache=ProblemSnapshotCache(snapshot_dir))
+    
+    cold = _timed(lambda: fresh_loader().load_problem_set(set_name), repeat)
+    snapshot = _timed(lambda: fresh_loader(use_snapshot=True).load_problem_set(set_name), repeat)
+    loader = fresh_loader(use_snapshot=True)
+    loader.load_problem_set(set_name)
+    warm = _timed(lambda: loader.load_problem_set(set_name), repeat)
+    by_difficulty = _timed(lambda: loader.load_problems_by_difficulty(set_name, DIFFICULTY), repeat)
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_problems = json.load(f)
+    validate = _timed(lambda problems=raw_problems: [loader._validate_problem(problem) for problem in problems], repeat)
+    del raw_problems  # 以降の計測でメモリを占有しないよう手放す
+    
+    def reset_shared_cache():
+        # QuizSessionは共有リポジトリと storage/problem_cache を使う
+        get_problem_repository().invalidate()
+        shutil.rmtree(os.path.join("storage", "problem_cache"), ignore_errors=True)
+    
+    def start_session() -> QuizSession:
+        session = QuizSession([set_name], DIFFICULTY, problems_dir=problems_dir)
+        session.start_session()
+        session.wait_until_loaded()
+        return session
+    
+    session_first, session_all = _timed_session_start(problems_dir, set_name, repeat, reset_shared_cache)
+    
+    reset_shared_cache()
+    memory = {
+        "load_problem_set": _traced(lambda: fresh_loader().load_problem_set(set_name)),
+        "start_session": _traced(start_session),
+    }
+    reset_shared_cache()
+    
+    # 問題パックからの出題開始（最後に計測し、パックは削除する）
+    started = time.perf_counter()
+    ProblemLoader(problems_dir).compile_pack(set_name)
+    compile_ms = (time.perf_counter() - started) * 1000
+    pack_first, pack_all = _timed_session_start(problems_dir, set_name, repeat)
+    shutil.rmtree(problems_dir, ignore_errors=True)
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    
+    cold_summary = summarize(cold)
+    validate_summary = summarize(validate)
+    return {
+        "problems": count,
+        "file_bytes": file_bytes,
+        "generate_ms": round(generate_ms, 3),
+        "load_problem_set": {
+            "cold": cold_summary,
+            "snapshot": summarize(snapshot),
+            "warm": summarize(warm),
+            "problems_per_second": round(count / (cold_summary["p50"] / 1000), 1) if cold_summary["p50"] else None,
+        },
+        "validate_problem": {
+            **validate_summary,
+            "per_problem_us": round(validate_summary["p50"] * 1000 / count, 3),
+        },
+        "load_problems_by_difficulty": summarize(by_difficulty),
+        "start_session": {
+            "first_problem": summarize(session_first),
+            "all_loaded": summarize(session_all),
+            "pack_first_problem": summarize(pack_first),
+            "pack_all_loaded": summarize(pack_all),
+            "compile_pack_ms": round(compile_ms, 3),
+        },
+        "memory": memory,
+    }
+
+
+def run(sizes: List[int], repeat: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    with isolated_workdir() as work_dir:
+        return [measure_size(work_dir, count, repeat, seed) for count in sizes]
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="問題の読み込み・出題開始の処理時間とピークメモリを計測")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="問題数（1000〜1000000）")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args(argv)
+    
+    return write_report("loader_throughput", {
+        "unit": "ms",
+        "difficulty": DIFFICULTY,
+        "repeat": args.repeat,
+        "sizes": run(args.sizes, args.repeat, args.seed),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""アプリが保持するメモリを tracemalloc で計測し、上限（バジェット）を超えたら失敗する
+
+    python -m benchmarks.memory_budget --problems 2000 --alarms 200 --budget quiz_view.peak=32 --output memory.json
+
+N問の問題セットを ProblemLoader で、N件のアラームを AlarmStorage で読み込み、
+MainView・ProblemView・QuizView をモックのページ上に構築する。段階ごとに
+ピークと保持し続けているメモリ、その内訳をモジュール別に出力する。
+上限はMB単位で「<段階>.peak」「<段階>.retained」（全体は total）に指定する。
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .harness import SRC_DIR, isolated_workdir, make_alarm, mock_page, write_report
+from .problem_bank import synthetic_set_name, write_problem_set
+
+from models.alarm import WEEKDAY_NAMES, Alarm
+from question_loader import ProblemLoader
+from ui.main_view import MainView
+from ui.problem_view import ProblemView
+from ui.quiz_view import QuizView
+from utils.storage import AlarmStorage
+
+
+MB = 1024 * 1024
+STAGES = ("problem_loader", "alarm_storage", "main_view", "problem_view", "quiz_view")
+
+# 既定の問題数・アラーム数での上限（MB）。Raspberry Piで常駐させる前提の目安
+DEFAULT_BUDGETS = {
+    "problem_loader.peak": 16,
+    "problem_loader.retained": 8,
+    "alarm_storage.peak": 2,
+    "alarm_storage.retained": 1,
+    "main_view.peak": 8,
+    "main_view.retained": 8,
+    "problem_view.peak": 48,
+    "problem_view.retained": 48,
+    "quiz_view.peak": 4,
+    "quiz_view.retained": 2,
+    "total.peak": 80,
+    "total.retained": 64,
+}
+
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def module_name(filename: str) -> str:
+    """アプリのファイルはモジュール名、それ以外はパッケージ名（json、fletなど）"""
+    if filename.startswith("<"):
+        return filename
+    path = os.path.abspath(filename)
+    if path.startswith(SRC_DIR + os.sep):
+        return os.path.splitext(os.path.relpath(path, SRC_DIR))[0].replace(os.sep, ".")
+    for entry in sorted((os.path.abspath(p) for p in sys.path if p), key=len, reverse=True):
+        if path.startswith(entry + os.sep):
+            return os.path.relpath(path, entry).split(os.sep)[0].replace(".py", "")
+    return os.path.basename(filename)
+
+
+def _by_module(snapshot: tracemalloc.Snapshot, previous: tracemalloc.Snapshot, top: int) -> Dict[str, int]:
+    """前のスナップショットから増えた（保持されている）メモリをモジュール別に集計"""
+    totals: Dict[str, int] = defaultdict(int)
+    for stat in snapshot.compare_to(previous, "filename"):
+        totals[module_name(stat.traceback[0].filename)] += stat.size_diff
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return {name: size for name, size in ranked[:top] if size > 0}
+
+
+def _make_alarm(index: int) -> Alarm:
+    return make_alarm(f"alarm_{index:05d}", f"{index % 24:02d}:{index % 60:02d}",
+                      WEEKDAY_NAMES[:5] if index % 2 else WEEKDAY_NAMES,
+                      enabled=index % 3 != 0, label=f"アラーム {index}")
+
+
+def _prepare(problems: int, alarms: int) -> str:
+    """作業ディレクトリに問題セットとアラームを用意し、問題セット名を返す"""
+    write_problem_set("problems", problems)
+    storage = AlarmStorage("storage", save_delay=60)
+    for index in range(alarms):
+        storage.save_alarm(_make_alarm(index))
+    storage.flush()
+    return synthetic_set_name(problems)
+
+
+def measure(problems: int = 2000, alarms: int = 200, top: int = 8) -> Dict[str, Any]:
+    """段階ごとのピーク・保持メモリ（バイト）とモジュール別の内訳"""
+    with isolated_workdir():
+        set_name = _prepare(problems, alarms)
+        page = mock_page()
+        held: List[Any] = []  # 段階をまたいで保持し続けるもの（アプリが持ち続けるものと同じ）
+        
+        def build_problem_view():
+            view = ProblemView()
+            page.add(view.get_view())
+            view.selected_set = set_name
+            view._load_problems()
+            return view
+        
+        def build_quiz_view():
+            view = QuizView([set_name], "medium")
+            view.set_page(page)
+            page.add(view.get_view())
+            view.quiz_session.wait_until_loaded()
+            return view
+        
+        steps: List[Tuple[str, Callable[[], Any]]] = [
+            ("problem_loader", lambda: ProblemLoader().load_problem_set(set_name)),
+            ("alarm_storage", lambda: AlarmStorage("storage").load_alarms()),
+            ("main_view", lambda: page.add(MainView().get_view()) or page.add.call_args),
+            ("problem_view", build_problem_view),
+            ("quiz_view", build_quiz_view),
+        ]
+        
+        gc.collect()
+        tracemalloc.start()
+        try:
+            # 全体のピーク・保持メモリはどちらも計測開始時を基準にする
+            baseline, _ = tracemalloc.get_traced_memory()
+            previous = tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+            stages: Dict[str, Dict[str, Any]] = {}
+            overall_peak = 0
+            for name, step in steps:
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                held.append(step())
+                gc.collect()
+                current, peak = tracemalloc.get_traced_memory()
+                overall_peak = max(overall_peak, peak)
+                snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+                stages[name] = {
+                    "peak_bytes": peak - before,
+                    "retained_bytes": current - before,
+                    "top_modules": _by_module(snapshot, previous, top),
+                }
+                previous = snapshot
+            # 内訳用のスナップショット自体はアプリのメモリではないので、解放してから読む
+            del snapshot, previous
+            gc.collect()
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        for item in held:
+            if isinstance(item, QuizView):
+                item.audio_controller.stop_alarm()
+    
+    return {
+        "stages": stages,
+        "total": {"peak_bytes": overall_peak - baseline, "retained_bytes": retained - baseline},
+    }
+
+
+def check_budgets(results: Dict[str, Any], budgets: Dict[str, float]) -> List[Dict[str, Any]]:
+    """上限（MB）を超えた項目の一覧"""
+    violations = []
+    for key, limit_mb in sorted(budgets.items()):
+        stage, kind = key.rsplit(".", 1)
+        measured = results["total"] if stage == "total" else results["stages"].get(stage)
+        if measured is None:
+            continue
+        used = measured[f"{kind}_bytes"]
+        if used > limit_mb * MB:
+            violations.append({"budget": key, "limit_mb": limit_mb, "used_mb": round(used / MB, 3)})
+    return violations
+
+
+def parse_budget(text: str) -> Tuple[str, float]:
+    key, _, value = text.partition("=")
+    stage, _, kind = key.partition(".")
+    if stage not in STAGES + ("total",) or kind not in ("peak", "retained") or not value:
+        raise argparse.ArgumentTypeError(f"<段階>.peak=<MB> または <段階>.retained=<MB> の形式で指定してください: {text}")
+    return key, float(value)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="tracemallocによるメモリ使用量の計測と上限チェック")
+    parser.add_argument("--problems", type=int, default=2000, help="読み込む問題数")
+    parser.add_argument("--alarms", type=int, default=200, help="読み込むアラーム数")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[],
+                        help="上限（MB）の変更。例: quiz_view.peak=32、total.retained=128")
+    parser.add_argument("--no-default-budgets", action="store_true", help="既定の上限を使わない")
+    parser.add_argument("--top", type=int, default=8, help="段階ごとに出力するモジュール数")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args(argv)
+    
+    budgets = {} if args.no_default_budgets else dict(DEFAULT_BUDGETS)
+    budgets.update(args.budget)
+    results = measure(args.problems, args.alarms, args.top)
+    violations = check_budgets(results, budgets)
+    return write_report("memory_budget", {
+        "unit": "bytes",
+        "problems": args.problems,
+        "alarms": args.alarms,
+        **results,
+        "budgets_mb": budgets,
+        "violations": violations,
+        "within_budget": not violations,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main()["within_budget"] else 1)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""ベンチマーク用の大きな問題セット（problems/quiz と同じ形式）を生成する
+
+    python -m benchmarks.problem_bank --problems-dir /tmp/bank --sizes 1000 100000
+
+<problems-dir>/quiz/synthetic_<件数>.json を書き出す。同じseedなら同じ内容になる。
+"""
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+
+CATEGORIES = ("math", "science", "statistics", "general")
+DIFFICULTIES = ("easy", "medium", "hard")
+OPTION_IDS = ("a", "b", "c", "d")
+
+
+def synthetic_set_name(count: int) -> str:
+    return f"synthetic_{count}"
+
+
+def generate_problem(index: int, rng: random.Random, set_name: str = "synthetic") -> Dict[str, Any]:
+    """1問分のデータ（選択肢4つ、正解は1〜2個）"""
+    left, right = rng.randint(1, 999), rng.randint(1, 999)
+    answer = left + right
+    correct = rng.sample(OPTION_IDS, rng.choice((1, 1, 1, 2)))
+    options = []
+    for offset, option_id in enumerate(OPTION_IDS):
+        value = answer if option_id in correct else answer + offset + 1
+        options.append({"id": option_id, "type": "text", "content": str(value)})
+    return {
+        "id": f"{set_name}_{index:07d}",
+        "type": "quiz",
+        "category": rng.choice(CATEGORIES),
+        "title": f"足し算 {index}",
+        "difficulty": rng.choice(DIFFICULTIES),
+        "content": {
+            "question": {"type": "text", "text": f"{left} + {right} の値を求めなさい。"},
+            "options": options,
+            "correct_answers": sorted(correct)
+        }
+    }
+
+
+def write_problem_set(problems_dir: str, count: int, seed: int = 0, set_name: Optional[str] = None) -> str:
+    """問題セットのJSONを1問ずつ書き出し（100万問でも全体をメモリに持たない）、パスを返す"""
+    set_name = set_name or synthetic_set_name(count)
+    quiz_dir = os.path.join(problems_dir, "quiz")
+    os.makedirs(quiz_dir, exist_ok=True)
+    path = os.path.join(quiz_dir, f"{set_name}.json")
+    rng = random.Random(seed)
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for index in range(count):
+            if index:
+                f.write(",\n")
+            f.write(json.dumps(generate_problem(index, rng, set_name), ensure_ascii=False))
+        f.write("\n]\n")
+    os.replace(temp_path, path)
+    return path
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="ベンチマーク用の問題セットを生成")
+    parser.add_argument("--problems-dir", required=True, help="書き出し先（quiz/ の親ディレクトリ）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="問題数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    for count in args.sizes:
+        path = write_problem_set(args.problems_dir, count, args.seed)
+        print(f"{path}: {count}問 ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""シミュレーション時間で数週間分のアラームを数秒で動かし、発火漏れ・二重発火を検証する
+
+    python -m benchmarks.soak --start 2025-03-01 --days 31 --timezone America/New_York --output soak.json
+
+AlarmScheduler.run_pending を SimulatedClock の時刻で直接呼び出し、戻り値の秒数だけ
+時計を進める。夏時間の切り替え・実行中のアラーム編集・同時刻のアラーム・スヌーズを含み、
+すべての発火時刻が一度だけ鳴ったかを確認して、発火時刻の誤差と
+シミュレーション上の1日あたりのスケジューラーのCPU時間をJSONで出力する。
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from .harness import isolated_workdir, make_alarm, summarize, write_report
+
+from alarm_manager import AlarmManager
+from models.alarm import WEEKDAY_NAMES, Alarm
+from utils.clock import Clock
+
+
+SLEEP_TIMEOUT = 10.0  # 実時間でこの秒数待ってもスリープが始まらない・戻らなければ異常とみなす
+MIN_STEP_SECONDS = 0.001
+MATCH_WINDOW = timedelta(minutes=5)  # 発火をどの発火予定時刻のものとみなすか
+END_MARGIN = timedelta(minutes=2)  # 終了間際の発火予定は検証しない
+WEEKDAYS = WEEKDAY_NAMES[:5]
+
+
+class SimulatedClock(Clock):
+    """ドライバーが advance_to で進める時計（内部ではUTCで持ち、ローカル時刻に変換して返す）
+    
+    sleep したスレッドは、ドライバーが時計をその時刻まで進めると戻る。
+    """
+    
+    def __init__(self, start: datetime, tz: tzinfo):
+        self.tz = tz
+        self._utc = start.astimezone(timezone.utc)
+        self._cond = threading.Condition()
+        self._sleepers: List[datetime] = []
+        self.sleeps_started = 0
+        self.completed_sleeps: List[Tuple[datetime, datetime]] = []  # (戻るべき時刻, 戻った時刻)
+    
+    def utc_now(self) -> datetime:
+        return self._utc
+    
+    def now(self) -> datetime:
+        return self._utc.astimezone(self.tz).replace(tzinfo=None)
+    
+    def utc_offset(self) -> timedelta:
+        return self._utc.astimezone(self.tz).utcoffset() or timedelta(0)
+    
+    def sleep(self, seconds: float):
+        with self._cond:
+            wake = self._utc + timedelta(seconds=seconds)
+            self._sleepers.append(wake)
+            self.sleeps_started += 1
+            self._cond.notify_all()
+            while self._utc < wake:
+                self._cond.wait()
+            self._sleepers.remove(wake)
+            self.completed_sleeps.append((wake, self._utc))
+            self._cond.notify_all()
+    
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        with self._cond:
+            wake = self._utc + timedelta(seconds=timeout)
+            self._sleepers.append(wake)
+            self._cond.notify_all()
+            while self._utc < wake and not event.is_set():
+                self._cond.wait(0.01)
+            self._sleepers.remove(wake)
+            self._cond.notify_all()
+            return event.is_set()
+    
+    def next_wakeup(self) -> Optional[datetime]:
+        with self._cond:
+            return min(self._sleepers) if self._sleepers else None
+    
+    def wait_for_sleeps(self, count: int):
+        """count回目の sleep が始まるまで実時間で待つ（別スレッドのタイマーが時刻を登録するのを待つ）"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.sleeps_started >= count, SLEEP_TIMEOUT):
+                raise RuntimeError("スリープが開始されませんでした")
+    
+    def advance_to(self, utc: datetime):
+        """時計を進め、期限が来た sleep がすべて戻るまで待つ"""
+        with self._cond:
+            if utc > self._utc:
+                self._utc = utc
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: all(wake > self._utc for wake in self._sleepers), SLEEP_TIMEOUT):
+                raise RuntimeError("スリープが戻りませんでした")
+
+
+def local_time_exists(local: datetime, tz: tzinfo) -> bool:
+    """夏時間の開始で飛ばされる時刻ならFalse"""
+    return local.replace(tzinfo=tz).astimezone(timezone.utc).astimezone(tz).replace(tzinfo=None) == local
+
+
+def intended_instant(local: datetime, tz: tzinfo) -> datetime:
+    """ローカル時刻のアラームが鳴るべきUTC時刻
+    
+    夏時間の終了で2回現れる時刻は1回目、夏時間の開始で飛ばされる時刻は時計が進んだ瞬間。
+    """
+    if local_time_exists(local, tz):
+        return local.replace(tzinfo=tz, fold=0).astimezone(timezone.utc)
+    gap_start = local.replace(second=0, microsecond=0)
+    while not local_time_exists(gap_start - timedelta(minutes=1), tz):
+        gap_start -= timedelta(minutes=1)
+    # 存在しない時刻はfold=0で切り替え前の時差として解釈される
+    return gap_start.replace(tzinfo=tz, fold=0).astimezone(timezone.utc)
+
+
+def default_alarms() -> List[Alarm]:
+    return [
+        make_alarm("weekday-a", "07:00", WEEKDAYS),
+        make_alarm("weekday-b", "07:00", WEEKDAYS),  # 同じ時刻のアラーム
+        make_alarm("daily-early", "01:30", WEEKDAY_NAMES),  # 夏時間の終了で2回現れる時刻
+        make_alarm("daily-gap", "02:30", WEEKDAY_NAMES),  # 夏時間の開始で飛ばされる時刻
+        make_alarm("weekend", "09:00", ["saturday", "sunday"], snooze=True),
+        make_alarm("edited", "08:00", WEEKDAY_NAMES),
+    ]
+
+
+@dataclass
+class Edit:
+    """実行中のアラーム編集（changesがNoneなら削除、存在しないIDなら追加）"""
+    day: int
+    at: str
+    alarm_id: str
+    changes: Optional[Dict[str, Any]]
+
+
+def default_edits() -> List[Edit]:
+    return [
+        Edit(1, "08:10:17", "edited", {"time": "08:30"}),  # 鳴った後に同じ日の後の時刻へ変更
+        Edit(3, "12:00:17", "weekday-b", {"enabled": False}),
+        Edit(5, "12:00:17", "weekday-b", {"enabled": True}),
+        Edit(7, "12:00:17", "added", make_alarm("added", "06:45", WEEKDAY_NAMES).to_dict()),
+        Edit(20, "12:00:17", "daily-early", None),
+    ]
+
+
+class InMemoryAlarmStorage:
+    """AlarmStorageの代わり（編集の履歴を検証用に記録する）"""
+    
+    def __init__(self, alarms: List[Alarm], alarms_file: str, started_at: datetime):
+        self.alarms_file = alarms_file
+        self.companion_files: List[str] = []
+        self._data = {alarm.id: alarm.to_dict() for alarm in alarms}
+        self.history: Dict[str, List[Tuple[datetime, Optional[Dict[str, Any]]]]] = {
+            alarm_id: [(started_at, dict(data))] for alarm_id, data in self._data.items()
+        }
+    
+    def load_alarms(self) -> List[Alarm]:
+        return [Alarm.from_dict(data) for data in self._data.values()]
+    
+    def save_alarm(self, alarm: Alarm) -> bool:
+        self._data[alarm.id] = alarm.to_dict()
+        return True
+    
+    def apply(self, edit: Edit, at: datetime):
+        if edit.changes is None:
+            self._data.pop(edit.alarm_id, None)
+            data = None
+        elif edit.alarm_id in self._data:
+            self._data[edit.alarm_id].update(edit.changes)
+            data = dict(self._data[edit.alarm_id])
+        else:
+            self._data[edit.alarm_id] = data = dict(edit.changes)
+        self.history.setdefault(edit.alarm_id, []).append((at, data))
+
+
+def expected_occurrences(history: Dict[str, List[Tuple[datetime, Optional[Dict[str, Any]]]]],
+                         start: datetime, end: datetime, tz: tzinfo) -> List[Tuple[str, datetime, datetime]]:
+    """編集履歴から、鳴るべき (アラームID, ローカル時刻, UTC時刻) を求める"""
+    occurrences = []
+    for alarm_id, versions in history.items():
+        for index, (valid_from, data) in enumerate(versions):
+            valid_until = versions[index + 1][0] if index + 1 < len(versions) else end
+            if data is None or not data["enabled"]:
+                continue
+            alarm = Alarm.from_dict(data)
+            day = valid_from.astimezone(tz).date() - timedelta(days=1)
+            last_day = valid_until.astimezone(tz).date() + timedelta(days=1)
+            while day <= last_day:
+                if alarm.schedule.includes_weekday(day.weekday()):
+                    local = datetime.combine(day, datetime.min.time()) + timedelta(minutes=alarm.schedule.minute_of_day)
+                    instant = intended_instant(local, tz)
+                    if valid_from < instant <= valid_until and instant <= end - END_MARGIN:
+                        occurrences.append((alarm_id, local, instant))
+                day += timedelta(days=1)
+    return sorted(occurrences, key=lambda occurrence: occurrence[2])
+
+
+def run(start: date, days: int, tz_name: str = "America/New_York", jitter: float = 0.02,
+        seed: int = 0, alarms: Optional[List[Alarm]] = None, edits: Optional[List[Edit]] = None) -> Dict[str, Any]:
+    """startからdays日分をシミュレーションし、検証結果と計測値を返す"""
+    tz = ZoneInfo(tz_name)
+    rng = random.Random(seed)
+    start_local = datetime.combine(start, datetime.min.time())
+    start_utc = intended_instant(start_local, tz)
+    end_utc = intended_instant(start_local + timedelta(days=days), tz)
+    clock = SimulatedClock(start_utc, tz)
+    
+    pending_edits = sorted(
+        (
+            intended_instant(datetime.combine(start + timedelta(days=edit.day), datetime.strptime(edit.at, "%H:%M:%S").time()), tz),
+            edit
+        )
+        for edit in (default_edits() if edits is None else edits)
+        if edit.day < days
+    )
+    fires: List[Tuple[str, datetime, datetime]] = []
+    snoozes: List[datetime] = []
+    per_day: Dict[str, Dict[str, float]] = {}
+    
+    with isolated_workdir() as work_dir:
+        storage = InMemoryAlarmStorage(default_alarms() if alarms is None else alarms, f"{work_dir}/alarms.json", start_utc)
+        
+        def on_fire(alarm: Alarm):
+            fires.append((alarm.id, clock.now(), clock.utc_now()))
+            if alarm.snooze.enabled:
+                manager.current_alarm = alarm
+                manager.is_alarm_active = True
+                manager.snooze_current_alarm()
+                snoozes.append(clock.utc_now() + timedelta(seconds=alarm.snooze.duration))
+                clock.wait_for_sleeps(len(snoozes))
+        
+        manager = AlarmManager(on_fire, alarm_storage=storage, clock=clock)
+        scheduler = manager.scheduler
+        
+        wall_started = time.perf_counter()
+        scheduler_wake = start_utc
+        run_scheduler = True
+        while True:
+            now = clock.utc_now()
+            if run_scheduler or now >= scheduler_wake:
+                cpu_started = time.thread_time()
+                timeout = scheduler.run_pending()
+                cpu = time.thread_time() - cpu_started
+                stats = per_day.setdefault(clock.now().date().isoformat(), {"cpu_ms": 0.0, "wakeups": 0, "fires": 0})
+                stats["cpu_ms"] += cpu * 1000
+                stats["wakeups"] += 1
+                # 実際の待機と同様に、起きる時刻を少し遅らせる
+                scheduler_wake = now + timedelta(seconds=max(timeout, MIN_STEP_SECONDS) + rng.uniform(0, jitter))
+            
+            targets = [scheduler_wake, end_utc]
+            if pending_edits:
+                targets.append(pending_edits[0][0])
+            next_sleep = clock.next_wakeup()
+            if next_sleep:
+                targets.append(next_sleep)
+            target = min(targets)
+            clock.advance_to(target)
+            if target >= end_utc:
+                break
+            
+            run_scheduler = False
+            while pending_edits and pending_edits[0][0] <= clock.utc_now():
+                at, edit = pending_edits.pop(0)
+                storage.apply(edit, at)
+                scheduler.notify_alarms_changed()
+                run_scheduler = True  # 変更通知で待機中のスケジューラーが起きる
+        wall_seconds = time.perf_counter() - wall_started
+        
+        completed_snoozes = list(clock.completed_sleeps)
+        # 終了時に残っているスヌーズタイマーを終わらせる
+        clock.advance_to(end_utc + timedelta(days=1))
+    
+    return _verify(storage, fires, snoozes, completed_snoozes, per_day, start_utc, end_utc, tz, wall_seconds)
+
+
+def _verify(storage: InMemoryAlarmStorage, fires, snoozes, completed_snoozes, per_day, start_utc: datetime,
+            end_utc: datetime, tz: tzinfo, wall_seconds: float) -> Dict[str, Any]:
+    expected = expected_occurrences(storage.history, start_utc, end_utc, tz)
+    unmatched = {index: occurrence for index, occurrence in enumerate(expected)}
+    errors: List[float] = []
+    unexpected = []
+    should_trigger_mismatches = []
+    dst_gap_fires = 0
+    
+    for alarm_id, fired_local, fired_utc in fires:
+        per_day[fired_local.date().isoformat()]["fires"] += 1
+        candidates = [
+            index for index, (expected_id, _, instant) in unmatched.items()
+            if expected_id == alarm_id and abs(fired_utc - instant) <= MATCH_WINDOW
+        ]
+        if not candidates:
+            if fired_utc <= end_utc - END_MARGIN:
+                unexpected.append({"alarm_id": alarm_id, "fired_at": fired_local.isoformat()})
+            continue
+        
+        _, local, instant = unmatched.pop(min(candidates))
+        errors.append((fired_utc - instant).total_seconds())
+        if not local_time_exists(local, tz):
+            dst_gap_fires += 1
+            continue
+        # Alarm.should_trigger でも鳴るべき時刻と判定されるか
+        data = next(data for at, data in reversed(storage.history[alarm_id]) if at <= fired_utc)
+        if data is None or not Alarm.from_dict(data).should_trigger(fired_local):
+            should_trigger_mismatches.append({"alarm_id": alarm_id, "fired_at": fired_local.isoformat()})
+    
+    missed = [
+        {"alarm_id": alarm_id, "scheduled_at": local.isoformat()}
+        for alarm_id, local, _ in unmatched.values()
+    ]
+    snooze_errors = [(returned - wake).total_seconds() for wake, returned in completed_snoozes]
+    days = sorted(per_day.items())
+    
+    return {
+        "exactly_once": not missed and not unexpected,
+        "expected_occurrences": len(expected),
+        "fires": len(fires),
+        "missed": missed,
+        "unexpected": unexpected,
+        "should_trigger_mismatches": should_trigger_mismatches,
+        "dst_gap_fires": dst_gap_fires,
+        "fire_error_seconds": summarize(errors),
+        "scheduler_cpu_ms_per_day": summarize([stats["cpu_ms"] for _, stats in days]),
+        "scheduler_wakeups_per_day": summarize([stats["wakeups"] for _, stats in days]),
+        "snooze_timers": {
+            "started": len(snoozes),
+            "completed": len([wake for wake in snoozes if wake <= end_utc]),
+            "returned": len(completed_snoozes),
+            "max_error_seconds": max(snooze_errors, default=0.0),
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "per_day": [
+            {"date": day, "cpu_ms": round(stats["cpu_ms"], 3), "wakeups": stats["wakeups"], "fires": stats["fires"]}
+            for day, stats in days
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="シミュレーション時間でのアラームスケジューラーの長時間検証")
+    parser.add_argument("--start", default="2025-03-01", help="開始日（YYYY-MM-DD、ローカル時刻の0時から）")
+    parser.add_argument("--days", type=int, default=31, help="シミュレーションする日数")
+    parser.add_argument("--timezone", default="America/New_York", help="夏時間のあるタイムゾーン")
+    parser.add_argument("--jitter", type=float, default=0.02, help="スケジューラーが起きる時刻の最大遅れ（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args(argv)
+    
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    results = run(start, args.days, args.timezone, args.jitter, args.seed)
+    return write_report("soak", {
+        "start": args.start,
+        "days": args.days,
+        "timezone": args.timezone,
+        "jitter_seconds": args.jitter,
+        **results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main()["exactly_once"] else 1)
@@ -1,10 +1,13 @@
+import heapq
 import threading
-import time
 import logging
-from datetime import datetime
-from typing import List, Optional, Callable
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Callable, Tuple
 from models.alarm import Alarm
-from utils.storage import AlarmStorage
+from utils.clock import Clock, SYSTEM_CLOCK
+from utils.storage import AlarmStorage, get_alarm_storage
+from utils.file_watcher import FileWatcher
 # utils.audio import removed - audio control is handled by main.py
 
 # ログ設定
@@ -14,61 +17,244 @@ logging.basicConfig(
     format='%(asctime)s - %(message)s'
 )
 
-
 class AlarmScheduler:
-    def __init__(self, on_alarm_trigger: Optional[Callable] = None):
+    """次回発火時刻のヒープを持ち、最も近い期限まで待機するスケジューラー"""
+    
+    def __init__(self, on_alarm_trigger: Optional[Callable] = None,
+                 alarm_storage: Optional[AlarmStorage] = None,
+                 on_alarm_warmup: Optional[Callable] = None, warmup_lead: float = 60,
+                 clock: Optional[Clock] = None):
         self.alarms: List[Alarm] = []
         self.running = False
         self.thread: Optional[threading.Thread] = None
-        self.check_interval = 10  # 10秒ごとにチェック（デバッグ用）
-        self.alarm_storage = AlarmStorage()
+        self.max_sleep = 60  # 外部編集や時計補正に追従するための最大待機秒数
+        self.late_tolerance = 30  # この秒数以内の遅れなら発火する
+        self.alarm_storage = alarm_storage or get_alarm_storage()
         self.on_alarm_trigger = on_alarm_trigger
-        self.triggered_alarms: set[str] = set()
+        self.on_alarm_warmup = on_alarm_warmup
+        self.warmup_lead = warmup_lead  # 発火のこの秒数前に問題・画面・音声を準備させる
+        self.clock = clock or SYSTEM_CLOCK  # 現在時刻と待機（シミュレーションでは差し替える）
+        self.file_watcher = FileWatcher(
+            self.alarm_storage.alarms_file,
+            on_change=self.notify_alarms_changed,
+            companions=self.alarm_storage.companion_files
+        )
+        self._heap: List[Tuple[datetime, str]] = []
+        self._deadlines: Dict[str, datetime] = {}
+        self._last_fired: Dict[str, datetime] = {}
+        self._warmed: Dict[str, datetime] = {}  # 準備済みのアラームIDと、その発火時刻
+        self._warmup_threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._needs_reload = True
+        self._utc_offset: Optional[timedelta] = None
     
     def start(self):
         if self.running:
             return
         
         self.running = True
+        self._needs_reload = True
+        self.file_watcher.start()
         self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
         logging.info("アラーム監視を開始しました")
     
     def stop(self):
         self.running = False
+        self._wakeup.set()
         if self.thread:
             self.thread.join()
+        self.file_watcher.stop()
         logging.info("アラーム監視を停止しました")
     
-    def reload_alarms(self):
-        self.alarms = self.alarm_storage.load_alarms()
-        logging.info(f"アラーム設定を再読み込みしました: {len(self.alarms)}件")
+    def notify_alarms_changed(self):
+        """アラームの追加・編集・削除時に呼び出し、スケジュールを再計算させる"""
+        self._needs_reload = True
+        self._wakeup.set()
+    
+    def reload_alarms(self) -> List[str]:
+        """アラームを読み直し、追加・変更・削除されたアラームのIDを返す"""
+        # 読み込み中の書き込みを次回検知できるよう、読む前に状態を記録
+        self.file_watcher.refresh()
+        loaded = self.alarm_storage.load_alarms()
+        
+        current = {alarm.id: alarm for alarm in self.alarms}
+        changed_ids = []
+        alarms = []
+        for alarm in loaded:
+            existing = current.pop(alarm.id, None)
+            if existing and existing.to_dict() == alarm.to_dict():
+                # 変更のないアラームは既存のオブジェクトを使い続ける
+                alarms.append(existing)
+            else:
+                alarms.append(alarm)
+                changed_ids.append(alarm.id)
+        changed_ids.extend(current.keys())
+        
+        self.alarms = alarms
+        logging.info(f"アラーム設定を再読み込みしました: {len(self.alarms)}件（変更 {len(changed_ids)}件）")
+        return changed_ids
+    
+    def next_deadline(self) -> Optional[datetime]:
+        """次に発火予定の日時"""
+        return self._heap[0][0] if self._heap else None
+    
+    def _rebuild_schedule(self, now: datetime, changed_ids: Optional[List[str]] = None):
+        """発火時刻を再計算（changed_idsを指定した場合はそのアラームのみ）"""
+        if changed_ids is None:
+            self._deadlines = {}
+            targets = self.alarms
+        else:
+            alarm_ids = {alarm.id for alarm in self.alarms}
+            changed = set(changed_ids)
+            for alarm_id in changed:
+                self._deadlines.pop(alarm_id, None)
+                if alarm_id not in alarm_ids:
+                    self._last_fired.pop(alarm_id, None)
+            targets = [alarm for alarm in self.alarms if alarm.id in changed]
+        
+        # 発火許容範囲内の直近の時刻も対象にする（起動直後や編集直後のため）
+        horizon = now - timedelta(seconds=self.late_tolerance)
+        for alarm in targets:
+            after = horizon
+            last_fired = self._last_fired.get(alarm.id)
+            if last_fired and last_fired >= after:
+                after = last_fired
+            deadline = alarm.next_occurrence(after)
+            if deadline:
+                self._deadlines[alarm.id] = deadline
+        
+        self._heap = [(deadline, alarm_id) for alarm_id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        
+        if self._heap:
+            logging.debug(f"次回アラーム: {self._heap[0][1]} {self._heap[0][0]}")
+    
+    def _fire_due_alarms(self, now: datetime, clock_shift: float = 0):
+        """期限が来たアラームを発火（clock_shiftは直前に夏時間の開始で進んだ秒数）"""
+        alarms_by_id = {alarm.id: alarm for alarm in self.alarms}
+        
+        while self._heap and self._heap[0][0] <= now:
+            deadline, alarm_id = heapq.heappop(self._heap)
+            alarm = alarms_by_id.get(alarm_id)
+            if not alarm:
+                continue
+            
+            self._last_fired[alarm_id] = deadline
+            # 夏時間の開始で飛ばされた時刻（02:30など）は、時計が進んだ直後に鳴らす
+            lateness = max(0.0, (now - deadline).total_seconds() - clock_shift)
+            if lateness <= self.late_tolerance:
+                self._trigger_alarm(alarm)
+            else:
+                logging.info(f"アラーム {alarm_id} は {lateness:.0f}秒遅れのためスキップしました")
+            
+            next_deadline = alarm.next_occurrence(deadline)
+            if next_deadline:
+                self._deadlines[alarm_id] = next_deadline
+                heapq.heappush(self._heap, (next_deadline, alarm_id))
+            else:
+                self._deadlines.pop(alarm_id, None)
+    
+    def _warm_up_due_alarms(self, now: datetime):
+        """発火時刻まで warmup_lead 秒以内になったアラームの準備を一度だけ依頼する"""
+        if not self.on_alarm_warmup:
+            return
+        
+        alarms_by_id = {alarm.id: alarm for alarm in self.alarms}
+        for alarm_id in list(self._warmed):
+            if alarm_id not in self._deadlines:
+                del self._warmed[alarm_id]
+        
+        for deadline, alarm_id in sorted(self._heap):
+            if deadline - timedelta(seconds=self.warmup_lead) > now:
+                break
+            if deadline <= now or self._warmed.get(alarm_id) == deadline or alarm_id not in alarms_by_id:
+                continue
+            
+            self._warmed[alarm_id] = deadline
+            logging.info(f"アラーム準備: {alarm_id} ({deadline})")
+            # 準備（問題の読み込みや音声の変換）が長引いても発火を遅らせないよう、別スレッドで行う
+            thread = threading.Thread(
+                target=self._run_warmup,
+                args=(self.on_alarm_warmup, alarms_by_id[alarm_id], deadline),
+                name=f"alarm-warmup-{alarm_id}",
+                daemon=True
+            )
+            self._warmup_threads = [t for t in self._warmup_threads if t.is_alive()] + [thread]
+            thread.start()
+    
+    def _run_warmup(self, warmup: Callable, alarm: Alarm, deadline: datetime):
+        try:
+            warmup(alarm, deadline)
+        except Exception as e:
+            # 準備に失敗しても発火時に通常どおり処理される
+            logging.error(f"アラーム準備エラー: {e}")
+    
+    def wait_for_warmups(self, timeout: Optional[float] = None):
+        """実行中の準備が終わるまで待つ"""
+        for thread in list(self._warmup_threads):
+            thread.join(timeout)
+    
+    def _next_warmup(self) -> Optional[datetime]:
+        if not self.on_alarm_warmup:
+            return None
+        pending = [
+            deadline - timedelta(seconds=self.warmup_lead)
+            for deadline, alarm_id in self._heap
+            if self._warmed.get(alarm_id) != deadline
+        ]
+        return min(pending) if pending else None
+    
+    def _seconds_until_next(self, now: datetime) -> float:
+        if not self._heap:
+            return self.max_sleep
+        wake_at = self._heap[0][0]
+        next_warmup = self._next_warmup()
+        if next_warmup and next_warmup < wake_at:
+            wake_at = next_warmup
+        remaining = (wake_at - now).total_seconds()
+        return max(0.0, min(remaining, self.max_sleep))
+    
+    def run_pending(self) -> float:
+        """再読み込み・発火・準備を一度行い、次に確認するまでの秒数を返す"""
+        try:
+            if self._needs_reload:
+                self._needs_reload = False
+                changed_ids = self.reload_alarms()
+                if changed_ids:
+                    self._rebuild_schedule(self.clock.now(), changed_ids)
+            
+            self._fire_due_alarms(self.clock.now(), self._clock_shift())
+            self._warm_up_due_alarms(self.clock.now())
+            return self._seconds_until_next(self.clock.now())
+        
+        except Exception as e:
+            logging.error(f"アラーム監視エラー: {e}")
+            return self.max_sleep
+    
+    def _clock_shift(self) -> float:
+        """前回の確認以降に時計が進んだ秒数（夏時間の開始時のみ正）"""
+        offset = self.clock.utc_offset()
+        previous, self._utc_offset = self._utc_offset, offset
+        if previous is None or offset == previous:
+            return 0.0
+        logging.info(f"UTCとの時差が変わりました: {previous} -> {offset}")
+        return max(0.0, (offset - previous).total_seconds())
     
     def _monitor_loop(self):
         while self.running:
-            try:
-                now = datetime.now()
-                logging.debug(f"アラーム監視チェック: {now.strftime('%H:%M:%S')}")
-                self.reload_alarms()
-                
-                for alarm in self.alarms:
-                    logging.debug(f"アラーム {alarm.id}: enabled={alarm.enabled}, time={alarm.time}, should_trigger={alarm.should_trigger(now)}")
-                    if alarm.should_trigger(now):
-                        alarm_key = f"{alarm.id}_{now.strftime('%Y%m%d')}"
-                        
-                        if alarm_key not in self.triggered_alarms:
-                            self.triggered_alarms.add(alarm_key)
-                            self._trigger_alarm(alarm)
-                
-                self._cleanup_old_triggered_alarms()
-                
-            except Exception as e:
-                logging.error(f"アラーム監視エラー: {e}")
+            timeout = self.run_pending()
             
-            time.sleep(self.check_interval)
+            if self.clock.wait(self._wakeup, timeout):
+                self._wakeup.clear()
+            elif timeout >= self.max_sleep and not self.file_watcher.uses_inotify:
+                # inotifyが使えない環境ではstat比較で外部からの編集を検知
+                if self.file_watcher.has_changed():
+                    self._needs_reload = True
     
     def _trigger_alarm(self, alarm: Alarm):
-        alarm.last_triggered = datetime.now()
+        alarm = replace(alarm, last_triggered=self.clock.now())
+        self.alarms = [alarm if existing.id == alarm.id else existing for existing in self.alarms]
         self.alarm_storage.save_alarm(alarm)
         
         logging.info(f"アラーム発火: {alarm.label} ({alarm.time})")
@@ -77,18 +263,20 @@ class AlarmScheduler:
         
         if self.on_alarm_trigger:
             self.on_alarm_trigger(alarm)
-    
-    def _cleanup_old_triggered_alarms(self):
-        current_date = datetime.now().strftime('%Y%m%d')
-        self.triggered_alarms = {
-            key for key in self.triggered_alarms 
-            if key.endswith(current_date)
-        }
 
 
 class AlarmManager:
-    def __init__(self, on_alarm_trigger: Optional[Callable] = None):
-        self.scheduler = AlarmScheduler(on_alarm_trigger)
+    def __init__(self, on_alarm_trigger: Optional[Callable] = None,
+                 on_alarm_warmup: Optional[Callable] = None, warmup_lead: float = 60,
+                 alarm_storage: Optional[AlarmStorage] = None, clock: Optional[Clock] = None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.scheduler = AlarmScheduler(
+            on_alarm_trigger,
+            alarm_storage=alarm_storage,
+            on_alarm_warmup=on_alarm_warmup,
+            warmup_lead=warmup_lead,
+            clock=self.clock
+        )
         self.current_alarm: Optional[Alarm] = None
         self.is_alarm_active = False
     
@@ -99,6 +287,10 @@ class AlarmManager:
         self.scheduler.stop()
         self.stop_current_alarm()
     
+    def notify_alarms_changed(self):
+        """アラーム設定の変更をスケジューラーに通知"""
+        self.scheduler.notify_alarms_changed()
+    
     # trigger_alarm method removed - alarm triggering is handled by AlarmScheduler directly
     
     def stop_current_alarm(self):
@@ -133,7 +325,7 @@ class AlarmManager:
     
     def _snooze_timer(self, duration: int):
         """スヌーズタイマー（音声再開は呼び出し元で処理）"""
-        time.sleep(duration)
+        self.clock.sleep(duration)
         
         # スヌーズ後の音声再開は QuizView で処理されるため、
         # ここではログ出力のみ
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""問題セットのJSON（problems/quiz/*.json）を問題パック（*.pack）にコンパイルする
+
+使い方:
+    python src/compile_problems.py [--problems-dir problems] [セット名 ...]
+
+セット名を省略した場合は元のJSONがあるすべての問題セットをコンパイルする。
+パック作成後に元のJSONを編集した場合、そのパックは使われずJSONから読み込まれる。
+"""
+import argparse
+import sys
+from question_loader import ProblemLoader
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="問題セットを問題パックにコンパイルします")
+    parser.add_argument("--problems-dir", default="problems", help="problemsディレクトリのパス")
+    parser.add_argument("sets", nargs="*", help="コンパイルする問題セット名（省略時はすべて）")
+    args = parser.parse_args(argv)
+    
+    loader = ProblemLoader(args.problems_dir)
+    # パックのみで配布されたセットはコンパイル元がないので対象外
+    set_names = args.sets or loader.get_available_problem_sets(include_packs=False)
+    
+    failed = False
+    for set_name in set_names:
+        try:
+            count = loader.compile_pack(set_name)
+        except Exception as e:
+            print(f"{set_name}: コンパイルエラー: {e}")
+            failed = True
+            continue
+        print(f"{set_name}: {count}問")
+    
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
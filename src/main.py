@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import flet as ft
-from typing import Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 from ui.main_view import MainView
 from ui.alarm_view import AlarmView
 from ui.quiz_view import QuizView
@@ -8,14 +10,27 @@ from ui.problem_view import ProblemView
 from ui.settings_view import SettingsView
 from alarm_manager import AlarmManager
 from models.alarm import Alarm
+from utils.clock import Clock
+from utils.storage import AlarmStorage, SettingsStorage, get_alarm_storage, get_problem_stats_storage
 
 
 class AlarmApp:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, alarm_storage: Optional[AlarmStorage] = None,
+                 clock: Optional[Clock] = None):
         self.page = page
-        self.alarm_manager = AlarmManager(on_alarm_trigger=self._on_alarm_trigger)
+        settings = SettingsStorage().load_settings()
+        self.alarm_manager = AlarmManager(
+            on_alarm_trigger=self._on_alarm_trigger,
+            on_alarm_warmup=self._on_alarm_warmup,
+            warmup_lead=settings.get("warmup_lead_seconds", 60),
+            alarm_storage=alarm_storage,
+            clock=clock
+        )
         self.current_view: Optional[ft.Control] = None
         self.alarm_triggered = False
+        # 発火前に準備したクイズ画面（アラームID -> (アラームの内容, 発火時刻, QuizView)）
+        self._warmed_quizzes: Dict[str, Tuple[tuple, datetime, QuizView]] = {}
+        self._warmup_lock = threading.Lock()
         
         self.page.title = "alearm-q"
         self.page.window_width = 800
@@ -40,7 +55,8 @@ class AlarmApp:
             on_alarm_settings=self._show_alarm_settings,
             on_show_message=self._show_message,
             on_problem_settings=self._show_problem_settings,
-            on_settings=self._show_settings
+            on_settings=self._show_settings,
+            on_alarms_changed=self.alarm_manager.notify_alarms_changed
         )
         self._show_main_view()
         
@@ -56,7 +72,8 @@ class AlarmApp:
         self.page.clean()
         alarm_view = AlarmView(
             on_back=self._show_main_view,
-            alarm_id=alarm_id
+            alarm_id=alarm_id,
+            on_alarms_changed=self.alarm_manager.notify_alarms_changed
         )
         self.current_view = alarm_view.get_view()
         self.page.add(self.current_view)
@@ -80,24 +97,71 @@ class AlarmApp:
         self.page.add(self.current_view)
         self.page.update()
     
+    def _create_quiz_view(self, alarm: Alarm) -> QuizView:
+        return QuizView(
+            problem_sets=alarm.problem_sets,
+            difficulty=alarm.difficulty,
+            on_quiz_complete=self._on_quiz_complete
+        )
+    
+    @staticmethod
+    def _warmup_key(alarm: Alarm) -> tuple:
+        return (alarm.id, tuple(alarm.problem_sets), alarm.difficulty, tuple(sorted(alarm.sound.to_dict().items())))
+    
+    def _on_alarm_warmup(self, alarm: Alarm, deadline: datetime):
+        """発火前（準備用のスレッド）に問題の読み込みと画面の構築を済ませる"""
+        import logging
+        logging.info(f"[MainApp] アラーム準備開始: {alarm.label} ({deadline})")
+        
+        quiz_view = self._create_quiz_view(alarm)
+        quiz_view.prepare(alarm.sound)
+        
+        with self._warmup_lock:
+            if deadline <= self.alarm_manager.clock.now():
+                # 準備が終わる前に発火した場合は、発火時に作った画面が使われている
+                logging.info("[MainApp] 発火時刻を過ぎたため準備を破棄")
+                return
+            # 近い時刻に複数のアラームがあっても、それぞれの準備を残しておく
+            self._drop_expired_warmups()
+            self._warmed_quizzes[alarm.id] = (self._warmup_key(alarm), deadline, quiz_view)
+        
+        logging.info("[MainApp] アラーム準備完了")
+    
+    def _drop_expired_warmups(self):
+        """発火の許容時間を過ぎても使われなかった準備を破棄する（_warmup_lockを取得して呼ぶ）"""
+        scheduler = self.alarm_manager.scheduler
+        expired_before = self.alarm_manager.clock.now() - timedelta(seconds=scheduler.late_tolerance)
+        for alarm_id, (_, deadline, _) in list(self._warmed_quizzes.items()):
+            if deadline < expired_before:
+                del self._warmed_quizzes[alarm_id]
+    
+    def _take_warmed_quiz_view(self, alarm: Alarm) -> Optional[QuizView]:
+        with self._warmup_lock:
+            self._drop_expired_warmups()
+            warmed = self._warmed_quizzes.pop(alarm.id, None)
+        # 準備後にアラームが編集されていたら使わない
+        if warmed and warmed[0] == self._warmup_key(alarm):
+            return warmed[2]
+        return None
+    
     def _on_alarm_trigger(self, alarm: Alarm):
         import logging
         logging.info(f"[MainApp] アラーム発火処理開始: {alarm.label}")
         
+        # スキップする場合も、このアラーム用の準備はここで破棄する
+        quiz_view = self._take_warmed_quiz_view(alarm)
+        
         if self.alarm_triggered:
             logging.info("[MainApp] 既にアラーム発火中のためスキップ")
             return
         
         self.alarm_triggered = True
-        self.page.clean()
-        
-        logging.info(f"[MainApp] QuizView作成 - 問題セット: {alarm.problem_sets}, 難易度: {alarm.difficulty}")
         
-        quiz_view = QuizView(
-            problem_sets=alarm.problem_sets,
-            difficulty=alarm.difficulty,
-            on_quiz_complete=self._on_quiz_complete
-        )
+        if quiz_view:
+            logging.info("[MainApp] 準備済みのQuizViewを使用")
+        else:
+            logging.info(f"[MainApp] QuizView作成 - 問題セット: {alarm.problem_sets}, 難易度: {alarm.difficulty}")
+            quiz_view = self._create_quiz_view(alarm)
         
         # ページ参照を設定
         quiz_view.set_page(self.page)
@@ -107,6 +171,7 @@ class AlarmApp:
         logging.info("システムオーディオでアラーム音声再生を開始")
         
         self.current_view = quiz_view.get_view()
+        self.page.clean()
         self.page.add(self.current_view)
         self.page.update()
         
@@ -140,6 +205,9 @@ class AlarmApp:
     
     def cleanup(self):
         self.alarm_manager.stop()
+        # 保留中のアラーム変更・回答集計を確実に書き込む
+        get_alarm_storage().flush()
+        get_problem_stats_storage().flush()
 
 
 def main(page: ft.Page):
@@ -152,4 +220,5 @@ def main(page: ft.Page):
     page.on_window_event = on_window_event
 
 
-ft.app(main)
+if __name__ == "__main__":
+    ft.app(main)
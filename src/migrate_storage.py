@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""storage/*.json をSQLiteデータベース（storage/alearm.db）へ移行する
+
+使い方:
+    python src/migrate_storage.py [--storage-dir storage]
+
+移行後はデータベースが存在する限り、アラーム・設定・回答履歴・回答集計はSQLiteに保存される。
+元のJSONファイルは削除しないので、必要に応じてバックアップとして残しておける。
+"""
+import argparse
+import sys
+from utils.sqlite_storage import migrate_json_to_sqlite
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="JSONストレージをSQLiteへ移行します")
+    parser.add_argument("--storage-dir", default="storage", help="storageディレクトリのパス")
+    args = parser.parse_args(argv)
+    
+    try:
+        counts = migrate_json_to_sqlite(args.storage_dir)
+    except FileExistsError as e:
+        print(e)
+        return 1
+    
+    print(f"移行完了: アラーム {counts['alarms']}件, 設定 {counts['settings']}項目, "
+          f"回答履歴 {counts['history']}件, 回答集計 {counts['problem_stats']}問")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from datetime import datetime
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from enum import Enum
+from .frozen import frozen_slots, intern, intern_all
 
 
 class DayOfWeek(Enum):
@@ -14,29 +16,91 @@ class DayOfWeek(Enum):
     SUNDAY = "sunday"
 
 
-@dataclass
+# datetime.weekday() の順序（月曜=0）
+WEEKDAY_NAMES = [day.value for day in DayOfWeek]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+@dataclass(frozen=True)
+class AlarmSchedule:
+    """文字列解析済みのスケジュール（曜日ビットマスクと0時からの分数）"""
+    day_mask: int
+    minute_of_day: int
+    week_minutes: Tuple[int, ...]
+    
+    @classmethod
+    def compile(cls, time: str, days: Sequence[str]) -> "AlarmSchedule":
+        hour_str, minute_str = time.split(":")
+        hour, minute = int(hour_str), int(minute_str)
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"不正な時刻です: {time}")
+        
+        day_mask = 0
+        for day in days:
+            day_name = day.lower()
+            if day_name in WEEKDAY_NAMES:
+                day_mask |= 1 << WEEKDAY_NAMES.index(day_name)
+        
+        minute_of_day = hour * 60 + minute
+        # 週の始め（月曜0時）からの分数で並べた発火時刻の索引
+        week_minutes = tuple(
+            weekday * MINUTES_PER_DAY + minute_of_day
+            for weekday in range(7) if day_mask & (1 << weekday)
+        )
+        return cls(day_mask=day_mask, minute_of_day=minute_of_day, week_minutes=week_minutes)
+    
+    def includes_weekday(self, weekday: int) -> bool:
+        return bool(self.day_mask & (1 << weekday))
+    
+    def next_occurrence(self, after: datetime) -> Optional[datetime]:
+        """afterより後で最初の発火日時"""
+        if not self.week_minutes:
+            return None
+        
+        week_start = datetime.combine(after.date() - timedelta(days=after.weekday()), datetime.min.time())
+        after_minute = after.weekday() * MINUTES_PER_DAY + after.hour * 60 + after.minute
+        
+        # 同じ分の発火時刻（hh:mm:00）は after 以前なので含めない
+        index = bisect_right(self.week_minutes, after_minute)
+        if index < len(self.week_minutes):
+            target_minute = self.week_minutes[index]
+        else:
+            target_minute = self.week_minutes[0] + MINUTES_PER_WEEK
+        return week_start + timedelta(minutes=target_minute)
+
+
+@frozen_slots
+@dataclass(frozen=True)
 class SoundConfig:
     file: str
     volume: float
     loop: bool
+    ramp_seconds: float = 0  # 0より大きければ、この秒数をかけて無音から volume まで大きくする
+    tone: str = ""  # beep/sweep/chimeを指定すると、fileの代わりに合成音を鳴らす
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "SoundConfig":
         return cls(
-            file=data["file"],
+            file=intern(data["file"]),
             volume=data["volume"],
-            loop=data["loop"]
+            loop=data["loop"],
+            ramp_seconds=data.get("ramp_seconds", 0),
+            tone=intern(data.get("tone", ""))
         )
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "file": self.file,
             "volume": self.volume,
-            "loop": self.loop
+            "loop": self.loop,
+            "ramp_seconds": self.ramp_seconds,
+            "tone": self.tone
         }
 
 
-@dataclass
+@frozen_slots
+@dataclass(frozen=True)
 class SnoozeConfig:
     enabled: bool
     duration: int
@@ -58,22 +122,42 @@ class SnoozeConfig:
         }
 
 
-@dataclass
+@frozen_slots
+@dataclass(frozen=True)
 class Alarm:
+    """変更できないアラーム設定（変更は dataclasses.replace で新しいオブジェクトを作る）"""
     id: str
     enabled: bool
     time: str
-    days: List[str]
+    days: Tuple[str, ...]
     label: str
-    problem_sets: List[str]
+    problem_sets: Tuple[str, ...]
     difficulty: str
     sound: SoundConfig
     snooze: SnoozeConfig
-    last_triggered: Optional[datetime] = None
+    last_triggered: Optional[datetime] = field(default=None, compare=False)  # 実行時の状態（保存しない）
+    _schedule: Optional[AlarmSchedule] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # __slots__のためinit=Falseのフィールドは既定値が入らない
+        object.__setattr__(self, "_schedule", None)
+        # リストで渡されても変更できないタプルとして持つ
+        object.__setattr__(self, "days", intern_all(self.days))
+        object.__setattr__(self, "problem_sets", intern_all(self.problem_sets))
+        object.__setattr__(self, "difficulty", intern(self.difficulty))
+    
+    @property
+    def schedule(self) -> AlarmSchedule:
+        schedule = self._schedule
+        if schedule is None:
+            # 同じ内容から同じ結果になるので、複数スレッドから同時に計算されても問題ない
+            schedule = AlarmSchedule.compile(self.time, self.days)
+            object.__setattr__(self, "_schedule", schedule)
+        return schedule
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Alarm":
-        return cls(
+        alarm = cls(
             id=data["id"],
             enabled=data["enabled"],
             time=data["time"],
@@ -85,35 +169,39 @@ class Alarm:
             snooze=SnoozeConfig.from_dict(data["snooze"]),
             last_triggered=None
         )
+        # 読み込み時にスケジュールを解析し、不正な時刻はここで弾く
+        alarm.schedule
+        return alarm
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
             "enabled": self.enabled,
             "time": self.time,
-            "days": self.days,
+            "days": list(self.days),
             "label": self.label,
-            "problem_sets": self.problem_sets,
+            "problem_sets": list(self.problem_sets),
             "difficulty": self.difficulty,
             "sound": self.sound.to_dict(),
             "snooze": self.snooze.to_dict()
         }
     
+    def next_occurrence(self, after: datetime) -> Optional[datetime]:
+        """afterより後で最初にアラームが鳴る日時（鳴らない場合はNone）"""
+        if not self.enabled:
+            return None
+        return self.schedule.next_occurrence(after)
+    
     def should_trigger(self, now: datetime) -> bool:
         if not self.enabled:
             return False
         
-        # 曜日を英語形式で統一
-        weekday_map = {
-            0: "monday", 1: "tuesday", 2: "wednesday", 3: "thursday",
-            4: "friday", 5: "saturday", 6: "sunday"
-        }
-        weekday = weekday_map[now.weekday()]
-        if weekday not in self.days:
+        schedule = self.schedule
+        if not schedule.includes_weekday(now.weekday()):
             return False
         
-        alarm_time = datetime.strptime(self.time, "%H:%M").time()
-        target_datetime = datetime.combine(now.date(), alarm_time)
+        midnight = datetime.combine(now.date(), datetime.min.time())
+        target_datetime = midnight + timedelta(minutes=schedule.minute_of_day)
         diff = abs((now - target_datetime).total_seconds())
         
         if self.last_triggered:
@@ -122,4 +210,14 @@ class Alarm:
             if same_day and same_alarm:
                 return False
         
-        return diff <= 30
\ No newline at end of file
+        return diff <= 30
+
+
+def find_next_alarm(alarms: List[Alarm], after: datetime) -> Optional[Tuple[Alarm, datetime]]:
+    """曜日を考慮して最も早く鳴るアラームとその日時を返す"""
+    next_alarm: Optional[Tuple[Alarm, datetime]] = None
+    for alarm in alarms:
+        occurrence = alarm.next_occurrence(after)
+        if occurrence and (next_alarm is None or occurrence < next_alarm[1]):
+            next_alarm = (alarm, occurrence)
+    return next_alarm
@@ -0,0 +1,50 @@
+import sys
+from dataclasses import fields
+from typing import Any, Iterable, Tuple, Type, TypeVar, cast
+
+
+T = TypeVar("T")
+
+
+def _getstate(self) -> Tuple[Any, ...]:
+    return tuple(getattr(self, name) for name in self.__slots__)
+
+
+def _setstate(self, state: Tuple[Any, ...]):
+    for name, value in zip(self.__slots__, state):
+        object.__setattr__(self, name, value)
+
+
+def frozen_slots(cls: Type[T]) -> Type[T]:
+    """frozenなdataclassを__slots__付きのクラスに作り直す（Python 3.9でも使えるslots=True相当）
+    
+    インスタンスごとの__dict__を持たないため1件あたりのメモリが減り、
+    変更できないのでスレッド間でコピーせずに共有できる。
+    pickle・copyにも対応する（問題のスナップショットで使う）。
+    init=Falseのフィールドは既定値が入らないため、__post_init__で設定すること。
+    """
+    names = tuple(f.name for f in fields(cast(Any, cls)))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = names
+    for name in names:
+        # 既定値はdataclassの__init__が保持しているので、クラス変数は不要
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__getstate__"] = _getstate
+    cls_dict["__setstate__"] = _setstate
+    
+    metaclass: Any = type(cls)
+    slotted = metaclass(cls.__name__, cls.__bases__, cls_dict)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+def intern(value: str) -> str:
+    """同じ値が大量に現れる文字列（カテゴリ・種類・選択肢IDなど）を1つのオブジェクトにまとめる"""
+    # 文字列以外（不正なデータ）はそのまま返し、検証は読み込み側に任せる
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_all(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(intern(value) for value in values)
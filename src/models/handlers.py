@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Collection, Set
 import flet as ft
 from .problem import Problem, QuizContent
 
@@ -20,15 +20,18 @@ class ProblemHandler(ABC):
 
 class QuizHandler(ProblemHandler):
     def __init__(self):
-        self.selected_options: List[str] = []
+        self.selected_options: Set[str] = set()
         self.problem: Problem = None
         self.quiz_content: QuizContent = None
         self.quiz_view = None
     
     def render(self, page: ft.Page, problem: Problem) -> ft.Control:
         self.problem = problem
-        self.quiz_content = QuizContent.from_dict(problem.content)
-        self.selected_options = []
+        content = problem.content  # 読み込み時に解析済み
+        if not isinstance(content, QuizContent):
+            content = QuizContent.from_dict(content)
+        self.quiz_content = content
+        self.selected_options.clear()
         
         question_text = ft.Text(
             self.quiz_content.question.text,
@@ -89,12 +92,12 @@ class QuizHandler(ProblemHandler):
     
     def _on_option_change(self, e):
         option_id = e.control.data
+        if option_id not in self.quiz_content.options_by_id:
+            return  # 表示中の問題の選択肢ではない
         if e.control.value:
-            if option_id not in self.selected_options:
-                self.selected_options.append(option_id)
+            self.selected_options.add(option_id)
         else:
-            if option_id in self.selected_options:
-                self.selected_options.remove(option_id)
+            self.selected_options.discard(option_id)
     
     def _on_submit(self, e):
         if self.quiz_view and hasattr(self.quiz_view, '_on_answer_submitted'):
@@ -104,13 +107,11 @@ class QuizHandler(ProblemHandler):
         """QuizViewの参照を設定"""
         self.quiz_view = quiz_view
     
-    def check_answer(self, selected_options: List[str]) -> bool:
+    def check_answer(self, selected_options: Collection[str]) -> bool:
         if not self.quiz_content:
             return False
         
-        correct_set = set(self.quiz_content.correct_answers)
-        selected_set = set(selected_options)
-        return correct_set == selected_set
+        return self.quiz_content.is_correct(selected_options)
     
     def get_progress(self) -> float:
         if not self.quiz_content:
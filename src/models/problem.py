@@ -1,6 +1,8 @@
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import AbstractSet, Collection, Tuple, Dict, Any, FrozenSet, Optional, Union
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
+from .frozen import frozen_slots, intern, intern_all
 
 
 class ProblemType(Enum):
@@ -14,38 +16,8 @@ class Difficulty(Enum):
     HARD = "hard"
 
 
-@dataclass
-class Problem:
-    id: str
-    type: ProblemType
-    category: str
-    title: str
-    difficulty: Difficulty
-    content: Dict[str, Any]
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "Problem":
-        return cls(
-            id=data["id"],
-            type=ProblemType(data["type"]),
-            category=data["category"],
-            title=data["title"],
-            difficulty=Difficulty(data["difficulty"]),
-            content=data["content"]
-        )
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "type": self.type.value,
-            "category": self.category,
-            "title": self.title,
-            "difficulty": self.difficulty.value,
-            "content": self.content
-        }
-
-
-@dataclass
+@frozen_slots
+@dataclass(frozen=True)
 class QuizQuestion:
     type: str
     text: str
@@ -54,13 +26,20 @@ class QuizQuestion:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "QuizQuestion":
         return cls(
-            type=data["type"],
+            type=intern(data["type"]),
             text=data["text"],
             image=data.get("image")
         )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"type": self.type, "text": self.text}
+        if self.image is not None:
+            data["image"] = self.image
+        return data
 
 
-@dataclass
+@frozen_slots
+@dataclass(frozen=True)
 class QuizOption:
     id: str
     type: str
@@ -69,22 +48,145 @@ class QuizOption:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "QuizOption":
         return cls(
-            id=data["id"],
-            type=data["type"],
+            id=intern(data["id"]),
+            type=intern(data["type"]),
             content=data["content"]
         )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "content": self.content
+        }
 
 
-@dataclass
+@frozen_slots
+@dataclass(frozen=True)
 class QuizContent:
     question: QuizQuestion
-    options: List[QuizOption]
-    correct_answers: List[str]
+    options: Tuple[QuizOption, ...]
+    correct_answers: Tuple[str, ...]
+    # 出題・採点で使う派生データ（初回アクセス時に作り、以降は使い回す）
+    _correct_answer_set: Optional[FrozenSet[str]] = field(default=None, init=False, repr=False, compare=False)
+    _options_by_id: Optional[Dict[str, QuizOption]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "_correct_answer_set", None)
+        object.__setattr__(self, "_options_by_id", None)
+    
+    @property
+    def correct_answer_set(self) -> FrozenSet[str]:
+        answers = self._correct_answer_set
+        if answers is None:
+            answers = frozenset(self.correct_answers)
+            object.__setattr__(self, "_correct_answer_set", answers)
+        return answers
+    
+    @property
+    def options_by_id(self) -> Dict[str, QuizOption]:
+        """選択肢IDから選択肢を引く辞書（変更しないこと）"""
+        options = self._options_by_id
+        if options is None:
+            options = {option.id: option for option in self.options}
+            object.__setattr__(self, "_options_by_id", options)
+        return options
+    
+    def is_correct(self, selected: Collection[str]) -> bool:
+        """選択した選択肢IDが正解と過不足なく一致するか"""
+        correct = self.correct_answer_set
+        if isinstance(selected, AbstractSet):
+            return selected == correct  # 集合同士なら新しい集合を作らずに比較できる
+        return frozenset(selected) == correct
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "QuizContent":
         return cls(
             question=QuizQuestion.from_dict(data["question"]),
-            options=[QuizOption.from_dict(opt) for opt in data["options"]],
-            correct_answers=data["correct_answers"]
-        )
\ No newline at end of file
+            options=tuple(QuizOption.from_dict(opt) for opt in data["options"]),
+            correct_answers=intern_all(data["correct_answers"])
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question": self.question.to_dict(),
+            "options": [option.to_dict() for option in self.options],
+            "correct_answers": list(self.correct_answers)
+        }
+
+
+@frozen_slots
+@dataclass(frozen=True)
+class Problem:
+    id: str
+    type: ProblemType
+    category: str
+    title: str
+    difficulty: Difficulty
+    content: Union[QuizContent, Dict[str, Any]]  # クイズは読み込み時に解析済みのQuizContent
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Problem":
+        problem_type = ProblemType(data["type"])
+        content = data["content"]
+        if problem_type is ProblemType.QUIZ:
+            # 元のJSONの辞書は保持せず、解析結果だけを持つ
+            content = QuizContent.from_dict(content)
+        return cls(
+            id=data["id"],
+            type=problem_type,
+            category=intern(data["category"]),
+            title=data["title"],
+            difficulty=Difficulty(data["difficulty"]),
+            content=content
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type.value,
+            "category": self.category,
+            "title": self.title,
+            "difficulty": self.difficulty.value,
+            "content": self.content.to_dict() if isinstance(self.content, QuizContent) else self.content
+        }
+
+
+@frozen_slots
+@dataclass(frozen=True)
+class AnswerStats:
+    """問題ごとの回答の集計（回答のたびに差分で更新する）"""
+    correct: int = 0
+    wrong: int = 0
+    streak: int = 0  # 直近の連続正解数（正）または連続不正解数（負）
+    last_answered_at: Optional[str] = None
+    
+    def recorded(self, correct: bool, answered_at: datetime) -> "AnswerStats":
+        """1回の回答を加えた集計"""
+        if correct:
+            streak = self.streak + 1 if self.streak > 0 else 1
+        else:
+            streak = self.streak - 1 if self.streak < 0 else -1
+        return AnswerStats(
+            correct=self.correct + int(correct),
+            wrong=self.wrong + int(not correct),
+            streak=streak,
+            last_answered_at=answered_at.isoformat(timespec="seconds")
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnswerStats":
+        return cls(
+            correct=data.get("correct", 0),
+            wrong=data.get("wrong", 0),
+            streak=data.get("streak", 0),
+            last_answered_at=data.get("last_answered_at")
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "correct": self.correct,
+            "wrong": self.wrong,
+            "streak": self.streak,
+            "last_answered_at": self.last_answered_at
+        }
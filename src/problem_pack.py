@@ -0,0 +1,283 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+from models.problem import Problem
+from utils.file_watcher import file_signature
+
+
+# 問題パック（problems/quiz/<set>.pack）のバイナリ形式
+#
+#   ヘッダー | レコード（4バイト長 + JSON） ... | レコード位置表 | 索引配列 ... | 索引ディレクトリ
+#   | 問題ID ... | 問題ID位置表 | 問題ID順の位置表
+#
+# レコード位置表と索引配列はネイティブのバイトオーダーで8バイト境界に置き、
+# mmap上のmemoryviewとしてコピーせずに参照する。
+PACK_MAGIC = b"AQPK"
+PACK_VERSION = 2
+PACK_EXTENSION = ".pack"
+HEADER = struct.Struct("<4sHBxIIQQQqQQ")
+RECORD_LENGTH = struct.Struct("<I")
+GROUP_ENTRY = struct.Struct("<BxHIQ")
+
+KIND_DIFFICULTY = 0
+KIND_CATEGORY = 1
+KIND_TYPE = 2
+BYTE_ORDER_FLAG = 0 if sys.byteorder == "little" else 1
+
+
+class IndexedProblems(ABC):
+    """難易度・カテゴリ・タイプ別の索引（値は問題の位置の昇順列）を持つ問題集合"""
+    by_difficulty: Dict[str, Sequence[int]]
+    by_category: Dict[str, Sequence[int]]
+    by_type: Dict[str, Sequence[int]]
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+    
+    @abstractmethod
+    def problem_at(self, position: int) -> Problem:
+        pass
+    
+    def positions(self, difficulty: Optional[str] = None, category: Optional[str] = None,
+                  problem_type: Optional[str] = None) -> Sequence[int]:
+        """条件に合う問題の位置（条件を指定しなければ全件）"""
+        keyed = [
+            index.get(key, ())
+            for index, key in (
+                (self.by_difficulty, difficulty),
+                (self.by_category, category),
+                (self.by_type, problem_type),
+            )
+            if key is not None
+        ]
+        if not keyed:
+            return range(len(self))
+        if len(keyed) == 1:
+            return keyed[0]
+        
+        # 最も小さい索引を基準に積集合をとる
+        keyed.sort(key=len)
+        matched = set(keyed[0])
+        for positions in keyed[1:]:
+            matched.intersection_update(positions)
+        return sorted(matched)
+    
+    def select(self, difficulty: Optional[str] = None, category: Optional[str] = None,
+               problem_type: Optional[str] = None) -> List[Problem]:
+        return [self.problem_at(position) for position in self.positions(difficulty, category, problem_type)]
+    
+    def position_of(self, problem_id: str) -> Optional[int]:
+        """問題IDの位置（IDの索引は初回に作り、以降は使い回す）"""
+        positions_by_id: Optional[Dict[str, int]] = getattr(self, "_positions_by_id", None)
+        if positions_by_id is None:
+            positions_by_id = {}
+            for position in range(len(self)):
+                positions_by_id.setdefault(self.problem_at(position).id, position)
+            self._positions_by_id = positions_by_id
+        return positions_by_id.get(problem_id)
+
+
+class ProblemPack(IndexedProblems):
+    """mmapで開いた問題パック。開くコストは問題数に依存せず、参照した問題だけを復元する"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"問題パックが空です: {path}")
+        self._views: List[memoryview] = []
+        
+        try:
+            (magic, version, byte_order, record_count, group_count,
+             offsets_offset, groups_offset, source_size, source_mtime_ns,
+             id_offsets_offset, id_order_offset) = HEADER.unpack_from(self._mmap, 0)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                raise ValueError(f"問題パックの形式が不正です: {path}")
+            if byte_order != BYTE_ORDER_FLAG:
+                raise ValueError(f"バイトオーダーが異なる問題パックです: {path}")
+            
+            self.source_size = source_size
+            self.source_mtime_ns = source_mtime_ns
+            self._record_count = record_count
+            self._offsets = self._array_view(offsets_offset, record_count, "Q")
+            self._id_offsets = self._array_view(id_offsets_offset, record_count + 1, "Q")
+            self._id_order = self._array_view(id_order_offset, record_count, "I")
+            
+            self.by_difficulty = {}
+            self.by_category = {}
+            self.by_type = {}
+            indexes = {KIND_DIFFICULTY: self.by_difficulty, KIND_CATEGORY: self.by_category, KIND_TYPE: self.by_type}
+            position = groups_offset
+            for _ in range(group_count):
+                kind, key_length, count, array_offset = GROUP_ENTRY.unpack_from(self._mmap, position)
+                position += GROUP_ENTRY.size
+                key = self._mmap[position:position + key_length].decode('utf-8')
+                position += key_length
+                indexes[kind][key] = self._array_view(array_offset, count, "I")
+        except Exception:
+            self.close()
+            raise
+    
+    def _array_view(self, offset: int, count: int, typecode: Literal["I", "Q"]) -> memoryview:
+        itemsize = array(typecode).itemsize
+        raw = memoryview(self._mmap)[offset:offset + count * itemsize]
+        view = raw.cast(typecode)
+        self._views.extend([raw, view])
+        return view
+    
+    def __len__(self) -> int:
+        return self._record_count
+    
+    def _record(self, position: int) -> Dict[str, Any]:
+        offset = self._offsets[position]
+        (length,) = RECORD_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + RECORD_LENGTH.size
+        return json.loads(self._mmap[start:start + length].decode('utf-8'))
+    
+    def problem_at(self, position: int) -> Problem:
+        return Problem.from_dict(self._record(position))
+    
+    def _encoded_id_at(self, position: int) -> bytes:
+        return self._mmap[self._id_offsets[position]:self._id_offsets[position + 1]]
+    
+    def position_of(self, problem_id: str) -> Optional[int]:
+        """問題IDの位置（ID順の位置表を二分探索し、レコードは復元しない）"""
+        target = problem_id.encode('utf-8')
+        low, high = 0, self._record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._encoded_id_at(self._id_order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._record_count and self._encoded_id_at(self._id_order[low]) == target:
+            return self._id_order[low]
+        return None
+    
+    def matches_source(self, source_path: str) -> bool:
+        """パック作成時から元のJSONファイルが変わっていないか"""
+        signature = file_signature(source_path)
+        if signature is None:
+            return True  # JSONがない場合はパックのみで配布されたものとして扱う
+        mtime_ns, size, _ = signature
+        return size == self.source_size and mtime_ns == self.source_mtime_ns
+    
+    def close(self):
+        # memoryviewを解放しないとmmapを閉じられない
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+
+def _pad_to(f, alignment: int):
+    remainder = f.tell() % alignment
+    if remainder:
+        f.write(b"\0" * (alignment - remainder))
+
+
+def write_problem_pack(pack_path: str, problems: Iterable[Dict[str, Any]],
+                       source_signature: Optional[Tuple[int, int, int]] = None) -> int:
+    """検証済みの問題データから問題パックを作成し、書き込んだ問題数を返す"""
+    offsets = array("Q")
+    groups: Dict[Tuple[int, str], array] = {}
+    encoded_ids: List[bytes] = []
+    
+    temp_path = pack_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(b"\0" * HEADER.size)
+            
+            for problem_data in problems:
+                record_number = len(offsets)
+                payload = json.dumps(problem_data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+                offsets.append(f.tell())
+                f.write(RECORD_LENGTH.pack(len(payload)))
+                f.write(payload)
+                encoded_ids.append(problem_data["id"].encode('utf-8'))
+                for kind, key in ((KIND_DIFFICULTY, problem_data["difficulty"]),
+                                  (KIND_CATEGORY, problem_data["category"]),
+                                  (KIND_TYPE, problem_data["type"])):
+                    groups.setdefault((kind, key), array("I")).append(record_number)
+            
+            _pad_to(f, 8)
+            offsets_offset = f.tell()
+            f.write(offsets.tobytes())
+            
+            array_offsets = {}
+            for group_key, record_numbers in groups.items():
+                _pad_to(f, 8)
+                array_offsets[group_key] = f.tell()
+                f.write(record_numbers.tobytes())
+            
+            groups_offset = f.tell()
+            for (kind, key), record_numbers in groups.items():
+                encoded_key = key.encode('utf-8')
+                f.write(GROUP_ENTRY.pack(kind, len(encoded_key), len(record_numbers), array_offsets[(kind, key)]))
+                f.write(encoded_key)
+            
+            # 同じIDが複数あっても安定ソートで先頭の位置が先に来る
+            id_offsets = array("Q")
+            for encoded_id in encoded_ids:
+                id_offsets.append(f.tell())
+                f.write(encoded_id)
+            id_offsets.append(f.tell())
+            id_order = array("I", sorted(range(len(encoded_ids)), key=encoded_ids.__getitem__))
+            
+            _pad_to(f, 8)
+            id_offsets_offset = f.tell()
+            f.write(id_offsets.tobytes())
+            id_order_offset = f.tell()
+            f.write(id_order.tobytes())
+            
+            source_mtime_ns, source_size = (source_signature[0], source_signature[1]) if source_signature else (0, 0)
+            f.seek(0)
+            f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, BYTE_ORDER_FLAG, len(offsets), len(groups),
+                                offsets_offset, groups_offset, source_size, source_mtime_ns,
+                                id_offsets_offset, id_order_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, pack_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(offsets)
+
+
+_open_packs: Dict[str, Tuple[Tuple[int, int, int], ProblemPack]] = {}
+_open_packs_lock = threading.Lock()
+
+
+def open_problem_pack(pack_path: str) -> Optional[ProblemPack]:
+    """問題パックを開く（開いたパックはファイルが変わるまで共有する）"""
+    key = os.path.abspath(pack_path)
+    signature = file_signature(key)
+    with _open_packs_lock:
+        cached = _open_packs.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        if cached:
+            # 古いパックは参照中の可能性があるため閉じずに手放す
+            del _open_packs[key]
+        if signature is None:
+            return None
+        
+        try:
+            pack = ProblemPack(key)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"問題パック読み込みエラー: {e}")
+            return None
+        _open_packs[key] = (signature, pack)
+        return pack
@@ -0,0 +1,78 @@
+import random
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Optional, Sequence, Tuple
+from models.problem import AnswerStats, Problem
+from problem_pack import IndexedProblems
+from utils.fenwick import FenwickTree
+
+
+def selection_weight(stats: AnswerStats) -> float:
+    """出題の重み（未回答は1。直近に間違えた問題ほど出やすく、続けて正解した問題ほど出にくい）"""
+    if stats.streak < 0:
+        return 1.0 + min(-stats.streak, 3)
+    if stats.streak > 0:
+        return 1.0 / (1 + 3 * min(stats.streak, 3))
+    return 1.0
+
+
+class ProblemSampler:
+    """複数の問題集合の索引から、重みに比例した確率で重複なしに1問ずつ取り出す
+    
+    全候補に通し番号 [0, size) を振り、重みをFenwick木で持つ。重みの初期値は1で、
+    変更した候補だけを記録するため、開始時のコストは候補数に依存しない。
+    取り出し・重みの変更はどちらも O(log 候補数)。問題は取り出すときに初めて復元する。
+    """
+    
+    def __init__(self, sources: Sequence[Tuple[IndexedProblems, Sequence[int]]],
+                 rng: Optional[random.Random] = None):
+        self._sources: List[Tuple[IndexedProblems, Sequence[int]]] = []
+        self._offsets: List[int] = []  # 各集合の先頭の通し番号
+        size = 0
+        for problems, positions in sources:
+            if len(positions):
+                self._sources.append((problems, positions))
+                self._offsets.append(size)
+                size += len(positions)
+        self.size = size
+        self.drawn = 0
+        self._tree = FenwickTree(size)
+        self._rng = rng or random
+    
+    def remaining(self) -> int:
+        return self.size - self.drawn
+    
+    def _indexes_of(self, problem_id: str) -> Iterator[int]:
+        """問題IDに対応する候補の通し番号（複数のセットに含まれていれば複数）"""
+        for offset, (problems, positions) in zip(self._offsets, self._sources):
+            position = problems.position_of(problem_id)
+            if position is None:
+                continue
+            # 候補の位置は昇順なので二分探索で探す
+            index = bisect_left(positions, position)
+            if index < len(positions) and positions[index] == position:
+                yield offset + index
+    
+    def set_weight(self, problem_id: str, weight: float):
+        """まだ取り出していない候補の重みを変更する"""
+        if weight <= 0:
+            raise ValueError(f"重みは0より大きくしてください: {weight}")
+        for index in self._indexes_of(problem_id):
+            if self._tree.weight(index) > 0:
+                self._tree.set_weight(index, weight)
+    
+    def draw(self) -> Optional[Problem]:
+        """まだ取り出していない候補から1問（残りがなければNone）"""
+        if self.drawn >= self.size:
+            return None
+        
+        while True:
+            index = self._tree.find(self._rng.random() * self._tree.total())
+            # 浮動小数点の誤差で取り出し済み（重み0）の位置に当たった場合は引き直す
+            if self._tree.weight(index) > 0:
+                break
+        self._tree.set_weight(index, 0.0)
+        self.drawn += 1
+        
+        source = bisect_right(self._offsets, index) - 1
+        problems, positions = self._sources[source]
+        return problems.problem_at(positions[index - self._offsets[source]])
@@ -1,50 +1,397 @@
+import codecs
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence, Tuple
 from models.problem import Problem
+from problem_pack import IndexedProblems, ProblemPack, PACK_EXTENSION, open_problem_pack, write_problem_pack
+from utils.file_watcher import file_signature
+from utils.problem_snapshot import ProblemSnapshotCache
+
+
+def iter_json_array(path: str, chunk_size: int = 64 * 1024,
+                    on_read: Optional[Callable[[bytes], None]] = None) -> Iterator[Any]:
+    """JSON配列の要素を先頭から1つずつ解析して返す（ファイル全体を待たない）
+    
+    on_read には読み込んだバイト列がそのまま順に渡される（解析した内容のハッシュ計算に使う）。
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        def read_text() -> str:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    return text_decoder.decode(b"", final=True)
+                if on_read:
+                    on_read(data)
+                text = text_decoder.decode(data)
+                if text:  # 複数バイト文字の途中で切れた場合は続きを読む
+                    return text
+        
+        buffer = read_text()
+        position = 0
+        eof = False
+        
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            if eof:
+                return False
+            chunk = read_text()
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+        
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+        
+        skip_whitespace()
+        if position < len(buffer) and buffer[position] == "\ufeff":
+            position += 1
+            skip_whitespace()
+        if position >= len(buffer) or buffer[position] != "[":
+            raise ValueError(f"JSON配列ではありません: {path}")
+        position += 1
+        
+        expect_value = True
+        while True:
+            skip_whitespace()
+            if position >= len(buffer):
+                raise ValueError(f"JSON配列が閉じられていません: {path}")
+            
+            char = buffer[position]
+            if char == "]":
+                return
+            if not expect_value:
+                if char != ",":
+                    raise ValueError(f"JSON配列の区切りが不正です: {path}")
+                position += 1
+                expect_value = True
+                continue
+            
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    break
+                except json.JSONDecodeError:
+                    # 要素が途中で切れている場合は続きを読んで再試行
+                    if not fill():
+                        raise
+            position = end
+            expect_value = False
+            yield value
+
+
+class ProblemSet(IndexedProblems):
+    """読み込み済みの問題セットと、難易度・カテゴリ・タイプ別の索引
+    
+    索引の値は problems 内の位置（昇順のタプル）。
+    """
+    
+    def __init__(self, problems: Sequence[Problem]):
+        self.problems: Tuple[Problem, ...] = tuple(problems)
+        
+        by_difficulty: Dict[str, List[int]] = {}
+        by_category: Dict[str, List[int]] = {}
+        by_type: Dict[str, List[int]] = {}
+        for position, problem in enumerate(self.problems):
+            by_difficulty.setdefault(problem.difficulty.value, []).append(position)
+            by_category.setdefault(problem.category, []).append(position)
+            by_type.setdefault(problem.type.value, []).append(position)
+        
+        self.by_difficulty: Dict[str, Sequence[int]] = {key: tuple(value) for key, value in by_difficulty.items()}
+        self.by_category: Dict[str, Sequence[int]] = {key: tuple(value) for key, value in by_category.items()}
+        self.by_type: Dict[str, Sequence[int]] = {key: tuple(value) for key, value in by_type.items()}
+    
+    def __len__(self) -> int:
+        return len(self.problems)
+    
+    def problem_at(self, position: int) -> Problem:
+        return self.problems[position]
+    
+    def select(self, difficulty: Optional[str] = None, category: Optional[str] = None,
+               problem_type: Optional[str] = None) -> List[Problem]:
+        problems = self.problems
+        return [problems[position] for position in self.positions(difficulty, category, problem_type)]
+
+
+@dataclass
+class _CacheEntry:
+    signature: Tuple[int, int, int]
+    problem_set: ProblemSet
+
+
+class ProblemRepository:
+    """プロセス全体で共有する解析済み問題のキャッシュ
+    
+    問題ファイルのパスをキーとし、更新時刻・サイズが変わったら読み直す。
+    max_bytes を指定すると元ファイルサイズの合計がそれを超えないよう
+    最も長く使われていない問題セットから破棄する。
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}  # 解析中のパスと、解析の完了を知らせるイベント
+        self._lock = threading.RLock()
+    
+    def get(self, path: str, parse: Callable[[str], List[Problem]]) -> ProblemSet:
+        """キャッシュ済みのセットを返し、なければ解析して登録する
+        
+        解析はロックの外で行うため、大きなセットの読み込み中も他のセットは取得できる。
+        同じセットを同時に要求した場合は、最初の1スレッドだけが解析し、他は完了を待つ。
+        """
+        key = os.path.abspath(path)
+        while True:
+            with self._lock:
+                signature = file_signature(key)
+                if signature is None:
+                    self._entries.pop(key, None)
+                    raise FileNotFoundError(f"問題ファイルが見つかりません: {path}")
+                
+                entry = self._entries.get(key)
+                if entry and entry.signature == signature:
+                    self._entries.move_to_end(key)
+                    return entry.problem_set
+                
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # 他のスレッドが解析中。完了後にキャッシュを確認し直す（失敗していれば自分で解析する）
+            loading.wait()
+        
+        try:
+            problem_set = ProblemSet(parse(key))
+            with self._lock:
+                self._entries[key] = _CacheEntry(signature=signature, problem_set=problem_set)
+                self._entries.move_to_end(key)
+                self._evict()
+            return problem_set
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+    
+    def peek(self, path: str) -> Optional[ProblemSet]:
+        """ファイルが変わっていなければキャッシュ済みのセットを返す（読み込みはしない）"""
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.signature == file_signature(key):
+                self._entries.move_to_end(key)
+                return entry.problem_set
+            return None
+    
+    def put(self, path: str, signature: Tuple[int, int, int], problems: Sequence[Problem]) -> ProblemSet:
+        """読み込み前に取得したsignatureと共に登録（読み込み中に変更されていれば次回読み直す）"""
+        key = os.path.abspath(path)
+        problem_set = ProblemSet(problems)
+        with self._lock:
+            self._entries[key] = _CacheEntry(signature=signature, problem_set=problem_set)
+            self._entries.move_to_end(key)
+            self._evict()
+        return problem_set
+    
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+    
+    def cached_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.signature[1] for entry in self._entries.values())
+    
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        # 直近に読み込んだセットは残す
+        while len(self._entries) > 1 and self.cached_bytes() > self.max_bytes:
+            self._entries.popitem(last=False)
+
+
+_shared_repository = ProblemRepository()
+
+
+def get_problem_repository() -> ProblemRepository:
+    """全てのProblemLoader（QuizSessionや各画面）で共有するリポジトリ"""
+    return _shared_repository
 
 
 class ProblemLoader:
-    def __init__(self, problems_dir: str = "problems"):
+    def __init__(self, problems_dir: str = "problems", repository: Optional[ProblemRepository] = None,
+                 snapshot_cache: Optional[ProblemSnapshotCache] = None):
         self.problems_dir = problems_dir
-        self.cache: Dict[str, List[Problem]] = {}
+        self.repository = repository or get_problem_repository()
+        self.snapshot_cache = snapshot_cache or ProblemSnapshotCache()
     
-    def load_problem_set(self, set_name: str) -> List[Problem]:
-        if set_name in self.cache:
-            return self.cache[set_name]
+    def load_problem_set(self, set_name: str) -> Sequence[Problem]:
+        indexed_set = self.load_indexed_set(set_name)
+        if isinstance(indexed_set, ProblemSet):
+            return indexed_set.problems
+        return indexed_set.select()
+    
+    def load_indexed_set(self, set_name: str) -> IndexedProblems:
+        """索引付きの問題セット（問題パックがあればそれを使う。読み込めない場合は空のセット）"""
+        pack = self.open_pack(set_name)
+        if pack is not None:
+            return pack
         
-        set_path = os.path.join(self.problems_dir, "quiz", f"{set_name}.json")
+        set_path = self._set_path(set_name)
         
         try:
-            with open(set_path, 'r', encoding='utf-8') as f:
-                problems_data = json.load(f)
-            
-            problems = []
-            for problem_data in problems_data:
-                if self._validate_problem(problem_data):
-                    problem = Problem.from_dict(problem_data)
-                    problems.append(problem)
-            
-            self.cache[set_name] = problems
-            return problems
-            
+            return self.repository.get(set_path, self._parse_problem_file)
         except Exception as e:
             print(f"問題セット読み込みエラー: {e}")
-            return []
+            return ProblemSet([])
+    
+    def peek_indexed_set(self, set_name: str) -> Optional[IndexedProblems]:
+        """解析せずに使える索引付きの問題セット（問題パックかキャッシュ済みのセット）"""
+        pack = self.open_pack(set_name)
+        if pack is not None:
+            return pack
+        return self.repository.peek(self._set_path(set_name))
+    
+    def open_pack(self, set_name: str) -> Optional[ProblemPack]:
+        """コンパイル済みの問題パック（problems/quiz/<set>.pack）
+        
+        パックがない場合や、パック作成後に元のJSONが変更されている場合はNone。
+        """
+        pack = open_problem_pack(self._pack_path(set_name))
+        if pack is None or not pack.matches_source(self._set_path(set_name)):
+            return None
+        return pack
+    
+    def stream_problems(self, set_name: str, difficulty: Optional[str] = None) -> Iterator[Problem]:
+        """条件に合う問題を1問ずつ返す
+        
+        問題パックまたはキャッシュ済みのセットなら索引から返し、未読み込みなら
+        ファイルを先頭から逐次解析・検証しながら返す。最後まで読んだセットは
+        キャッシュに登録する。
+        """
+        pack = self.open_pack(set_name)
+        if pack is not None:
+            for position in pack.positions(difficulty=difficulty):
+                yield pack.problem_at(position)
+            return
+        
+        set_path = self._set_path(set_name)
+        
+        problem_set = self.repository.peek(set_path)
+        if problem_set is not None:
+            yield from problem_set.select(difficulty=difficulty)
+            return
+        
+        signature = file_signature(set_path)
+        if signature is None:
+            print(f"問題セット読み込みエラー: 問題ファイルが見つかりません: {set_path}")
+            return
+        
+        # 更新時刻・サイズが一致するスナップショットがある場合だけ内容のハッシュを確かめる
+        problems = self.snapshot_cache.load_matching(set_path, signature)
+        if problems is not None:
+            yield from self.repository.put(set_path, signature, problems).select(difficulty=difficulty)
+            return
+        
+        # スナップショットには、解析したのと同じバイト列のハッシュを記録する
+        digest = hashlib.sha256()
+        problems = []
+        try:
+            for problem_data in iter_json_array(set_path, on_read=digest.update):
+                if not self._validate_problem(problem_data):
+                    continue
+                problem = Problem.from_dict(problem_data)
+                problems.append(problem)
+                if difficulty is None or problem.difficulty.value == difficulty:
+                    yield problem
+        except Exception as e:
+            print(f"問題セット読み込みエラー: {e}")
+            return
+        
+        self.repository.put(set_path, signature, problems)
+        self.snapshot_cache.store_digest(set_path, signature, digest.hexdigest(), problems)
+    
+    def compile_pack(self, set_name: str) -> int:
+        """問題セットのJSONを検証して問題パックを作成し、収録した問題数を返す"""
+        set_path = self._set_path(set_name)
+        signature = file_signature(set_path)
+        if signature is None:
+            raise FileNotFoundError(f"問題ファイルが見つかりません: {set_path}")
+        
+        problems = (
+            problem_data for problem_data in iter_json_array(set_path)
+            if self._validate_problem(problem_data)
+        )
+        return write_problem_pack(self._pack_path(set_name), problems, signature)
+    
+    def _set_path(self, set_name: str) -> str:
+        return os.path.join(self.problems_dir, "quiz", f"{set_name}.json")
+    
+    def _pack_path(self, set_name: str) -> str:
+        return os.path.join(self.problems_dir, "quiz", f"{set_name}{PACK_EXTENSION}")
+    
+    def _parse_problem_file(self, set_path: str) -> List[Problem]:
+        with open(set_path, 'rb') as f:
+            content = f.read()
+        
+        # 内容が変わっていなければ前回の解析結果を使う
+        problems = self.snapshot_cache.load(set_path, content)
+        if problems is not None:
+            return problems
+        
+        problems_data = json.loads(content.decode('utf-8-sig'))
+        
+        problems = []
+        for problem_data in problems_data:
+            if self._validate_problem(problem_data):
+                problem = Problem.from_dict(problem_data)
+                problems.append(problem)
+        
+        self.snapshot_cache.store(set_path, content, problems)
+        return problems
     
     def load_problems_by_difficulty(self, set_name: str, difficulty: str) -> List[Problem]:
-        all_problems = self.load_problem_set(set_name)
-        return [p for p in all_problems if p.difficulty.value == difficulty]
+        return self.load_indexed_set(set_name).select(difficulty=difficulty)
+    
+    def find_problems(self, set_names: Sequence[str], difficulty: Optional[str] = None,
+                      category: Optional[str] = None, problem_type: Optional[str] = None) -> List[Problem]:
+        """複数セットから条件に合う問題を索引で集める（例: math + science の medium）"""
+        problems: List[Problem] = []
+        seen_ids = set()
+        for set_name in set_names:
+            for problem in self.load_indexed_set(set_name).select(difficulty, category, problem_type):
+                # 同じ問題が複数セットに含まれていても一度だけ
+                if problem.id not in seen_ids:
+                    seen_ids.add(problem.id)
+                    problems.append(problem)
+        return problems
     
-    def get_available_problem_sets(self) -> List[str]:
+    def get_available_problem_sets(self, include_packs: bool = True) -> List[str]:
+        """問題セット名の一覧（include_packs=Falseなら元のJSONがあるセットのみ）"""
         quiz_dir = os.path.join(self.problems_dir, "quiz")
         if not os.path.exists(quiz_dir):
             return []
         
         problem_sets = []
-        for filename in os.listdir(quiz_dir):
-            if filename.endswith('.json'):
-                problem_sets.append(filename[:-5])
+        for filename in sorted(os.listdir(quiz_dir)):
+            name, extension = os.path.splitext(filename)
+            # パックのみで配布されたセットも含める
+            extensions = ('.json', PACK_EXTENSION) if include_packs else ('.json',)
+            if extension in extensions and name not in problem_sets:
+                problem_sets.append(name)
         
         return problem_sets
     
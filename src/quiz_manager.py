@@ -1,33 +1,139 @@
 import random
-from typing import List, Optional, Callable
+import threading
+from itertools import islice
+from typing import Collection, Iterator, List, Optional, Callable, Sequence, Set, Tuple
 from models.problem import Problem
 from models.handlers import ProblemFactory, ProblemHandler
+from problem_pack import IndexedProblems
+from problem_sampler import ProblemSampler, selection_weight
 from question_loader import ProblemLoader
+from utils.storage import HistoryStorage, ProblemStatsStorage, get_problem_stats_storage
 
 
 class QuizSession:
-    def __init__(self, problem_sets: List[str], difficulty: str, problems_dir: str = "problems"):
+    def __init__(self, problem_sets: Sequence[str], difficulty: str, problems_dir: str = "problems",
+                 history_storage: Optional[HistoryStorage] = None,
+                 stats_storage: Optional[ProblemStatsStorage] = None):
         self.problem_sets = problem_sets
         self.difficulty = difficulty
-        self.problems: List[Problem] = []
+        self.problems: List[Problem] = []  # 出題済み・出題中の問題（選んだ順）
         self.current_problem_index = 0
         self.total_attempts = 0
         self.correct_answers = 0
         self.problem_loader = ProblemLoader(problems_dir)
         self.current_handler: Optional[ProblemHandler] = None
         self.on_answer_callback: Optional[Callable] = None
+        self.history_storage = history_storage or HistoryStorage()
+        self.stats_storage = stats_storage or get_problem_stats_storage(self.history_storage.storage_dir)
+        self.first_batch_size = 16  # 未解析のセットでは、最初の問題をこの件数の中からランダムに選ぶ
+        self._loading_thread: Optional[threading.Thread] = None
+        self._sampler: Optional[ProblemSampler] = None
+        self._seen_ids: Set[str] = set()
     
     def start_session(self):
-        self.problems = self._load_problems()
+        """最初の問題が決まった時点で戻る（以降の問題は必要になったときに1問ずつ選ぶ）
+        
+        直近に間違えた問題ほど出やすく、続けて正解した問題ほど出にくくなるよう、
+        回答集計に応じた重みで選ぶ。
+        """
+        self.wait_until_loaded()
         self.current_problem_index = 0
         self.total_attempts = 0
         self.correct_answers = 0
+        self.current_handler = None
+        self.problems = []
+        self._seen_ids = set()
+        self._sampler = None
+        
+        # 問題パック・キャッシュ済みのセットなら、問題数によらず索引から直接選ぶ
+        sources = self._indexed_sources()
+        if sources is not None:
+            self._sampler = self._weighted_sampler(sources)
+            self._draw_until(1)
+            return
+        
+        # 未解析のJSONがある場合は先頭の数問から最初の問題を選び、残りは裏で解析する
+        stream = self._stream_problems()
+        head = list(islice(stream, self.first_batch_size))
+        if not head:
+            return
         
-        if self.problems:
-            random.shuffle(self.problems)
+        first = head[random.randrange(len(head))]
+        self.problems = [first]
+        self._seen_ids.add(first.id)
+        self._loading_thread = threading.Thread(
+            target=self._finish_loading,
+            args=(stream,),
+            daemon=True
+        )
+        self._loading_thread.start()
+    
+    def _indexed_sources(self) -> Optional[List[Tuple[IndexedProblems, Sequence[int]]]]:
+        """各セットの (索引付きセット, 条件に合う位置) の一覧（未解析のセットがあればNone）"""
+        sources = []
+        for problem_set in self.problem_sets:
+            indexed = self.problem_loader.peek_indexed_set(problem_set)
+            if indexed is None:
+                return None
+            sources.append((indexed, indexed.positions(difficulty=self.difficulty)))
+        return sources
+    
+    def _load_indexed_sources(self) -> List[Tuple[IndexedProblems, Sequence[int]]]:
+        """未解析のセットも読み込んだうえでの、各セットの (索引付きセット, 条件に合う位置) の一覧"""
+        sources = []
+        for problem_set in self.problem_sets:
+            indexed = self.problem_loader.load_indexed_set(problem_set)
+            sources.append((indexed, indexed.positions(difficulty=self.difficulty)))
+        return sources
+    
+    def _finish_loading(self, stream: Iterator[Problem]):
+        # 最後まで読んだセットはキャッシュに登録され、索引から選べるようになる
+        for _ in stream:
+            pass
+        self._sampler = self._weighted_sampler(self._load_indexed_sources())
+    
+    def _weighted_sampler(self, sources: List[Tuple[IndexedProblems, Sequence[int]]]) -> ProblemSampler:
+        """回答集計のある問題だけ重みを変えた抽選器（回答したことのない問題は重み1のまま）"""
+        sampler = ProblemSampler(sources)
+        for problem_id, stats in self.stats_storage.load_stats().items():
+            weight = selection_weight(stats)
+            if weight != 1.0:
+                sampler.set_weight(problem_id, weight)
+        return sampler
+    
+    def wait_until_loaded(self):
+        """裏での問題読み込みが終わるまで待つ"""
+        if self._loading_thread:
+            self._loading_thread.join()
+            self._loading_thread = None
+    
+    def _stream_problems(self) -> Iterator[Problem]:
+        seen_ids = set()
+        for problem_set in self.problem_sets:
+            for problem in self.problem_loader.stream_problems(problem_set, self.difficulty):
+                # 同じ問題が複数セットに含まれていても一度だけ
+                if problem.id not in seen_ids:
+                    seen_ids.add(problem.id)
+                    yield problem
+    
+    def _draw_until(self, count: int):
+        """出題済みを含めてcount問になるまで（候補が残っていれば）無作為に選ぶ"""
+        if len(self.problems) >= count:
+            return
+        self.wait_until_loaded()
+        sampler = self._sampler
+        while sampler is not None and len(self.problems) < count:
+            problem = sampler.draw()
+            if problem is None:
+                break
+            # 同じ問題が複数セットに含まれていても一度だけ
+            if problem.id not in self._seen_ids:
+                self._seen_ids.add(problem.id)
+                self.problems.append(problem)
     
     def get_current_problem(self) -> Optional[Problem]:
-        if not self.problems or self.current_problem_index >= len(self.problems):
+        self._draw_until(self.current_problem_index + 1)
+        if self.current_problem_index >= len(self.problems):
             return None
         return self.problems[self.current_problem_index]
     
@@ -43,11 +149,11 @@ class QuizSession:
         
         return self.current_handler
     
-    def _on_answer_submit(self, selected_options: List[str]):
+    def _on_answer_submit(self, selected_options: Collection[str]):
         if self.on_answer_callback:
             self.on_answer_callback(selected_options)
     
-    def submit_answer(self, selected_options: List[str]) -> bool:
+    def submit_answer(self, selected_options: Collection[str]) -> bool:
         current_problem = self.get_current_problem()
         if not current_problem:
             return False
@@ -59,6 +165,9 @@ class QuizSession:
             return False
         
         is_correct = handler.check_answer(selected_options)
+        self.history_storage.record_answer(current_problem.id, is_correct)
+        # 集計はこの問題の分だけ差分で更新し、次のセッションの重みに反映される
+        self.stats_storage.record_answer(current_problem.id, is_correct)
         
         if is_correct:
             self.correct_answers += 1
@@ -72,6 +181,7 @@ class QuizSession:
         return self.correct_answers > 0
     
     def has_more_problems(self) -> bool:
+        self._draw_until(self.current_problem_index + 1)
         return self.current_problem_index < len(self.problems)
     
     def get_session_stats(self) -> dict:
@@ -79,15 +189,6 @@ class QuizSession:
             "total_attempts": self.total_attempts,
             "correct_answers": self.correct_answers,
             "current_problem": self.current_problem_index + 1,
-            "total_problems": len(self.problems),
+            "total_problems": self._sampler.size if self._sampler else len(self.problems),
             "completion_rate": self.correct_answers / max(self.total_attempts, 1)
-        }
-    
-    def _load_problems(self) -> List[Problem]:
-        all_problems = []
-        
-        for problem_set in self.problem_sets:
-            problems = self.problem_loader.load_problems_by_difficulty(problem_set, self.difficulty)
-            all_problems.extend(problems)
-        
-        return all_problems
\ No newline at end of file
+        }
\ No newline at end of file
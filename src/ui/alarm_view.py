@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
 import flet as ft
+from dataclasses import replace
 from typing import Optional, Callable, Dict
 from models.alarm import Alarm, SoundConfig, SnoozeConfig
-from utils.storage import AlarmStorage
+from utils.storage import get_alarm_storage
 
 
 class AlarmView:
-    def __init__(self, on_back: Optional[Callable] = None, alarm_id: Optional[str] = None):
+    def __init__(self, on_back: Optional[Callable] = None, alarm_id: Optional[str] = None,
+                 on_alarms_changed: Optional[Callable] = None):
         self.on_back = on_back
         self.alarm_id = alarm_id
-        self.alarm_storage = AlarmStorage()
+        self.on_alarms_changed = on_alarms_changed
+        self.alarm_storage = get_alarm_storage()
         self.alarm: Optional[Alarm] = None
         
         self.time_input = ft.TextField(
@@ -56,6 +59,30 @@ class AlarmView:
             label="音量: {value}"
         )
         
+        self.ramp_dropdown = ft.Dropdown(
+            label="徐々に大きく",
+            width=150,
+            options=[
+                ft.dropdown.Option("0", "しない"),
+                ft.dropdown.Option("15", "15秒"),
+                ft.dropdown.Option("30", "30秒"),
+                ft.dropdown.Option("60", "60秒")
+            ],
+            value="0"
+        )
+        
+        self.tone_dropdown = ft.Dropdown(
+            label="アラーム音",
+            width=150,
+            options=[
+                ft.dropdown.Option("file", "音声ファイル"),
+                ft.dropdown.Option("beep", "ビープ"),
+                ft.dropdown.Option("sweep", "スイープ"),
+                ft.dropdown.Option("chime", "チャイム")
+            ],
+            value="file"
+        )
+        
         self.snooze_checkbox = ft.Checkbox(
             label="スヌーズ機能",
             value=True
@@ -118,7 +145,9 @@ class AlarmView:
                 ft.Container(
                     content=ft.Column([
                         ft.Text("音量:", size=14),
-                        self.volume_slider
+                        self.volume_slider,
+                        self.ramp_dropdown,
+                        self.tone_dropdown
                     ], spacing=5),
                     expand=1
                 ),
@@ -212,6 +241,8 @@ class AlarmView:
         self.difficulty_dropdown.value = self.alarm.difficulty
         self.problem_sets_dropdown.value = self.alarm.problem_sets[0] if self.alarm.problem_sets else "statistics"
         self.volume_slider.value = self.alarm.sound.volume
+        self.ramp_dropdown.value = str(int(self.alarm.sound.ramp_seconds))
+        self.tone_dropdown.value = self.alarm.sound.tone or "file"
         self.snooze_checkbox.value = self.alarm.snooze.enabled
         self.snooze_duration.value = str(self.alarm.snooze.duration)
         self.snooze_max_count.value = str(self.alarm.snooze.max_count)
@@ -233,7 +264,9 @@ class AlarmView:
             sound_config = SoundConfig(
                 file="assets/sounds/alarm_default.wav",
                 volume=self.volume_slider.value,
-                loop=True
+                loop=True,
+                ramp_seconds=int(self.ramp_dropdown.value or 0),
+                tone="" if self.tone_dropdown.value in (None, "file") else self.tone_dropdown.value
             )
             
             snooze_config = SnoozeConfig(
@@ -243,14 +276,16 @@ class AlarmView:
             )
             
             if self.alarm_id:
-                alarm = self.alarm
-                alarm.time = self.time_input.value
-                alarm.label = self.label_input.value
-                alarm.days = selected_days
-                alarm.difficulty = self.difficulty_dropdown.value
-                alarm.problem_sets = [self.problem_sets_dropdown.value]
-                alarm.sound = sound_config
-                alarm.snooze = snooze_config
+                alarm = replace(
+                    self.alarm,
+                    time=self.time_input.value,
+                    label=self.label_input.value,
+                    days=selected_days,
+                    difficulty=self.difficulty_dropdown.value,
+                    problem_sets=[self.problem_sets_dropdown.value],
+                    sound=sound_config,
+                    snooze=snooze_config
+                )
             else:
                 alarm = Alarm(
                     id=f"alarm_{len(self.alarm_storage.load_alarms()) + 1}",
@@ -264,11 +299,16 @@ class AlarmView:
                     snooze=snooze_config
                 )
             
+            # 時刻形式をここで検証（不正な場合は例外）
+            alarm.schedule
+            
             self.alarm_storage.save_alarm(alarm)
+            if self.on_alarms_changed:
+                self.on_alarms_changed()
             
             if self.on_back:
                 self.on_back()
-                
+        
         except Exception as ex:
             self._show_error(f"保存に失敗しました: {str(ex)}")
     
@@ -276,6 +316,8 @@ class AlarmView:
         if self.alarm_id:
             try:
                 self.alarm_storage.delete_alarm(self.alarm_id)
+                if self.on_alarms_changed:
+                    self.on_alarms_changed()
                 if self.on_back:
                     self.on_back()
             except Exception as ex:
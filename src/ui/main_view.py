@@ -1,18 +1,24 @@
 # -*- coding: utf-8 -*-
 import flet as ft
+from dataclasses import replace
 from typing import List, Optional, Callable
-from models.alarm import Alarm
-from utils.storage import AlarmStorage
+from datetime import datetime
+from models.alarm import Alarm, find_next_alarm
+from utils.storage import get_alarm_storage
+
+WEEKDAY_LABELS = ["月", "火", "水", "木", "金", "土", "日"]
 
 
 class MainView:
     def __init__(self, on_alarm_settings: Optional[Callable] = None, on_show_message: Optional[Callable] = None, 
-                 on_problem_settings: Optional[Callable] = None, on_settings: Optional[Callable] = None):
+                 on_problem_settings: Optional[Callable] = None, on_settings: Optional[Callable] = None,
+                 on_alarms_changed: Optional[Callable] = None):
         self.on_alarm_settings = on_alarm_settings
         self.on_show_message = on_show_message
         self.on_problem_settings = on_problem_settings
         self.on_settings = on_settings
-        self.alarm_storage = AlarmStorage()
+        self.on_alarms_changed = on_alarms_changed
+        self.alarm_storage = get_alarm_storage()
         self.alarms: List[Alarm] = []
         self.next_alarm_text = ft.Text(
             "次のアラーム: 未設定",
@@ -146,19 +152,20 @@ class MainView:
         self._update_alarms_list()
     
     def _update_next_alarm(self):
-        enabled_alarms = [alarm for alarm in self.alarms if alarm.enabled]
-        if enabled_alarms:
-            next_alarm = min(enabled_alarms, key=lambda a: a.time)
-            self.next_alarm_text.value = f"次のアラーム: {next_alarm.time} ({next_alarm.label})"
+        found = find_next_alarm(self.alarms, datetime.now())
+        if found:
+            next_alarm, occurrence = found
+            weekday_label = WEEKDAY_LABELS[occurrence.weekday()]
+            self.next_alarm_text.value = f"次のアラーム: {weekday_label}曜 {next_alarm.time} ({next_alarm.label})"
         else:
             self.next_alarm_text.value = "次のアラーム: 未設定"
-        
+    
     
     def _update_alarms_list(self):
         # ListView方式では、get_view()を再度呼び出して全体を再構築
         # このメソッドは現在使用されていないが、互換性のため残す
         pass
-        
+    
     
     def _create_alarm_item(self, alarm: Alarm) -> ft.Control:
         switch = ft.Switch(
@@ -208,9 +215,12 @@ class MainView:
         )
     
     def _toggle_alarm(self, alarm: Alarm, enabled: bool):
-        alarm.enabled = enabled
-        self.alarm_storage.save_alarm(alarm)
+        updated = replace(alarm, enabled=enabled)
+        self.alarms = [updated if a.id == alarm.id else a for a in self.alarms]
+        self.alarm_storage.save_alarm(updated)
         self._update_next_alarm()
+        if self.on_alarms_changed:
+            self.on_alarms_changed()
     
     def _edit_alarm(self, alarm_id: str):
         if self.on_alarm_settings:
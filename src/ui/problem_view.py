@@ -3,6 +3,7 @@ import flet as ft
 from typing import Optional, Callable, List, Dict
 import json
 import os
+from models.problem import Problem, QuizContent
 from question_loader import ProblemLoader
 
 
@@ -109,7 +110,7 @@ class ProblemView:
                 difficulty_chip
             ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
             ft.Text(
-                problem.content.get("question", {}).get("text", "")[:100] + "...",
+                self._question_text(problem)[:100] + "...",
                 size=12,
                 color="grey700"
             ),
@@ -139,6 +140,13 @@ class ProblemView:
             margin=ft.margin.only(bottom=10)
         )
     
+    @staticmethod
+    def _question_text(problem: Problem) -> str:
+        # クイズ以外（ゲームなど）の問題は解析前の辞書のまま持っている
+        if isinstance(problem.content, QuizContent):
+            return problem.content.question.text
+        return problem.content.get("question", {}).get("text", "")
+    
     def _add_problem(self, e):
         if not self.selected_set:
             self._show_message("問題セットを選択してください")
@@ -1,18 +1,19 @@
 # -*- coding: utf-8 -*-
 import flet as ft
-from typing import List, Optional, Callable
+from typing import Collection, List, Optional, Callable, Sequence
 from quiz_manager import QuizSession
 from utils.audio import AudioController
 
 
 class QuizView:
-    def __init__(self, problem_sets: List[str], difficulty: str, on_quiz_complete: Optional[Callable] = None):
+    def __init__(self, problem_sets: Sequence[str], difficulty: str, on_quiz_complete: Optional[Callable] = None):
         self.problem_sets = problem_sets
         self.difficulty = difficulty
         self.on_quiz_complete = on_quiz_complete
         self.quiz_session = QuizSession(problem_sets, difficulty)
         self.audio_controller = AudioController()
         self.page = None
+        self._prepared_view: Optional[ft.Control] = None
         
         self.quiz_container = ft.Container(
             bgcolor="red50",
@@ -116,7 +117,7 @@ class QuizView:
         self._update_progress()
         
     
-    def _on_answer_submitted(self, selected_options: List[str]):
+    def _on_answer_submitted(self, selected_options: Collection[str]):
         is_correct = self.quiz_session.submit_answer(selected_options)
         
         if is_correct:
@@ -252,5 +253,14 @@ class QuizView:
         if self.page:
             self.page.update()
     
+    def prepare(self, sound_config) -> ft.Control:
+        """アラーム発火前に問題の読み込み・最初の問題の画面構築・音声の確認を済ませておく"""
+        self._prepared_view = self.build()
+        self.audio_controller.prepare(sound_config.to_dict())
+        return self._prepared_view
+    
     def get_view(self) -> ft.Control:
+        if self._prepared_view is not None:
+            view, self._prepared_view = self._prepared_view, None
+            return view
         return self.build()
\ No newline at end of file
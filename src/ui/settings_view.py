@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 import flet as ft
 from typing import Optional, Callable
-import json
-import os
+from utils.storage import SettingsStorage
 
 
 class SettingsView:
     def __init__(self, on_back: Optional[Callable] = None):
         self.on_back = on_back
-        self.settings_file = "storage/settings.json"
+        self.settings_storage = SettingsStorage()
         self.settings = self._load_settings()
         
         # 音量設定
@@ -181,17 +180,13 @@ class SettingsView:
         )
     
     def _load_settings(self) -> dict:
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        return {}
+        return self.settings_storage.load_settings()
     
     def _save_settings(self, e):
         try:
-            settings = {
+            # 画面にない項目（warmup_lead_seconds など）は保存済みの値を残す
+            settings = self._load_settings()
+            settings.update({
                 "default_volume": self.volume_slider.value,
                 "default_difficulty": self.difficulty_dropdown.value,
                 "default_problem_set": self.problem_set_dropdown.value,
@@ -200,11 +195,9 @@ class SettingsView:
                 "default_snooze_max_count": int(self.snooze_max_count.value),
                 "window_width": int(self.window_width.value),
                 "window_height": int(self.window_height.value)
-            }
+            })
             
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
+            self.settings_storage.save_settings(settings)
             
             self.settings = settings
             self._show_message("設定を保存しました")
@@ -40,6 +40,26 @@ class AudioController:
             logging.error(f"システムオーディオエラー: {e}")
             return None
     
+    def prepare(self, sound_config: Dict[str, Any]) -> bool:
+        """アラーム前に再生できる状態か確認する"""
+        try:
+            ready = self.system_audio.prepare(sound_config)
+        except Exception as e:
+            import logging
+            logging.error(f"システムオーディオ確認エラー: {e}")
+            return False
+        
+        import logging
+        if ready:
+            logging.info(f"音声再生の準備完了: {sound_config['file']}")
+        else:
+            logging.warning(f"音声再生の準備に失敗: {sound_config['file']} {self.health()}")
+        return ready
+    
+    def health(self) -> Dict[str, Any]:
+        """音声再生の状態（再生コマンドの有無・連続失敗回数など）"""
+        return self.system_audio.health()
+    
     def stop_alarm(self):
         """アラーム音声を停止"""
         if self.is_playing:
@@ -0,0 +1,86 @@
+import logging
+import platform
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+from .pcm_stream import PcmClip
+
+
+# 対応する再生コマンド（優先順）
+PLATFORM_PLAYERS = {
+    "Linux": ["aplay", "paplay"],  # aplayはRaspberry Pi/Linux標準
+    "Darwin": ["afplay"],
+    "Windows": ["powershell"],
+}
+
+# サンプル幅（バイト数）ごとのフォーマット名
+APLAY_FORMATS = {1: "U8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+PAPLAY_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}
+
+
+@dataclass(frozen=True)
+class PlayerBackend:
+    """音声再生に使う外部コマンド"""
+    name: str
+    executable: str
+    
+    def file_command(self, sound_file: str, volume: float) -> List[str]:
+        """ファイルを1回再生するコマンド"""
+        if self.name == "aplay":
+            return [self.executable, "-q", sound_file]
+        if self.name == "paplay":
+            # paplayの音量は0〜65536で指定
+            return [self.executable, f"--volume={int(min(max(volume, 0.0), 1.0) * 65536)}", sound_file]
+        if self.name == "afplay":
+            return [self.executable, "-v", f"{min(max(volume, 0.0), 1.0):.2f}", sound_file]
+        # Windows Media Player
+        return [self.executable, "-c", f"(New-Object Media.SoundPlayer '{sound_file}').PlaySync()"]
+    
+    def stream_command(self, clip: PcmClip) -> Optional[List[str]]:
+        """標準入力からPCMを受け取って再生し続けるコマンド（対応していなければNone）"""
+        if self.name == "aplay" and clip.sampwidth in APLAY_FORMATS:
+            return [
+                self.executable, "-q", "-t", "raw",
+                "-f", APLAY_FORMATS[clip.sampwidth],
+                "-c", str(clip.nchannels),
+                "-r", str(clip.framerate),
+                "-"
+            ]
+        if self.name == "paplay" and clip.sampwidth in PAPLAY_FORMATS:
+            return [
+                self.executable, "--raw",
+                f"--format={PAPLAY_FORMATS[clip.sampwidth]}",
+                f"--channels={clip.nchannels}",
+                f"--rate={clip.framerate}"
+            ]
+        return None
+
+
+def probe_backends(system: Optional[str] = None) -> List[PlayerBackend]:
+    """このマシンで使える再生コマンドを調べる"""
+    system = system or platform.system()
+    backends = []
+    for name in PLATFORM_PLAYERS.get(system, []):
+        executable = shutil.which(name)
+        if executable:
+            backends.append(PlayerBackend(name=name, executable=executable))
+    
+    if backends:
+        logging.info(f"音声再生コマンド: {', '.join(backend.name for backend in backends)}")
+    else:
+        logging.warning(f"音声再生コマンドが見つかりません（{system}）")
+    return backends
+
+
+_backends: Optional[List[PlayerBackend]] = None
+_backends_lock = threading.Lock()
+
+
+def get_audio_backends(refresh: bool = False) -> List[PlayerBackend]:
+    """起動後に一度だけ調べた再生コマンドの一覧（refresh=Trueで調べ直す）"""
+    global _backends
+    with _backends_lock:
+        if _backends is None or refresh:
+            _backends = probe_backends()
+        return list(_backends)
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import warnings
+import wave
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+from .file_watcher import file_signature
+from .pcm_stream import PcmClip, load_wav
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import aifc  # type: ignore[import-not-found, unused-ignore]  # Python 3.13で削除
+except ImportError:
+    aifc = None  # type: ignore[assignment]
+
+
+DECODE_TIMEOUT = 120  # 外部デコーダーの最大実行秒数
+
+
+def _write_wav(path: str, clip: PcmClip):
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(clip.nchannels)
+        wav.setsampwidth(clip.sampwidth)
+        wav.setframerate(clip.framerate)
+        wav.writeframes(clip.frames)
+
+
+def _load_aiff(path: str) -> Optional[PcmClip]:
+    """AIFF（ビッグエンディアン）を標準ライブラリでリトルエンディアンのPCMにする"""
+    if aifc is None:
+        return None
+    with aifc.open(path, 'rb') as aiff:
+        if aiff.getcomptype() != b'NONE':
+            return None  # 圧縮AIFF-Cは外部デコーダーに任せる
+        nchannels, sampwidth, framerate, nframes = (
+            aiff.getnchannels(), aiff.getsampwidth(), aiff.getframerate(), aiff.getnframes()
+        )
+        frames = aiff.readframes(nframes)
+    
+    if sampwidth == 1:
+        # AIFFの8bitは符号付き、WAVは符号なし
+        frames = bytes((sample + 128) & 0xFF for sample in frames)
+    elif sampwidth in (2, 4):
+        samples = array("h" if sampwidth == 2 else "i")
+        samples.frombytes(frames)
+        if sys.byteorder == "little":
+            samples.byteswap()
+        frames = samples.tobytes()
+    else:
+        return None
+    return PcmClip(frames=frames, nchannels=nchannels, sampwidth=sampwidth, framerate=framerate)
+
+
+def _available_decoders(source: str) -> List[str]:
+    """利用できる外部デコーダー（優先順）"""
+    decoders = []
+    if shutil.which("ffmpeg"):
+        decoders.append("ffmpeg")
+    if shutil.which("mpg123") and source.lower().endswith(".mp3"):
+        decoders.append("mpg123")
+    return decoders
+
+
+def _run_decoder(decoder: str, source: str, output: str):
+    if decoder == "ffmpeg":
+        command = [
+            "ffmpeg", "-v", "error", "-nostdin", "-y", "-i", source,
+            "-vn", "-acodec", "pcm_s16le", "-f", "wav", output
+        ]
+    else:
+        command = ["mpg123", "-q", "-w", output, source]
+    subprocess.run(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=DECODE_TIMEOUT,
+        check=True
+    )
+
+
+class AudioAssetCache:
+    """音声ファイルをデコード済みPCMとして保持するキャッシュ
+    
+    WAVはそのまま、AIFFは標準ライブラリで、MP3などはffmpeg/mpg123で
+    16bit PCMのWAVに変換し、元ファイルの内容のハッシュをキーに
+    storage/audio_cache/ に保存する。発火時はデコード済みのPCMを読むだけになる。
+    """
+    
+    def __init__(self, cache_dir: str = os.path.join("storage", "audio_cache")):
+        self.cache_dir = cache_dir
+        self._clips: Dict[str, Tuple[Optional[Tuple[int, int, int]], PcmClip]] = {}
+        self._decoding: Dict[str, threading.Event] = {}  # デコード中のパスと、完了を知らせるイベント
+        self._lock = threading.Lock()
+    
+    def load(self, path: str) -> Optional[PcmClip]:
+        """デコード済みのPCM（デコードできない場合はNone）
+        
+        デコード（外部デコーダーでは最大 DECODE_TIMEOUT 秒）はロックの外で行うため、
+        warmup中の別の音声のデコードが発火時の読み込みを待たせない。
+        同じ音声を同時に要求した場合は1回だけデコードし、他の呼び出しはその結果を待つ。
+        """
+        key = os.path.abspath(path)
+        signature = file_signature(key)
+        if signature is None:
+            return None
+        
+        with self._lock:
+            cached = self._clips.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+            decoding = self._decoding.get(key)
+            if decoding is None:
+                decoding = self._decoding[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            decoding.wait()
+            with self._lock:
+                cached = self._clips.get(key)
+            # 先に始めたデコードが失敗した場合は、同じ失敗を繰り返さずにNoneを返す
+            return cached[1] if cached and cached[0] == signature else None
+        
+        try:
+            try:
+                clip = self._decode(key)
+            except Exception as e:
+                logging.error(f"音声デコードエラー: {path}: {e}")
+                clip = None
+            with self._lock:
+                if clip is not None:
+                    self._clips[key] = (signature, clip)
+                del self._decoding[key]
+        finally:
+            decoding.set()
+        return clip
+    
+    def _decode(self, path: str) -> Optional[PcmClip]:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".wav":
+            try:
+                return load_wav(path)
+            except Exception:
+                pass  # WAV以外の形式（圧縮WAVなど）は変換を試す
+        
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        cached = os.path.join(self.cache_dir, f"{digest}.wav")
+        if os.path.exists(cached):
+            try:
+                return load_wav(cached)
+            except Exception as e:
+                logging.warning(f"音声キャッシュが壊れているため作り直します: {cached}: {e}")
+        
+        clip = _load_aiff(path) if extension in (".aif", ".aiff") else None
+        if clip is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._store(cached, lambda output: _write_wav(output, clip))
+            return clip
+        
+        decoders = _available_decoders(path)
+        if not decoders:
+            logging.warning(f"デコーダー（ffmpeg/mpg123）がないため再生できません: {path}")
+            return None
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for decoder in decoders:
+            if self._store(cached, lambda output: _run_decoder(decoder, path, output)):
+                logging.info(f"音声を変換しました（{decoder}）: {path} -> {cached}")
+                return load_wav(cached)
+        return None
+    
+    def _store(self, cached: str, write: Callable[[str], None]) -> bool:
+        """一時ファイルに書き出してから置き換える（失敗時はFalse）"""
+        fd, temp_path = tempfile.mkstemp(suffix=".wav", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, cached)
+            return True
+        except Exception as e:
+            logging.error(f"音声変換エラー: {e}")
+            return False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+_shared_cache = AudioAssetCache()
+
+
+def get_audio_asset_cache() -> AudioAssetCache:
+    """プロセス全体で共有するキャッシュ（warmupと発火時で同じデコード結果を使う）"""
+    return _shared_cache
@@ -0,0 +1,25 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """現在時刻と待機の抽象化（シミュレーションやベンチマークでは差し替える）"""
+    
+    def now(self) -> datetime:
+        """現在のローカル時刻（タイムゾーンなし）"""
+        return datetime.now()
+    
+    def utc_offset(self) -> timedelta:
+        """現在のUTCとの時差（夏時間の切り替えを検知するため）"""
+        return datetime.now().astimezone().utcoffset() or timedelta(0)
+    
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+    
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """eventがセットされるかtimeout秒経つまで待つ（セットされたらTrue）"""
+        return event.wait(timeout)
+
+
+SYSTEM_CLOCK = Clock()
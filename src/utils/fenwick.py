@@ -0,0 +1,65 @@
+from typing import Dict
+
+
+class FenwickTree:
+    """重みの更新と累積和による位置の検索がともに O(log n) のFenwick木（Binary Indexed Tree）
+    
+    全要素の初期値は base_weight。初期値からの差分だけを辞書に持つため、
+    作成は要素数によらず O(1) で、メモリは更新した箇所の数に比例する。
+    """
+    
+    def __init__(self, size: int, base_weight: float = 1.0):
+        self.size = size
+        self.base_weight = base_weight
+        self._deltas: Dict[int, float] = {}  # 節点（1始まり）ごとの初期値からの差分
+        self._weights: Dict[int, float] = {}  # 初期値から変更した要素の重み
+        self._total = size * base_weight
+        self._top = 1 << (size.bit_length() - 1) if size else 0
+    
+    def total(self) -> float:
+        return self._total
+    
+    def weight(self, index: int) -> float:
+        return self._weights.get(index, self.base_weight)
+    
+    def set_weight(self, index: int, weight: float):
+        """index（0始まり）の重みを変更する"""
+        if weight < 0:
+            raise ValueError(f"重みは0以上にしてください: {weight}")
+        change = weight - self.weight(index)
+        if weight == self.base_weight:
+            self._weights.pop(index, None)
+        else:
+            self._weights[index] = weight
+        self._total += change
+        
+        node = index + 1
+        while node <= self.size:
+            self._deltas[node] = self._deltas.get(node, 0.0) + change
+            node += node & -node
+    
+    def _node(self, node: int) -> float:
+        return (node & -node) * self.base_weight + self._deltas.get(node, 0.0)
+    
+    def prefix_sum(self, count: int) -> float:
+        """先頭からcount個の要素の重みの合計"""
+        result = 0.0
+        node = count
+        while node > 0:
+            result += self._node(node)
+            node -= node & -node
+        return result
+    
+    def find(self, target: float) -> int:
+        """累積和がtargetを超える最初の要素の位置（0 <= target < total() のとき）"""
+        position = 0
+        step = self._top
+        while step:
+            node = position + step
+            if node <= self.size:
+                value = self._node(node)
+                if value <= target:
+                    position = node
+                    target -= value
+            step >>= 1
+        return min(position, self.size - 1)
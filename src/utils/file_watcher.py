@@ -0,0 +1,151 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+import select
+import struct
+import threading
+from typing import Callable, Iterable, Optional, Tuple
+
+
+# inotify のイベント定義（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """変更検知用のファイル情報（更新時刻・サイズ・inode）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _load_libc():
+    if platform.system() != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """ファイルの変更検知（Linuxではinotify、それ以外はos.statの比較）
+    
+    companions には同じディレクトリにある付随ファイル（SQLiteの -wal など）を指定する。
+    付随ファイルは開いたまま追記されるため、書き込み（IN_MODIFY）の時点で変更とみなす。
+    """
+    
+    def __init__(self, path: str, on_change: Optional[Callable] = None, companions: Iterable[str] = ()):
+        self.path = os.path.abspath(path)
+        self.companions = tuple(os.path.abspath(companion) for companion in companions)
+        self.on_change = on_change
+        self.uses_inotify = False
+        self._signature = self._current_signature()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify_fd: Optional[int] = None
+        self._stop_pipe: Optional[Tuple[int, int]] = None
+    
+    def _current_signature(self) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+        return tuple(file_signature(path) for path in (self.path,) + self.companions)
+    
+    def has_changed(self) -> bool:
+        """前回確認時からファイルが変わったか（確認した状態を記録する）"""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+    
+    def refresh(self):
+        """現在のファイル状態を既知として記録"""
+        self._signature = self._current_signature()
+    
+    def start(self):
+        """inotifyが使える場合は監視スレッドを開始（使えない場合はhas_changedでポーリング）"""
+        if self._thread:
+            return
+        
+        libc = _load_libc()
+        if not libc:
+            logging.info(f"inotifyが利用できないためstat比較で監視します: {self.path}")
+            return
+        
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logging.info("inotifyの初期化に失敗したためstat比較で監視します")
+            return
+        
+        watch_dir = os.path.dirname(self.path)
+        # アトミックな置き換え（rename）も検知できるようディレクトリを監視
+        if libc.inotify_add_watch(fd, watch_dir.encode(), WATCH_MASK) < 0:
+            os.close(fd)
+            logging.info(f"inotifyで監視できないためstat比較で監視します: {watch_dir}")
+            return
+        
+        self._inotify_fd = fd
+        self._stop_pipe = os.pipe()
+        self.uses_inotify = True
+        self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self._thread.start()
+        logging.info(f"inotifyでファイル監視を開始しました: {self.path}")
+    
+    def stop(self):
+        if not self._thread:
+            return
+        
+        os.write(self._stop_pipe[1], b"x")
+        self._thread.join()
+        self._thread = None
+        
+        os.close(self._inotify_fd)
+        for fd in self._stop_pipe:
+            os.close(fd)
+        self._inotify_fd = None
+        self._stop_pipe = None
+        self.uses_inotify = False
+    
+    def _watch_loop(self):
+        target_name = os.path.basename(self.path)
+        companion_names = {os.path.basename(companion) for companion in self.companions}
+        
+        while True:
+            readable, _, _ = select.select([self._inotify_fd, self._stop_pipe[0]], [], [])
+            if self._stop_pipe[0] in readable:
+                return
+            
+            try:
+                data = os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                continue
+            
+            touched = False
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+                offset += name_len
+                if name in companion_names:
+                    touched = True
+                elif name == target_name and not mask & IN_MODIFY:
+                    # 本体は書き込み途中で読まないよう、閉じた・置き換えた時点で検知する
+                    touched = True
+            
+            if touched and self.has_changed() and self.on_change:
+                try:
+                    self.on_change()
+                except Exception as e:
+                    logging.error(f"ファイル変更通知エラー: {e}")
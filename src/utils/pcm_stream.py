@@ -0,0 +1,129 @@
+import sys
+import warnings
+import wave
+from array import array
+from math import floor
+from dataclasses import dataclass
+from typing import Dict, Union
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop  # type: ignore[import-not-found, unused-ignore]  # Python 3.13で削除
+except ImportError:
+    audioop = None  # type: ignore[assignment]
+
+
+@dataclass
+class PcmClip:
+    """デコード済みのPCMデータ（インターリーブ済みのフレーム列）"""
+    frames: bytes
+    nchannels: int
+    sampwidth: int
+    framerate: int
+    
+    @property
+    def frame_size(self) -> int:
+        return self.nchannels * self.sampwidth
+    
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / (self.frame_size * self.framerate)
+    
+    def chunk_bytes(self, seconds: float) -> int:
+        """指定秒数分のバイト数（フレーム境界に揃える）"""
+        return max(1, int(self.framerate * seconds)) * self.frame_size
+
+
+def load_wav(path: str) -> PcmClip:
+    """WAVファイルを一度だけ読み込んでPCMデータにする"""
+    with wave.open(path, 'rb') as wav:
+        return PcmClip(
+            frames=wav.readframes(wav.getnframes()),
+            nchannels=wav.getnchannels(),
+            sampwidth=wav.getsampwidth(),
+            framerate=wav.getframerate()
+        )
+
+
+# 符号付き整数PCMのサンプル幅ごとの array の型コード
+_SIGNED_TYPECODES = {2: "h", 4: "i" if array("i").itemsize == 4 else "l"}
+
+
+def scale_pcm(data: Union[bytes, memoryview], sampwidth: int, gain: float) -> bytes:
+    """リトルエンディアンのPCMに音量（0.0〜1.0）を掛ける
+    
+    audioopがあればチャンク全体をC実装で一度に処理し、ない環境ではarrayで1サンプルずつ計算する。
+    どちらも audioop.mul と同じく小数点以下を切り捨てる（負の値は0から遠ざかる）。
+    """
+    if gain >= 1.0:
+        return bytes(data)
+    gain = max(gain, 0.0)
+    
+    if audioop is not None:
+        return _scale_with_audioop(bytes(data), sampwidth, gain)
+    
+    if sampwidth == 1:
+        # 8bitは128を無音とする符号なし整数
+        samples = array("B")
+        samples.frombytes(data)
+        return array("B", [128 + floor((sample - 128) * gain) for sample in samples]).tobytes()
+    
+    typecode = _SIGNED_TYPECODES.get(sampwidth)
+    if typecode is None:
+        return bytes(data)  # 24bitなどは音量を変えずに再生する
+    
+    samples = array(typecode)
+    samples.frombytes(data)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    scaled = array(typecode, [floor(sample * gain) for sample in samples])
+    if sys.byteorder == "big":
+        scaled.byteswap()
+    return scaled.tobytes()
+
+
+def _scale_with_audioop(data: bytes, sampwidth: int, gain: float) -> bytes:
+    if sampwidth == 1:
+        # audioopは8bitを符号付きとして扱うため、無音の128を0にずらしてから掛ける
+        return audioop.bias(audioop.mul(audioop.bias(data, 1, -128), 1, gain), 1, 128)
+    
+    # audioopはネイティブのバイトオーダーで計算する
+    if sys.byteorder == "big":
+        data = audioop.byteswap(data, sampwidth)
+    scaled = audioop.mul(data, sampwidth, gain)
+    if sys.byteorder == "big":
+        scaled = audioop.byteswap(scaled, sampwidth)
+    return scaled
+
+
+class GainStage:
+    """ストリーミング中のPCMチャンクに音量とクレッシェンドを適用する
+    
+    クレッシェンド中はチャンクごとに音量を上げ、到達後は一度計算した
+    チャンクを使い回す（ループ再生中の計算は初回の1周分だけ）。
+    """
+    
+    def __init__(self, clip: PcmClip, volume: float = 1.0, ramp_seconds: float = 0):
+        self.clip = clip
+        self.volume = min(max(volume, 0.0), 1.0)
+        self.ramp_bytes = clip.chunk_bytes(ramp_seconds) if ramp_seconds > 0 else 0
+        self.written = 0
+        self._steady: Dict[int, bytes] = {}
+    
+    def process(self, offset: int, chunk: memoryview) -> Union[bytes, memoryview]:
+        """clip.frames の offset から始まるチャンクを処理する（音量を変えない場合はchunkをそのまま返す）"""
+        data: Union[bytes, memoryview]
+        if self.written < self.ramp_bytes:
+            gain = self.volume * self.written / self.ramp_bytes
+            data = scale_pcm(chunk, self.clip.sampwidth, gain)
+        elif self.volume >= 1.0:
+            data = chunk
+        else:
+            steady = self._steady.get(offset)
+            if steady is None:
+                steady = self._steady[offset] = scale_pcm(chunk, self.clip.sampwidth, self.volume)
+            data = steady
+        
+        self.written += len(chunk)
+        return data
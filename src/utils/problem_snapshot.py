@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from models.problem import Problem
+from utils.file_watcher import file_signature
+
+
+SNAPSHOT_VERSION = 4  # 問題クラスの構造やファイル形式を変えたら上げる（古いスナップショットは使わない）
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProblemSnapshotCache:
+    """検証・解析済みの問題セットを storage/problem_cache/ に保存するキャッシュ
+    
+    元ファイルのパス・サイズ・更新時刻・内容のハッシュが一致する場合だけ
+    スナップショットを使い、JSONの解析と検証を省略する。
+    ファイルには小さなヘッダー（署名）と問題の一覧を順に pickle しておき、
+    ヘッダーが一致した場合だけ問題の一覧を読み込む。
+    """
+    
+    def __init__(self, cache_dir: str = os.path.join("storage", "problem_cache")):
+        self.cache_dir = cache_dir
+    
+    def _snapshot_path(self, source_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+    
+    def _read_snapshot(self, source_path: str,
+                       matches: Callable[[Dict[str, Any]], bool]) -> Optional[List[Problem]]:
+        """ヘッダーを matches で確かめ、一致した場合だけ問題の一覧を読み込む"""
+        try:
+            with open(self._snapshot_path(source_path), 'rb') as f:
+                header = pickle.load(f)
+                if (not isinstance(header, dict)
+                        or header.get("version") != SNAPSHOT_VERSION
+                        or header.get("path") != os.path.abspath(source_path)
+                        or not matches(header)):
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"問題キャッシュ読み込みエラー: {e}")
+            return None
+    
+    def load(self, source_path: str, content: bytes) -> Optional[List[Problem]]:
+        """source_path の内容（content）に対応するスナップショットがあれば問題の一覧を返す"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        return self._read_snapshot(source_path, lambda header: (
+            header.get("size") == len(content)
+            and header.get("mtime_ns") == stat.st_mtime_ns
+            and header.get("sha256") == hashlib.sha256(content).hexdigest()
+        ))
+    
+    def load_matching(self, source_path: str, signature: Tuple[int, int, int]) -> Optional[List[Problem]]:
+        """signature（更新時刻・サイズ・inode）が一致するスナップショットの問題の一覧
+        
+        一致しない場合は元ファイルを読まずにNoneを返す。一致した場合だけ内容のハッシュを確かめる。
+        """
+        mtime_ns, size, _ = signature
+        
+        def matches(header: Dict[str, Any]) -> bool:
+            if header.get("size") != size or header.get("mtime_ns") != mtime_ns:
+                return False
+            try:
+                return header.get("sha256") == file_sha256(source_path)
+            except OSError:
+                return False
+        
+        return self._read_snapshot(source_path, matches)
+    
+    def store(self, source_path: str, content: bytes, problems: List[Problem]):
+        """解析結果を保存する（古いスナップショットは置き換えられる）"""
+        try:
+            stat = os.stat(source_path)
+        except OSError as e:
+            print(f"問題キャッシュ保存エラー: {e}")
+            return
+        if stat.st_size != len(content):
+            return  # 読み込み後にファイルが変更された
+        self._write(source_path, len(content), stat.st_mtime_ns, hashlib.sha256(content).hexdigest(), problems)
+    
+    def store_digest(self, source_path: str, signature: Tuple[int, int, int], sha256: str,
+                     problems: List[Problem]):
+        """読み込み前のsignatureと、解析したバイト列のハッシュで解析結果を保存する"""
+        if file_signature(source_path) != signature:
+            return  # 読み込み中にファイルが変更された
+        mtime_ns, size, _ = signature
+        self._write(source_path, size, mtime_ns, sha256, problems)
+    
+    def _write(self, source_path: str, size: int, mtime_ns: int, sha256: str, problems: List[Problem]):
+        try:
+            header = {
+                "version": SNAPSHOT_VERSION,
+                "path": os.path.abspath(source_path),
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "sha256": sha256,
+            }
+            
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(list(problems), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self._snapshot_path(source_path))
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        except Exception as e:
+            print(f"問題キャッシュ保存エラー: {e}")
+    
+    def invalidate(self, source_path: str):
+        try:
+            os.remove(self._snapshot_path(source_path))
+        except FileNotFoundError:
+            pass
+
@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from models.alarm import Alarm
+from models.problem import AnswerStats
+from utils.storage_backends import AlarmBackend, SettingsBackend, HistoryBackend, ProblemStatsBackend
+
+
+SQLITE_DB_NAME = "alearm.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alarms (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    enabled INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS answer_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    problem_id TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answer_history_problem ON answer_history(problem_id, answered_at);
+
+CREATE TABLE IF NOT EXISTS problem_stats (
+    problem_id TEXT PRIMARY KEY,
+    correct INTEGER NOT NULL,
+    wrong INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    last_answered_at TEXT
+);
+"""
+
+
+def _format_time(value: Optional[datetime]) -> Optional[str]:
+    # 同じ書式のISO文字列は辞書順と時刻順が一致するため、そのままインデックスで並べられる
+    return value.isoformat(timespec="seconds") if value else None
+
+
+class SqliteStorage(AlarmBackend, SettingsBackend, HistoryBackend, ProblemStatsBackend):
+    """アラーム・設定・回答履歴・回答集計を1つのSQLiteデータベースに保存するバックエンド"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    # --- アラーム ---
+
+    def load_alarms(self) -> List[Alarm]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM alarms ORDER BY position").fetchall()
+
+        alarms = []
+        for (data,) in rows:
+            try:
+                alarms.append(Alarm.from_dict(json.loads(data)))
+            except Exception as e:
+                print(f"アラーム読み込みエラー: {e}")
+        return alarms
+
+    def save_alarms(self, alarms: List[Alarm], changed_ids: Iterable[str], deleted_ids: Iterable[str]):
+        changed = set(changed_ids)
+        rows = [
+            (alarm.id, position, int(alarm.enabled), json.dumps(alarm.to_dict(), ensure_ascii=False))
+            for position, alarm in enumerate(alarms) if alarm.id in changed
+        ]
+
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM alarms WHERE id = ?", [(alarm_id,) for alarm_id in deleted_ids])
+            conn.executemany(
+                "INSERT INTO alarms (id, position, enabled, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET position = excluded.position, enabled = excluded.enabled, "
+                "data = excluded.data",
+                rows
+            )
+
+    def signature(self) -> Any:
+        # data_version は他の接続（外部プロセス）がコミットしたときだけ変わる
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def companion_files(self) -> List[str]:
+        # WALモードではコミットが -wal ファイルに書かれ、本体は次のチェックポイントまで変わらない
+        return [self.path + "-wal"]
+
+    # --- 設定 ---
+
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM settings").fetchall()
+        if not rows:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_settings(self, settings: Dict[str, Any]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM settings")
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in settings.items()]
+            )
+
+    # --- 回答履歴 ---
+
+    def record_answer(self, problem_id: str, correct: bool, answered_at: datetime):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO answer_history (problem_id, correct, answered_at) VALUES (?, ?, ?)",
+                (problem_id, int(correct), _format_time(answered_at))
+            )
+
+    def load_history(self, problem_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT problem_id, correct, answered_at FROM answer_history"
+        params: tuple = ()
+        if problem_id is not None:
+            query += " WHERE problem_id = ?"
+            params = (problem_id,)
+        query += " ORDER BY answered_at, id"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {"problem_id": row[0], "correct": bool(row[1]), "answered_at": row[2]}
+            for row in rows
+        ]
+
+    # --- 回答集計 ---
+
+    def load_problem_stats(self) -> Dict[str, AnswerStats]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT problem_id, correct, wrong, streak, last_answered_at FROM problem_stats"
+            ).fetchall()
+        return {
+            row[0]: AnswerStats(correct=row[1], wrong=row[2], streak=row[3], last_answered_at=row[4])
+            for row in rows
+        }
+
+    def save_problem_stats(self, stats: Dict[str, AnswerStats], changed_ids: Iterable[str]):
+        with self._transaction() as conn:
+            self._upsert_problem_stats(conn, [(problem_id, stats[problem_id]) for problem_id in changed_ids])
+
+    @staticmethod
+    def _upsert_problem_stats(conn: sqlite3.Connection, items: Iterable[Tuple[str, AnswerStats]]):
+        conn.executemany(
+            "INSERT OR REPLACE INTO problem_stats (problem_id, correct, wrong, streak, last_answered_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (problem_id, stats.correct, stats.wrong, stats.streak, stats.last_answered_at)
+                for problem_id, stats in items
+            ]
+        )
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE 〜 COMMIT/ROLLBACK をまとめるコンテキストマネージャ"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
+
+
+def sqlite_db_path(storage_dir: str) -> str:
+    return os.path.join(storage_dir, SQLITE_DB_NAME)
+
+
+def migrate_json_to_sqlite(storage_dir: str = "storage") -> Dict[str, int]:
+    """storage/*.json の内容をSQLiteデータベースへ一度だけ移行する"""
+    from utils.storage_backends import (
+        JsonAlarmBackend, JsonSettingsBackend, JsonHistoryBackend, JsonProblemStatsBackend,
+    )
+
+    db_path = sqlite_db_path(storage_dir)
+    if os.path.exists(db_path):
+        raise FileExistsError(f"移行先のデータベースが既に存在します: {db_path}")
+
+    alarms = JsonAlarmBackend(os.path.join(storage_dir, "alarms.json")).load_alarms()
+    settings = JsonSettingsBackend(os.path.join(storage_dir, "settings.json")).load_settings()
+    history = JsonHistoryBackend(os.path.join(storage_dir, "history.jsonl")).load_history()
+    problem_stats = JsonProblemStatsBackend(os.path.join(storage_dir, "problem_stats.json")).load_problem_stats()
+
+    # 途中で失敗しても中途半端なデータベースが残らないよう、一時ファイルに作ってから置き換える
+    temp_path = db_path + ".migrating"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    backend = SqliteStorage(temp_path)
+    try:
+        backend.save_alarms(alarms, [alarm.id for alarm in alarms], [])
+        if settings is not None:
+            backend.save_settings(settings)
+        with backend._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO answer_history (problem_id, correct, answered_at) VALUES (?, ?, ?)",
+                [(entry["problem_id"], int(entry["correct"]), entry["answered_at"]) for entry in history]
+            )
+            backend._upsert_problem_stats(conn, problem_stats.items())
+        backend._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        backend._conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        backend.close()
+    os.replace(temp_path, db_path)
+
+    return {"alarms": len(alarms), "settings": len(settings or {}), "history": len(history),
+            "problem_stats": len(problem_stats)}
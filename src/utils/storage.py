@@ -1,84 +1,182 @@
-import json
+import atexit
+import logging
 import os
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Set
 from models.alarm import Alarm
+from models.problem import AnswerStats
+from utils.storage_backends import (
+    AlarmBackend, SettingsBackend, HistoryBackend, ProblemStatsBackend,
+    JsonAlarmBackend, JsonSettingsBackend, JsonHistoryBackend, JsonProblemStatsBackend,
+)
+from utils.sqlite_storage import SqliteStorage, sqlite_db_path
+
+
+_sqlite_backends: Dict[str, SqliteStorage] = {}
+_backend_lock = threading.Lock()
+
+
+def _sqlite_backend(storage_dir: str) -> Optional[SqliteStorage]:
+    """移行済み（データベースが存在する）場合はSQLiteバックエンドを返す"""
+    db_path = sqlite_db_path(storage_dir)
+    if not os.path.exists(db_path):
+        return None
+    
+    key = os.path.abspath(db_path)
+    with _backend_lock:
+        backend = _sqlite_backends.get(key)
+        if backend is None:
+            backend = SqliteStorage(db_path)
+            _sqlite_backends[key] = backend
+        return backend
 
 
 class AlarmStorage:
-    def __init__(self, storage_dir: str = "storage"):
+    """アラームをIDで引けるメモリキャッシュに保持し、変更はまとめてファイルへ書き込む"""
+    
+    def __init__(self, storage_dir: str = "storage", save_delay: float = 1.0,
+                 backend: Optional[AlarmBackend] = None):
         self.storage_dir = storage_dir
-        self.alarms_file = os.path.join(storage_dir, "alarms.json")
         self._ensure_storage_dir()
+        self.backend = backend or _sqlite_backend(storage_dir) or JsonAlarmBackend(
+            os.path.join(storage_dir, "alarms.json")
+        )
+        self.alarms_file = self.backend.path
+        self.companion_files = self.backend.companion_files()  # alarms_fileと合わせて変更を監視する
+        self.save_delay = save_delay  # この秒数内の変更を1回の書き込みにまとめる（0なら即時）
+        self.retry_delay = 5.0  # 書き込みに失敗したら、この秒数後に書き直す
+        self.write_count = 0
+        self.last_write_seconds = 0.0
+        self._alarms: Dict[str, Alarm] = {}
+        self._backend_signature: Any = None
+        self._loaded = False
+        self._dirty = False
+        self._changed_ids: Set[str] = set()
+        self._deleted_ids: Set[str] = set()
+        self._save_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
     
     def _ensure_storage_dir(self):
         if not os.path.exists(self.storage_dir):
             os.makedirs(self.storage_dir)
     
     def save_alarm(self, alarm: Alarm):
-        alarms = self.load_alarms()
-        
-        existing_index = None
-        for i, existing_alarm in enumerate(alarms):
-            if existing_alarm.id == alarm.id:
-                existing_index = i
-                break
-        
-        if existing_index is not None:
-            alarms[existing_index] = alarm
-        else:
-            alarms.append(alarm)
-        
-        self._save_alarms(alarms)
+        with self._lock:
+            self._ensure_loaded()
+            # アラームは変更できないので、コピーせずにそのまま保持・共有する
+            existing = self._alarms.get(alarm.id)
+            self._alarms[alarm.id] = alarm
+            if existing and existing.to_dict() == alarm.to_dict():
+                return  # 保存内容が変わらない場合（last_triggeredのみの変更など）は書き込まない
+            self._changed_ids.add(alarm.id)
+            self._deleted_ids.discard(alarm.id)
+            self._schedule_save()
     
     def load_alarms(self) -> List[Alarm]:
-        if not os.path.exists(self.alarms_file):
-            return []
-        
-        try:
-            with open(self.alarms_file, 'r', encoding='utf-8') as f:
-                alarms_data = json.load(f)
-            
-            alarms = []
-            for alarm_data in alarms_data:
-                try:
-                    alarm = Alarm.from_dict(alarm_data)
-                    alarms.append(alarm)
-                except Exception as e:
-                    print(f"アラーム読み込みエラー: {e}")
-                    continue
-            
-            return alarms
-            
-        except Exception as e:
-            print(f"アラームファイル読み込みエラー: {e}")
-            return []
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._alarms.values())
     
     def load_alarm(self, alarm_id: str) -> Optional[Alarm]:
-        alarms = self.load_alarms()
-        for alarm in alarms:
-            if alarm.id == alarm_id:
-                return alarm
-        return None
+        with self._lock:
+            self._ensure_loaded()
+            return self._alarms.get(alarm_id)
     
     def delete_alarm(self, alarm_id: str):
-        alarms = self.load_alarms()
-        alarms = [alarm for alarm in alarms if alarm.id != alarm_id]
-        self._save_alarms(alarms)
+        with self._lock:
+            self._ensure_loaded()
+            if self._alarms.pop(alarm_id, None) is not None:
+                self._changed_ids.discard(alarm_id)
+                self._deleted_ids.add(alarm_id)
+                self._schedule_save()
+    
+    def flush(self):
+        """保留中の変更を同期的に書き込む"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._save_alarms()
     
-    def _save_alarms(self, alarms: List[Alarm]):
+    def _ensure_loaded(self):
+        """保存先が外部で変更された場合のみ読み直す"""
+        if self._dirty:
+            return  # 未保存の変更があるときはメモリ上の内容を優先
+        
+        signature = self.backend.signature()
+        if self._loaded and signature == self._backend_signature:
+            return
+        
+        self._alarms = {alarm.id: alarm for alarm in self.backend.load_alarms()}
+        self._backend_signature = signature
+        self._loaded = True
+    
+    def _schedule_save(self):
+        self._dirty = True
+        if self.save_delay <= 0:
+            self._save_alarms()
+            return
+        
+        # 既にタイマーがあれば、その書き込みにまとめる
+        self._start_save_timer(self.save_delay)
+    
+    def _start_save_timer(self, delay: float):
+        if not self._save_timer:
+            self._save_timer = threading.Timer(delay, self._on_save_timer)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _on_save_timer(self):
+        with self._lock:
+            self._save_timer = None
+            if self._dirty:
+                self._save_alarms()
+    
+    def _save_alarms(self):
         try:
-            alarms_data = [alarm.to_dict() for alarm in alarms]
-            with open(self.alarms_file, 'w', encoding='utf-8') as f:
-                json.dump(alarms_data, f, ensure_ascii=False, indent=2)
+            started = time.perf_counter()
+            alarms = list(self._alarms.values())
+            self.backend.save_alarms(alarms, self._changed_ids, self._deleted_ids)
+            self._backend_signature = self.backend.signature()
+            self._dirty = False
+            self._changed_ids = set()
+            self._deleted_ids = set()
+            self.write_count += 1
+            self.last_write_seconds = time.perf_counter() - started
+            logging.debug(f"アラームを保存しました: {len(alarms)}件 ({self.last_write_seconds * 1000:.1f}ms)")
         except Exception as e:
             print(f"アラーム保存エラー: {e}")
+            # 未保存のままだと外部での変更も読み直せないため、時間をおいて書き直す
+            self._start_save_timer(self.retry_delay)
+
+
+_shared_alarm_storages: Dict[str, AlarmStorage] = {}
+_shared_lock = threading.Lock()
+
+
+def get_alarm_storage(storage_dir: str = "storage") -> AlarmStorage:
+    """プロセス内で共有するAlarmStorageを取得"""
+    key = os.path.abspath(storage_dir)
+    with _shared_lock:
+        storage = _shared_alarm_storages.get(key)
+        if storage is None:
+            storage = AlarmStorage(storage_dir)
+            _shared_alarm_storages[key] = storage
+            # タイマーはデーモンスレッドなので、終了時に保留中の変更を書き込む
+            atexit.register(storage.flush)
+        return storage
 
 
 class SettingsStorage:
-    def __init__(self, storage_dir: str = "storage"):
+    def __init__(self, storage_dir: str = "storage", backend: Optional[SettingsBackend] = None):
         self.storage_dir = storage_dir
-        self.settings_file = os.path.join(storage_dir, "settings.json")
         self._ensure_storage_dir()
+        self.backend = backend or _sqlite_backend(storage_dir) or JsonSettingsBackend(
+            os.path.join(storage_dir, "settings.json")
+        )
     
     def _ensure_storage_dir(self):
         if not os.path.exists(self.storage_dir):
@@ -86,21 +184,20 @@ class SettingsStorage:
     
     def save_settings(self, settings: Dict[str, Any]):
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, ensure_ascii=False, indent=2)
+            self.backend.save_settings(settings)
         except Exception as e:
             print(f"設定保存エラー: {e}")
     
     def load_settings(self) -> Dict[str, Any]:
-        if not os.path.exists(self.settings_file):
-            return self._get_default_settings()
-        
         try:
-            with open(self.settings_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            settings = self.backend.load_settings()
         except Exception as e:
             print(f"設定読み込みエラー: {e}")
             return self._get_default_settings()
+        
+        if settings is None:
+            return self._get_default_settings()
+        return settings
     
     def _get_default_settings(self) -> Dict[str, Any]:
         return {
@@ -110,5 +207,138 @@ class SettingsStorage:
             "default_snooze_count": 3,
             "screen_brightness": 1.0,
             "problem_sets": ["math", "general"],
-            "default_difficulty": "medium"
-        }
\ No newline at end of file
+            "default_difficulty": "medium",
+            "warmup_lead_seconds": 60
+        }
+
+
+class HistoryStorage:
+    """問題ごとの回答履歴"""
+    
+    def __init__(self, storage_dir: str = "storage", backend: Optional[HistoryBackend] = None):
+        self.storage_dir = storage_dir
+        self._ensure_storage_dir()
+        self.backend = backend or _sqlite_backend(storage_dir) or JsonHistoryBackend(
+            os.path.join(storage_dir, "history.jsonl")
+        )
+    
+    def _ensure_storage_dir(self):
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+    
+    def record_answer(self, problem_id: str, correct: bool, answered_at: Optional[datetime] = None):
+        try:
+            self.backend.record_answer(problem_id, correct, answered_at or datetime.now())
+        except Exception as e:
+            print(f"回答履歴保存エラー: {e}")
+    
+    def load_history(self, problem_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        try:
+            return self.backend.load_history(problem_id)
+        except Exception as e:
+            print(f"回答履歴読み込みエラー: {e}")
+            return []
+
+
+class ProblemStatsStorage:
+    """問題ごとの回答集計（出題の重み付けに使う）
+    
+    初回に全件をメモリに読み込んだ後は、回答のたびにメモリ上の集計だけを更新する。
+    保存はAlarmStorageと同様に save_delay 秒内の変更を1回にまとめ、
+    SQLiteでは変更した問題の行だけを書き込む。
+    """
+    
+    def __init__(self, storage_dir: str = "storage", save_delay: float = 5.0,
+                 backend: Optional[ProblemStatsBackend] = None):
+        self.storage_dir = storage_dir
+        self._ensure_storage_dir()
+        self.backend = backend or _sqlite_backend(storage_dir) or JsonProblemStatsBackend(
+            os.path.join(storage_dir, "problem_stats.json")
+        )
+        self.save_delay = save_delay  # この秒数内の回答を1回の書き込みにまとめる（0なら即時）
+        self.write_count = 0
+        self._stats: Optional[Dict[str, AnswerStats]] = None
+        self._changed_ids: Set[str] = set()
+        self._save_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+    
+    def _ensure_storage_dir(self):
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+    
+    def _ensure_loaded(self) -> Dict[str, AnswerStats]:
+        if self._stats is None:
+            try:
+                self._stats = self.backend.load_problem_stats()
+            except Exception as e:
+                print(f"回答集計読み込みエラー: {e}")
+                self._stats = {}
+        return self._stats
+    
+    def load_stats(self) -> Dict[str, AnswerStats]:
+        """問題IDごとの集計（呼び出し時点のコピー）"""
+        with self._lock:
+            return dict(self._ensure_loaded())
+    
+    def get_stats(self, problem_id: str) -> AnswerStats:
+        with self._lock:
+            return self._ensure_loaded().get(problem_id) or AnswerStats()
+    
+    def record_answer(self, problem_id: str, correct: bool, answered_at: Optional[datetime] = None) -> AnswerStats:
+        """回答を集計に加え、更新後の集計を返す"""
+        with self._lock:
+            stats_map = self._ensure_loaded()
+            stats = (stats_map.get(problem_id) or AnswerStats()).recorded(correct, answered_at or datetime.now())
+            stats_map[problem_id] = stats
+            self._changed_ids.add(problem_id)
+            self._schedule_save()
+            return stats
+    
+    def flush(self):
+        """保留中の変更を同期的に書き込む"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._changed_ids:
+                self._save_stats()
+    
+    def _schedule_save(self):
+        if self.save_delay <= 0:
+            self._save_stats()
+            return
+        
+        # 既にタイマーがあれば、その書き込みにまとめる
+        if not self._save_timer:
+            self._save_timer = threading.Timer(self.save_delay, self._on_save_timer)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _on_save_timer(self):
+        with self._lock:
+            self._save_timer = None
+            if self._changed_ids:
+                self._save_stats()
+    
+    def _save_stats(self):
+        try:
+            self.backend.save_problem_stats(self._stats, self._changed_ids)
+            self._changed_ids = set()
+            self.write_count += 1
+        except Exception as e:
+            print(f"回答集計保存エラー: {e}")
+
+
+_shared_stats_storages: Dict[str, ProblemStatsStorage] = {}
+
+
+def get_problem_stats_storage(storage_dir: str = "storage") -> ProblemStatsStorage:
+    """プロセス内で共有するProblemStatsStorageを取得（集計の読み込みは最初の1回だけ）"""
+    key = os.path.abspath(storage_dir)
+    with _shared_lock:
+        storage = _shared_stats_storages.get(key)
+        if storage is None:
+            storage = ProblemStatsStorage(storage_dir)
+            _shared_stats_storages[key] = storage
+            atexit.register(storage.flush)
+        return storage
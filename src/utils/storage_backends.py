@@ -0,0 +1,213 @@
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from models.alarm import Alarm
+from models.problem import AnswerStats
+from utils.file_watcher import file_signature
+
+
+def atomic_write_json(path: str, data: Any):
+    """一時ファイルに書き込みfsyncしてから置き換える（書き込み途中の電源断でも壊れない）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # 置き換え（rename）自体を永続化するためディレクトリもfsync
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Windowsなどディレクトリを開けない環境
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _read_json(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class AlarmBackend(ABC):
+    """アラームの永続化先"""
+    path: str  # 変更検知の対象となるファイル
+
+    @abstractmethod
+    def load_alarms(self) -> List[Alarm]:
+        pass
+
+    @abstractmethod
+    def save_alarms(self, alarms: List[Alarm], changed_ids: Iterable[str], deleted_ids: Iterable[str]):
+        """alarmsは保存後の全アラーム（順序付き）。差分で書ける実装は changed_ids / deleted_ids を使う"""
+        pass
+
+    @abstractmethod
+    def signature(self) -> Any:
+        """外部からの変更検知に使う値（変化したら読み直す）"""
+        pass
+
+    def companion_files(self) -> List[str]:
+        """pathと合わせて変更を監視するファイル（書き込みが別ファイルに入る形式のため）"""
+        return []
+
+
+class SettingsBackend(ABC):
+    """設定の永続化先"""
+
+    @abstractmethod
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        """保存された設定（未保存ならNone）"""
+        pass
+
+    @abstractmethod
+    def save_settings(self, settings: Dict[str, Any]):
+        pass
+
+
+class HistoryBackend(ABC):
+    """問題の回答履歴の永続化先"""
+
+    @abstractmethod
+    def record_answer(self, problem_id: str, correct: bool, answered_at: datetime):
+        pass
+
+    @abstractmethod
+    def load_history(self, problem_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """回答履歴（古い順）。problem_idを指定した場合はその問題のみ"""
+        pass
+
+
+class ProblemStatsBackend(ABC):
+    """問題ごとの回答集計の永続化先"""
+
+    @abstractmethod
+    def load_problem_stats(self) -> Dict[str, AnswerStats]:
+        pass
+
+    @abstractmethod
+    def save_problem_stats(self, stats: Dict[str, AnswerStats], changed_ids: Iterable[str]):
+        """statsは保存後の全集計。差分で書ける実装は changed_ids を使う"""
+        pass
+
+
+class JsonAlarmBackend(AlarmBackend):
+    """storage/alarms.json にJSON配列として保存（デフォルト）"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load_alarms(self) -> List[Alarm]:
+        if not os.path.exists(self.path):
+            return []
+
+        try:
+            alarms_data = _read_json(self.path)
+
+            alarms = []
+            for alarm_data in alarms_data:
+                try:
+                    alarm = Alarm.from_dict(alarm_data)
+                    alarms.append(alarm)
+                except Exception as e:
+                    print(f"アラーム読み込みエラー: {e}")
+                    continue
+
+            return alarms
+
+        except Exception as e:
+            print(f"アラームファイル読み込みエラー: {e}")
+            return []
+
+    def save_alarms(self, alarms: List[Alarm], changed_ids: Iterable[str], deleted_ids: Iterable[str]):
+        atomic_write_json(self.path, [alarm.to_dict() for alarm in alarms])
+
+    def signature(self) -> Any:
+        return file_signature(self.path)
+
+
+class JsonSettingsBackend(SettingsBackend):
+    """storage/settings.json に保存（デフォルト）"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        return _read_json(self.path)
+
+    def save_settings(self, settings: Dict[str, Any]):
+        atomic_write_json(self.path, settings)
+
+
+class JsonHistoryBackend(HistoryBackend):
+    """storage/history.jsonl に1回答1行のJSON Lines形式で追記（デフォルト）
+
+    回答のたびにファイル全体を読み書きせず、末尾に1行追加するだけで済む。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def record_answer(self, problem_id: str, correct: bool, answered_at: datetime):
+        entry = {
+            "problem_id": problem_id,
+            "correct": correct,
+            "answered_at": answered_at.isoformat(timespec="seconds")
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        with open(self.path, 'ab+') as f:
+            # 前回の追記が途中で途切れていた場合は、その行と混ざらないよう改行してから書く
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+
+    def load_history(self, problem_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+
+        history = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    # 追記途中の電源断で末尾の行が欠けた場合など
+                    print(f"回答履歴読み込みエラー: {e}")
+                    continue
+                if problem_id is None or entry["problem_id"] == problem_id:
+                    history.append(entry)
+        return history
+
+
+class JsonProblemStatsBackend(ProblemStatsBackend):
+    """storage/problem_stats.json に問題IDをキーとするJSONオブジェクトとして保存（デフォルト）"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load_problem_stats(self) -> Dict[str, AnswerStats]:
+        if not os.path.exists(self.path):
+            return {}
+        return {problem_id: AnswerStats.from_dict(data) for problem_id, data in _read_json(self.path).items()}
+
+    def save_problem_stats(self, stats: Dict[str, AnswerStats], changed_ids: Iterable[str]):
+        atomic_write_json(self.path, {problem_id: entry.to_dict() for problem_id, entry in stats.items()})
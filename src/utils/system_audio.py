@@ -1,112 +1,257 @@
+import logging
 import os
 import subprocess
 import threading
-import platform
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from .audio_backends import PlayerBackend, get_audio_backends
+from .audio_cache import AudioAssetCache, get_audio_asset_cache
+from .pcm_stream import GainStage, PcmClip
+from .tone_synth import FALLBACK_TONE, TONE_PATTERNS, synthesize_tone, tone_file
+
+
+STREAM_CHUNK_SECONDS = 0.05  # 一度にプレーヤーへ書き込むPCMの長さ（停止までの遅れの上限にもなる）
+MIN_RUN_SECONDS = 0.5  # プレーヤーがこの秒数動き続けたら失敗回数をリセットする
+BACKOFF_INITIAL = 0.5  # 失敗後に再起動するまでの待ち時間（連続失敗ごとに倍）
+BACKOFF_MAX = 30.0
 
 
 class SystemAudioController:
-    """システムコマンドを使用した音声制御（Fletのオーディオバックエンド問題の代替手段）"""
+    """システムコマンドを使用した音声制御（Fletのオーディオバックエンド問題の代替手段）
+    
+    再生コマンドは起動時に一度だけ調べ（audio_backends）、プレーヤーが
+    すぐに終了するなど失敗が続いた場合は指数的に間隔を空けて再起動する。
+    """
     
-    def __init__(self):
+    def __init__(self, asset_cache: Optional[AudioAssetCache] = None,
+                 backends: Optional[List[PlayerBackend]] = None):
         self.current_process: Optional[subprocess.Popen] = None
         self.is_playing = False
         self.should_loop = False
         self.loop_thread: Optional[threading.Thread] = None
-        self.sound_file = None
+        self.sound_file: Optional[str] = None
+        self.asset_cache = asset_cache or get_audio_asset_cache()
+        self.backends = backends if backends is not None else get_audio_backends()
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+        self._stop_event = threading.Event()
     
     def play_alarm(self, sound_config: Dict[str, Any]):
         """アラーム音声を再生"""
         if self.is_playing:
             self.stop_alarm()
         
-        sound_file = sound_config["file"]
-        if not os.path.isabs(sound_file):
-            # 相対パスの場合、プロジェクトルートからの絶対パスに変換
-            current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            sound_file = os.path.join(current_dir, sound_file)
-        
-        if not os.path.exists(sound_file):
-            print(f"音声ファイルが見つかりません: {sound_file}")
+        if not self.backends:
+            self._record_failure("再生コマンドがありません")
             return False
         
-        self.sound_file = sound_file
+        sound_file, tone = self._resolve_source(sound_config)
+        self.sound_file = sound_file or f"tone:{tone}"
         self.should_loop = sound_config.get("loop", True)
         self.is_playing = True
+        # 再生ごとに停止イベントを分け、前回の再生スレッドが動き続けないようにする
+        self._stop_event = stop_event = threading.Event()
+        
+        volume = sound_config.get("volume", 0.8)
+        # 合成音はメモリ上で計算済みのPCMを流すだけで、ファイルを読まない
+        clip = synthesize_tone(tone) if tone else self._load_clip(sound_file)
+        stream = self._stream_backend(clip) if clip else None
+        target: Callable[..., None]
+        args: Tuple[Any, ...]
+        if clip and stream:
+            # 1つのプレーヤーにPCMを流し続ける（ループの継ぎ目で途切れない）
+            gain = GainStage(clip, volume, sound_config.get("ramp_seconds", 0))
+            target, args = self._stream_loop, (clip, stream, gain, stop_event)
+        else:
+            if tone:
+                sound_file = tone_file(tone)  # ファイル再生しかできない環境
+            target, args = self._play_loop, (sound_file, volume, stop_event)
         
         # ループ再生を別スレッドで実行
-        self.loop_thread = threading.Thread(
-            target=self._play_loop,
-            args=(sound_file, sound_config.get("volume", 0.8)),
-            daemon=True
-        )
+        self.loop_thread = threading.Thread(target=target, args=args, daemon=True)
         self.loop_thread.start()
         
-        import logging
-        logging.info(f"システムオーディオで音声再生開始: {sound_file}")
+        logging.info(f"システムオーディオで音声再生開始: {self.sound_file}")
         
         return True
     
-    def _play_loop(self, sound_file: str, volume: float):
-        """ループ再生処理"""
-        while self.is_playing and self.should_loop:
+    def _resolve_source(self, sound_config: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """再生する音声ファイルと合成音のパターン（どちらか一方だけを返す）"""
+        tone = sound_config.get("tone")
+        if tone:
+            return None, (tone if tone in TONE_PATTERNS else FALLBACK_TONE)
+        
+        sound_file = self._resolve_sound_file(sound_config["file"])
+        if not os.path.exists(sound_file):
+            # 音声ファイルがなくても無音にはせず、合成音で鳴らす
+            print(f"音声ファイルが見つかりません: {sound_file}")
+            logging.warning(f"代わりに合成音（{FALLBACK_TONE}）を再生します")
+            return None, FALLBACK_TONE
+        return sound_file, None
+    
+    def _resolve_sound_file(self, sound_file: str) -> str:
+        if not os.path.isabs(sound_file):
+            # 相対パスの場合、プロジェクトルートからの絶対パスに変換
+            current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+            sound_file = os.path.join(current_dir, sound_file)
+        return sound_file
+    
+    def prepare(self, sound_config: Dict[str, Any]) -> bool:
+        """再生前の確認（再生コマンドがあるか）と音声の準備"""
+        if not self.backends:
+            print("再生コマンドが見つかりません")
+            return False
+        
+        # 発火時にデコード・合成しないよう変換・キャッシュしておく
+        sound_file, tone = self._resolve_source(sound_config)
+        if tone:
+            synthesize_tone(tone)
+        else:
+            self._load_clip(sound_file)
+        return True
+    
+    def health(self) -> Dict[str, Any]:
+        """音声再生の状態（warmupや画面から確認する）"""
+        return {
+            "backends": [backend.name for backend in self.backends],
+            "available": bool(self.backends),
+            "playing": self.is_playing,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at,
+            "healthy": bool(self.backends) and self.consecutive_failures == 0,
+        }
+    
+    def _stream_backend(self, clip: PcmClip) -> Optional[PlayerBackend]:
+        for backend in self.backends:
+            if backend.stream_command(clip):
+                return backend
+        return None
+    
+    def _load_clip(self, sound_file: Optional[str]) -> Optional[PcmClip]:
+        """ストリーミング再生用のデコード済みPCM（ストリーミングできない環境・形式はNone）"""
+        if sound_file is None or not any(backend.name in ("aplay", "paplay") for backend in self.backends):
+            return None
+        return self.asset_cache.load(sound_file)
+    
+    def _record_failure(self, error: str) -> float:
+        """失敗を記録し、次に再起動するまでの待ち時間を返す"""
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.last_failure_at = time.time()
+        delay = min(BACKOFF_INITIAL * 2 ** (self.consecutive_failures - 1), BACKOFF_MAX)
+        logging.warning(f"音声再生に失敗しました（{self.consecutive_failures}回連続）: {error} - {delay:.1f}秒後に再試行")
+        return delay
+    
+    def _record_success(self):
+        self.consecutive_failures = 0
+    
+    
+    def _start_process(self, command: List[str], stream: bool = False) -> subprocess.Popen:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if stream else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self.current_process = process
+        return process
+    
+    def _stream_loop(self, clip: PcmClip, backend: PlayerBackend, gain: GainStage, stop_event: threading.Event):
+        """起動したままのプレーヤーにPCMを書き込み続ける（プレーヤーが落ちたら間隔を空けて起動し直す）"""
+        frames = memoryview(clip.frames)
+        chunk_bytes = clip.chunk_bytes(STREAM_CHUNK_SECONDS)
+        command = backend.stream_command(clip)
+        if command is None:
+            # _stream_backend で選ばれたプレーヤーなので通常は起こらない
+            self._record_failure(f"{backend.name}でストリーミング再生できません")
+            self._finish_playback(stop_event)
+            return
+        offset = 0
+        
+        while not stop_event.is_set():
+            started = time.monotonic()
             try:
-                # プラットフォームに応じたコマンドを使用
-                system = platform.system()
-                
-                if system == "Linux":
-                    # aplayコマンドを使用（Raspberry Pi/Linux標準）
-                    cmd = ["aplay", "-q", sound_file]
-                    try:
-                        self.current_process = subprocess.Popen(
-                            cmd,
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL
-                        )
-                        self.current_process.wait()
-                    except FileNotFoundError:
-                        # aplayがない場合はpaplayを試す
-                        cmd = ["paplay", sound_file]
-                        self.current_process = subprocess.Popen(
-                            cmd,
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL
-                        )
-                        self.current_process.wait()
-                
-                elif system == "Darwin":  # macOS
-                    cmd = ["afplay", sound_file]
-                    self.current_process = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                    self.current_process.wait()
-                
-                elif system == "Windows":
-                    # Windows Media Player
-                    cmd = ["powershell", "-c", f"(New-Object Media.SoundPlayer '{sound_file}').PlaySync()"]
-                    self.current_process = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                    self.current_process.wait()
-                
-                # 単発再生の場合はここでループを終了
-                if not self.should_loop:
+                process = self._start_process(command, stream=True)
+                stdin = process.stdin
+                if stdin is None:
+                    raise OSError(f"{backend.name}の標準入力を開けません")
+            except OSError as e:
+                if stop_event.wait(self._record_failure(str(e))):
                     break
-                    
-            except Exception as e:
-                print(f"音声再生エラー: {e}")
+                continue
+            
+            try:
+                while not stop_event.is_set():
+                    if offset >= len(frames):
+                        # 単発再生の場合は書き込んだ分を再生し終えるまで待つ
+                        if not self.should_loop:
+                            stdin.close()
+                            process.wait()
+                            stop_event.set()
+                            break
+                        offset = 0
+                    stdin.write(gain.process(offset, frames[offset:offset + chunk_bytes]))
+                    offset += chunk_bytes
+                    if self.consecutive_failures and time.monotonic() - started >= MIN_RUN_SECONDS:
+                        self._record_success()
+            except (BrokenPipeError, ValueError, OSError):
+                if stop_event.is_set():
+                    break  # 停止時にプレーヤーが終了された
+                try:
+                    stdin.close()
+                except OSError:
+                    pass
+                returncode = process.poll()
+                if stop_event.wait(self._record_failure(f"{backend.name}が終了しました（{returncode}）")):
+                    break
+        
+        self._finish_playback(stop_event)
+    
+    def _play_loop(self, sound_file: str, volume: float, stop_event: threading.Event):
+        """ループ再生処理（ストリーミングできない環境では1回ごとにプレーヤーを起動する）"""
+        backend_index = 0
+        while not stop_event.is_set():
+            backend = self.backends[backend_index]
+            try:
+                process = self._start_process(backend.file_command(sound_file, volume))
+                returncode = process.wait()
+            except OSError as e:
+                # 起動できないコマンドは次の候補に切り替える
+                backend_index = (backend_index + 1) % len(self.backends)
+                if stop_event.wait(self._record_failure(str(e))):
+                    break
+                continue
+            
+            if stop_event.is_set():
+                break
+            
+            if returncode != 0:
+                # デバイスが使用中などですぐに終了した場合、連続で起動し直さない
+                if stop_event.wait(self._record_failure(f"{backend.name}が終了しました（{returncode}）")):
+                    break
+                continue
+            
+            self._record_success()
+            
+            # 単発再生の場合はここでループを終了
+            if not self.should_loop:
                 break
         
-        self.is_playing = False
+        self._finish_playback(stop_event)
+    
+    def _finish_playback(self, stop_event: threading.Event):
+        # 既に次の再生が始まっていれば状態を変えない
+        if stop_event is self._stop_event:
+            self.is_playing = False
     
     def stop_alarm(self):
         """アラーム音声を停止"""
         self.should_loop = False
         self.is_playing = False
+        self._stop_event.set()
         
         if self.current_process:
             try:
@@ -0,0 +1,91 @@
+import math
+import os
+import sys
+import tempfile
+import threading
+import wave
+from array import array
+from typing import Dict, List, Tuple
+from .pcm_stream import PcmClip
+
+
+SAMPLE_RATE = 22050
+WAVETABLE_SIZE = 2048
+AMPLITUDE = 0.8
+FADE_SECONDS = 0.005  # 音の始まりと終わりのクリックノイズを防ぐ
+FALLBACK_TONE = "beep"  # 音声ファイルがないときに鳴らす音
+
+# 1周期分の正弦波（起動時に一度だけ計算する）
+WAVETABLE = array("h", (int(32767 * math.sin(2 * math.pi * i / WAVETABLE_SIZE)) for i in range(WAVETABLE_SIZE)))
+
+# 音の並び: (開始周波数, 終了周波数, 秒数, 減衰の速さ)。周波数0は無音
+ToneSegment = Tuple[float, float, float, float]
+_BEEP: List[ToneSegment] = [(880, 880, 0.15, 0), (0, 0, 0.1, 0)]
+TONE_PATTERNS: Dict[str, List[ToneSegment]] = {
+    "beep": _BEEP * 3 + [(0, 0, 0.5, 0)],
+    "sweep": [(440, 1320, 0.8, 0), (0, 0, 0.2, 0)],
+    "chime": [(1318.5, 1318.5, 0.45, 5), (1046.5, 1046.5, 0.45, 5), (784, 784, 0.9, 3), (0, 0, 0.4, 0)],
+}
+
+
+def _render_segment(samples: array, start_freq: float, end_freq: float, seconds: float, decay: float):
+    count = int(SAMPLE_RATE * seconds)
+    if start_freq <= 0:
+        samples.frombytes(bytes(count * samples.itemsize))
+        return
+    
+    fade = max(1, int(SAMPLE_RATE * FADE_SECONDS))
+    table = WAVETABLE
+    phase = 0.0
+    for i in range(count):
+        frequency = start_freq + (end_freq - start_freq) * i / count
+        envelope = AMPLITUDE * math.exp(-decay * i / SAMPLE_RATE)
+        if i < fade:
+            envelope *= i / fade
+        elif count - i < fade:
+            envelope *= (count - i) / fade
+        samples.append(int(table[int(phase) % WAVETABLE_SIZE] * envelope))
+        phase += frequency * WAVETABLE_SIZE / SAMPLE_RATE
+
+
+_clips: Dict[str, PcmClip] = {}
+_tone_files: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def synthesize_tone(pattern: str) -> PcmClip:
+    """ウェーブテーブルから合成したアラーム音（16bitモノラル、パターンごとに一度だけ計算する）"""
+    if pattern not in TONE_PATTERNS:
+        pattern = FALLBACK_TONE
+    
+    with _lock:
+        clip = _clips.get(pattern)
+        if clip is None:
+            samples = array("h")
+            for segment in TONE_PATTERNS[pattern]:
+                _render_segment(samples, *segment)
+            if sys.byteorder == "big":
+                samples.byteswap()
+            clip = _clips[pattern] = PcmClip(
+                frames=samples.tobytes(), nchannels=1, sampwidth=2, framerate=SAMPLE_RATE
+            )
+        return clip
+
+
+def tone_file(pattern: str) -> str:
+    """ストリーミングできない環境向けに、合成音を一時WAVファイルとして書き出す（一度だけ）"""
+    clip = synthesize_tone(pattern)
+    with _lock:
+        path = _tone_files.get(pattern)
+        if path and os.path.exists(path):
+            return path
+        
+        fd, path = tempfile.mkstemp(prefix=f"alearm-{pattern}-", suffix=".wav")
+        with os.fdopen(fd, 'wb') as f:
+            with wave.open(f, 'wb') as wav:
+                wav.setnchannels(clip.nchannels)
+                wav.setsampwidth(clip.sampwidth)
+                wav.setframerate(clip.framerate)
+                wav.writeframes(clip.frames)
+        _tone_files[pattern] = path
+        return path
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""複数のテストで使うアラーム・問題セット・WAVファイルの作成"""
+import json
+import os
+import struct
+import sys
+import wave
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.alarm import Alarm, SoundConfig, SnoozeConfig
+
+
+def make_alarm(alarm_id: str, time: str = "07:00", days=None, enabled: bool = True) -> Alarm:
+    return Alarm(
+        id=alarm_id,
+        enabled=enabled,
+        time=time,
+        days=days or ["monday"],
+        label=alarm_id,
+        problem_sets=["math"],
+        difficulty="easy",
+        sound=SoundConfig(file="assets/sounds/alarm_default.wav", volume=0.8, loop=True),
+        snooze=SnoozeConfig(enabled=False, duration=300, max_count=3)
+    )
+
+
+def quiz_problem(problem_id: str, difficulty: str = "easy", category: str = "math") -> dict:
+    return {
+        "id": problem_id,
+        "type": "quiz",
+        "category": category,
+        "title": f"問題 {problem_id}",
+        "difficulty": difficulty,
+        "content": {
+            "question": {"type": "text", "text": f"{problem_id} の問題文"},
+            "options": [
+                {"id": "a", "type": "text", "content": "正解"},
+                {"id": "b", "type": "text", "content": "不正解"}
+            ],
+            "correct_answers": ["a"]
+        }
+    }
+
+
+def write_set(problems_dir: str, set_name: str, problems: list) -> str:
+    """problems_dir/quiz/<set_name>.json に問題セットを書き込み、そのパスを返す"""
+    path = os.path.join(problems_dir, "quiz", f"{set_name}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(problems, f, ensure_ascii=False)
+    return path
+
+
+def write_wav(path: str, samples=(0, 1000, -1000, 2000), framerate: int = 8000):
+    """16bitモノラルのWAVファイルを書き込む"""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(framerate)
+        wav.writeframes(struct.pack(f'<{len(samples)}h', *samples))
@@ -85,8 +85,7 @@ class TestAlarmIntegration(unittest.TestCase):
                 # 検証: アラーム状態が正しく設定されたか
                 self.assertTrue(alarm_app.alarm_triggered)
     
-    @patch('utils.storage.AlarmStorage')
-    def test_alarm_scheduler_integration(self, mock_storage):
+    def test_alarm_scheduler_integration(self):
         """AlarmSchedulerの統合テスト"""
         # ストレージのモック設定
         test_alarm = Alarm(
@@ -94,7 +93,7 @@ class TestAlarmIntegration(unittest.TestCase):
             time=datetime.now().strftime("%H:%M"),  # 現在時刻
             label="スケジューラーテスト",
             enabled=True,
-            days=[datetime.now().strftime("%A")],  # 今日
+            days=[datetime.now().strftime("%A").lower()],  # 今日
             problem_sets=["test"],
             difficulty="medium",
             sound=SoundConfig(file="test.wav", volume=0.5, loop=True),
@@ -102,30 +101,29 @@ class TestAlarmIntegration(unittest.TestCase):
         )
         
         mock_storage_instance = Mock()
+        mock_storage_instance.alarms_file = os.path.join("storage", "alarms.json")
+        mock_storage_instance.companion_files = []
         mock_storage_instance.load_alarms.return_value = [test_alarm]
         mock_storage_instance.save_alarm = Mock()
-        mock_storage.return_value = mock_storage_instance
         
         # トリガーコールバックのモック
         trigger_callback = Mock()
         
-        # AlarmSchedulerを作成
-        scheduler = AlarmScheduler(on_alarm_trigger=trigger_callback)
-        scheduler.check_interval = 0.1  # 高速チェックに設定
+        # AlarmSchedulerを作成（分の切り替わり直後でも発火するよう許容範囲を広げる）
+        scheduler = AlarmScheduler(on_alarm_trigger=trigger_callback, alarm_storage=mock_storage_instance)
+        scheduler.late_tolerance = 90
         
         try:
-            # モックでshould_triggerを常にTrueにする
-            with patch.object(test_alarm, 'should_trigger', return_value=True):
-                scheduler.start()
-                
-                # 少し待機してアラームが発火するのを待つ
-                time.sleep(0.3)
-                
-                # 検証: トリガーが呼ばれたか
-                trigger_callback.assert_called()
-                call_args = trigger_callback.call_args[0]
-                triggered_alarm = call_args[0]
-                self.assertEqual(triggered_alarm.id, "scheduler_test")
+            scheduler.start()
+            
+            # 少し待機してアラームが発火するのを待つ
+            time.sleep(0.3)
+            
+            # 検証: トリガーが呼ばれたか
+            trigger_callback.assert_called()
+            call_args = trigger_callback.call_args[0]
+            triggered_alarm = call_args[0]
+            self.assertEqual(triggered_alarm.id, "scheduler_test")
                 
         finally:
             scheduler.stop()
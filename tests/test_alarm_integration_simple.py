@@ -90,7 +90,7 @@ class TestAlarmFlowSimple(unittest.TestCase):
             
             # 検証
             self.assertTrue(app.alarm_triggered)
-            self.assertEqual(result['problem_sets'], ["basic"])
+            self.assertEqual(result['problem_sets'], ("basic",))
             self.assertEqual(result['difficulty'], "easy")
             self.assertEqual(result['sound_config']['file'], "assets/sounds/alarm_default.wav")
             self.assertEqual(result['sound_config']['volume'], 0.8)
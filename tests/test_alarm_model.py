@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import pickle
+import sys
+from dataclasses import replace
+from datetime import datetime
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.alarm import AlarmSchedule, find_next_alarm
+from tests.fixtures import make_alarm
+
+
+class TestAlarmSchedule(unittest.TestCase):
+    def test_compile(self):
+        """曜日ビットマスクと分数に変換される"""
+        schedule = AlarmSchedule.compile("07:30", ["monday", "Wednesday"])
+        self.assertEqual(schedule.day_mask, 0b0000101)
+        self.assertEqual(schedule.minute_of_day, 7 * 60 + 30)
+        self.assertEqual(schedule.week_minutes, (450, 2 * 1440 + 450))
+    
+    def test_alarm_is_compact_and_picklable(self):
+        """アラームは__dict__を持たず、pickleで復元しても同じ内容になる"""
+        alarm = make_alarm("a", "07:30", ["monday"])
+        alarm.schedule
+        
+        self.assertFalse(hasattr(alarm, "__dict__"))
+        self.assertEqual(alarm.days, ("monday",))
+        restored = pickle.loads(pickle.dumps(alarm))
+        self.assertEqual(restored, alarm)
+        self.assertEqual(restored.schedule, alarm.schedule)
+    
+    def test_invalid_time(self):
+        """不正な時刻は例外になる"""
+        with self.assertRaises(ValueError):
+            AlarmSchedule.compile("25:00", ["monday"])
+    
+    def test_schedule_recompiled_on_change(self):
+        """時刻や曜日を変更したアラームではスケジュールが再計算される"""
+        alarm = make_alarm("a", "07:30", ["monday"])
+        self.assertEqual(alarm.schedule.minute_of_day, 450)
+        alarm = replace(alarm, time="08:00", days=["tuesday"])
+        self.assertEqual(alarm.schedule.minute_of_day, 480)
+        self.assertEqual(alarm.schedule.day_mask, 0b10)
+
+
+class TestNextOccurrence(unittest.TestCase):
+    def test_same_day_later_time(self):
+        """当日の後の時刻が選ばれる"""
+        alarm = make_alarm("a", "07:30", ["monday"])
+        after = datetime(2025, 7, 7, 6, 0)  # 月曜日
+        self.assertEqual(alarm.next_occurrence(after), datetime(2025, 7, 7, 7, 30))
+    
+    def test_skips_to_next_matching_weekday(self):
+        """曜日が合わない場合は次の該当曜日まで進む"""
+        alarm = make_alarm("a", "07:30", ["wednesday"])
+        after = datetime(2025, 7, 7, 8, 0)  # 月曜日
+        self.assertEqual(alarm.next_occurrence(after), datetime(2025, 7, 9, 7, 30))
+    
+    def test_wraps_to_next_week(self):
+        """週末を越えて翌週の曜日に進む"""
+        alarm = make_alarm("a", "07:30", ["monday"])
+        self.assertEqual(alarm.next_occurrence(datetime(2025, 7, 7, 7, 30)), datetime(2025, 7, 14, 7, 30))
+        self.assertEqual(alarm.next_occurrence(datetime(2025, 7, 13, 23, 59)), datetime(2025, 7, 14, 7, 30))
+    
+    def test_disabled_alarm(self):
+        """無効なアラームは発火しない"""
+        alarm = make_alarm("a", "07:30", ["monday"], enabled=False)
+        self.assertIsNone(alarm.next_occurrence(datetime(2025, 7, 7, 6, 0)))
+    
+    def test_should_trigger(self):
+        """発火判定は前後30秒以内"""
+        alarm = make_alarm("a", "07:30", ["monday"])
+        self.assertTrue(alarm.should_trigger(datetime(2025, 7, 7, 7, 30, 20)))
+        self.assertFalse(alarm.should_trigger(datetime(2025, 7, 7, 7, 31, 0)))
+        self.assertFalse(alarm.should_trigger(datetime(2025, 7, 8, 7, 30, 0)))
+    
+    def test_find_next_alarm_considers_weekdays(self):
+        """時刻の文字列順ではなく曜日を考慮して次のアラームを選ぶ"""
+        early_tomorrow = make_alarm("early", "06:00", ["tuesday"])
+        later_today = make_alarm("later", "22:00", ["monday"])
+        found = find_next_alarm([early_tomorrow, later_today], datetime(2025, 7, 7, 12, 0))
+        self.assertEqual(found, (later_today, datetime(2025, 7, 7, 22, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
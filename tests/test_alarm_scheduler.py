@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import Mock
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alarm_manager import AlarmScheduler
+from tests.fixtures import make_alarm
+
+
+class TestAlarmScheduler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = Mock()
+        self.storage.alarms_file = os.path.join(self.temp_dir, "alarms.json")
+        self.storage.companion_files = []
+        self.storage.load_alarms.return_value = []
+        self.fired = threading.Event()
+        self.callback = Mock(side_effect=lambda alarm: self.fired.set())
+        self.scheduler = AlarmScheduler(on_alarm_trigger=self.callback, alarm_storage=self.storage)
+    
+    def tearDown(self):
+        self.scheduler.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_heap_orders_by_deadline(self):
+        """最も近い発火時刻が先頭になる"""
+        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+        self.scheduler.alarms = [
+            make_alarm("late", "09:00", all_days),
+            make_alarm("early", "07:00", all_days),
+        ]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 0))
+        self.assertEqual(self.scheduler.next_deadline(), datetime(2025, 7, 7, 7, 0))
+    
+    def test_fires_once_per_occurrence(self):
+        """同じ発火時刻では一度だけ発火する"""
+        alarm = make_alarm("a", "07:00", ["monday"])
+        self.scheduler.alarms = [alarm]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 59))
+        
+        self.scheduler._fire_due_alarms(datetime(2025, 7, 7, 7, 0, 1))
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 7, 0, 5))
+        self.scheduler._fire_due_alarms(datetime(2025, 7, 7, 7, 0, 6))
+        
+        self.callback.assert_called_once_with(alarm)
+        self.assertEqual(self.scheduler.next_deadline(), datetime(2025, 7, 14, 7, 0))
+    
+    def test_skips_stale_deadline(self):
+        """大幅に遅れた発火時刻はスキップする"""
+        alarm = make_alarm("a", "07:00", ["monday"])
+        self.scheduler.alarms = [alarm]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 59))
+        
+        self.scheduler._fire_due_alarms(datetime(2025, 7, 7, 9, 0))
+        
+        self.callback.assert_not_called()
+    
+    def test_notify_wakes_scheduler(self):
+        """変更通知で待機中のスケジューラーが即座に再計算する"""
+        self.scheduler.start()
+        
+        soon = datetime.now() + timedelta(seconds=1)
+        alarm = make_alarm("soon", soon.strftime("%H:%M"), [soon.strftime("%A").lower()])
+        self.storage.load_alarms.return_value = [alarm]
+        self.scheduler.late_tolerance = 90
+        self.scheduler.notify_alarms_changed()
+        
+        self.assertTrue(self.fired.wait(timeout=5))
+        self.callback.assert_called_once_with(alarm)
+    
+    def test_reload_only_changed_alarms(self):
+        """変更されたアラームだけが差し替えられ、発火時刻が再計算される"""
+        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+        kept = make_alarm("kept", "07:00", all_days)
+        edited = make_alarm("edited", "08:00", all_days)
+        self.storage.load_alarms.return_value = [kept, edited]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 0), self.scheduler.reload_alarms())
+        
+        self.storage.load_alarms.return_value = [
+            make_alarm("kept", "07:00", all_days),
+            make_alarm("edited", "06:30", all_days),
+        ]
+        changed_ids = self.scheduler.reload_alarms()
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 0), changed_ids)
+        
+        self.assertEqual(changed_ids, ["edited"])
+        self.assertIs(self.scheduler.alarms[0], kept)
+        self.assertEqual(self.scheduler.next_deadline(), datetime(2025, 7, 7, 6, 30))
+        
+        self.storage.load_alarms.return_value = [make_alarm("kept", "07:00", all_days)]
+        changed_ids = self.scheduler.reload_alarms()
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 0), changed_ids)
+        
+        self.assertEqual(changed_ids, ["edited"])
+        self.assertEqual(self.scheduler.next_deadline(), datetime(2025, 7, 7, 7, 0))
+    
+    
+    def test_warmup_before_deadline(self):
+        """発火時刻の warmup_lead 秒前に一度だけ準備を依頼する"""
+        warmup = Mock()
+        self.scheduler.on_alarm_warmup = warmup
+        self.scheduler.warmup_lead = 60
+        alarm = make_alarm("a", "07:00", ["monday"])
+        self.scheduler.alarms = [alarm]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 50))
+        
+        self.scheduler._warm_up_due_alarms(datetime(2025, 7, 7, 6, 58, 59))
+        warmup.assert_not_called()
+        self.assertEqual(self.scheduler._seconds_until_next(datetime(2025, 7, 7, 6, 58, 30)), 30)
+        
+        self.scheduler._warm_up_due_alarms(datetime(2025, 7, 7, 6, 59, 0))
+        self.scheduler._warm_up_due_alarms(datetime(2025, 7, 7, 6, 59, 30))
+        self.scheduler.wait_for_warmups(timeout=5)
+        warmup.assert_called_once_with(alarm, datetime(2025, 7, 7, 7, 0))
+        self.assertEqual(self.scheduler._seconds_until_next(datetime(2025, 7, 7, 6, 59, 30)), 30)
+    
+    def test_warmup_error_does_not_block_firing(self):
+        """準備に失敗してもアラームは発火する"""
+        self.scheduler.on_alarm_warmup = Mock(side_effect=RuntimeError("boom"))
+        alarm = make_alarm("a", "07:00", ["monday"])
+        self.scheduler.alarms = [alarm]
+        self.scheduler._rebuild_schedule(datetime(2025, 7, 7, 6, 50))
+        
+        self.scheduler._warm_up_due_alarms(datetime(2025, 7, 7, 6, 59, 30))
+        self.scheduler.wait_for_warmups(timeout=5)
+        self.scheduler._fire_due_alarms(datetime(2025, 7, 7, 7, 0, 1))
+        
+        self.callback.assert_called_once_with(alarm)
+    
+    def test_slow_warmup_does_not_delay_firing(self):
+        """準備が発火時刻を過ぎても終わらない場合も、アラームは時刻どおりに発火する"""
+        release = threading.Event()
+        warmup_started = threading.Event()
+        warmup_finished = threading.Event()
+        
+        def slow_warmup(alarm, deadline):
+            warmup_started.set()
+            release.wait(timeout=5)
+            warmup_finished.set()
+        
+        clock = Mock()
+        clock.utc_offset.return_value = timedelta(hours=9)
+        self.scheduler.clock = clock
+        self.scheduler.on_alarm_warmup = slow_warmup
+        self.scheduler.warmup_lead = 100
+        alarm = make_alarm("a", "07:00", ["monday"])
+        self.storage.load_alarms.return_value = [alarm]
+        try:
+            clock.now.return_value = datetime(2025, 7, 7, 6, 58, 20)
+            self.scheduler.run_pending()
+            self.assertTrue(warmup_started.wait(timeout=5))
+            
+            clock.now.return_value = datetime(2025, 7, 7, 7, 0, 1)
+            self.scheduler.run_pending()
+            self.callback.assert_called_once_with(alarm)
+            self.assertFalse(warmup_finished.is_set())
+        finally:
+            release.set()
+            self.scheduler.wait_for_warmups(timeout=5)
+    
+    def test_fires_alarm_skipped_by_dst_start(self):
+        """夏時間の開始で飛ばされた時刻のアラームは、時計が進んだ直後に鳴らす"""
+        clock = Mock()
+        clock.now.return_value = datetime(2025, 3, 9, 3, 0, 30)
+        clock.utc_offset.side_effect = [timedelta(hours=-5), timedelta(hours=-4)]
+        self.scheduler.clock = clock
+        alarm = make_alarm("a", "02:30", ["sunday"])
+        self.scheduler.alarms = [alarm]
+        self.scheduler._rebuild_schedule(datetime(2025, 3, 9, 1, 59))
+        self.scheduler._clock_shift()
+        
+        self.scheduler._fire_due_alarms(clock.now(), self.scheduler._clock_shift())
+        
+        self.callback.assert_called_once_with(alarm)
+
+
+if __name__ == '__main__':
+    unittest.main()
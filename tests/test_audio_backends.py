@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import system_audio
+from utils.audio_backends import PlayerBackend, probe_backends
+from utils.pcm_stream import PcmClip
+from utils.system_audio import SystemAudioController
+
+
+class TestPlayerBackends(unittest.TestCase):
+    @patch('utils.audio_backends.shutil.which')
+    def test_probe_backends(self, mock_which):
+        """プラットフォームごとの候補のうち、見つかったコマンドだけを使う"""
+        mock_which.side_effect = lambda name: "/usr/bin/paplay" if name == "paplay" else None
+        
+        backends = probe_backends("Linux")
+        
+        self.assertEqual(backends, [PlayerBackend(name="paplay", executable="/usr/bin/paplay")])
+        self.assertEqual(probe_backends("Plan9"), [])
+    
+    def test_stream_commands(self):
+        """aplay/paplayには生のPCMを標準入力から渡す"""
+        clip = PcmClip(frames=b"", nchannels=2, sampwidth=2, framerate=48000)
+        
+        self.assertEqual(
+            PlayerBackend("aplay", "aplay").stream_command(clip),
+            ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "2", "-r", "48000", "-"]
+        )
+        self.assertEqual(
+            PlayerBackend("paplay", "paplay").stream_command(clip),
+            ["paplay", "--raw", "--format=s16le", "--channels=2", "--rate=48000"]
+        )
+        self.assertIsNone(PlayerBackend("afplay", "afplay").stream_command(clip))
+    
+    def test_file_command_volume(self):
+        self.assertEqual(PlayerBackend("paplay", "paplay").file_command("a.wav", 0.5), ["paplay", "--volume=32768", "a.wav"])
+        self.assertEqual(PlayerBackend("afplay", "afplay").file_command("a.wav", 0.5), ["afplay", "-v", "0.50", "a.wav"])
+
+
+class TestPlaybackSupervision(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sound_file = os.path.join(self.temp_dir, "alarm.mp3")
+        with open(self.sound_file, 'wb') as f:
+            f.write(b"not decodable")
+        
+        # 起動してすぐに失敗するプレーヤー（デバイス使用中など）
+        self.backend = Mock(spec=PlayerBackend)
+        self.backend.name = "afplay"
+        self.backend.file_command.return_value = ["sh", "-c", "exit 1"]
+        self.controller = SystemAudioController(backends=[self.backend])
+        
+        backoff_patch = patch.object(system_audio, 'BACKOFF_INITIAL', 0.02)
+        backoff_patch.start()
+        self.addCleanup(backoff_patch.stop)
+    
+    def tearDown(self):
+        self.controller.stop_alarm()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_failing_player_backs_off(self):
+        """すぐに終了するプレーヤーを連続で起動し直さない"""
+        with patch('subprocess.Popen', wraps=system_audio.subprocess.Popen) as mock_popen:
+            self.assertTrue(self.controller.play_alarm({"file": self.sound_file, "loop": True}))
+            time.sleep(0.5)
+            
+            thread = self.controller.loop_thread
+            started = time.monotonic()
+            self.controller.stop_alarm()
+            thread.join(timeout=5)
+        
+        # 0.02, 0.04, 0.08, 0.16 ... 秒と間隔が空くので、0.5秒間の起動は数回に収まる
+        self.assertLessEqual(mock_popen.call_count, 6)
+        self.assertGreaterEqual(mock_popen.call_count, 3)
+        self.assertLess(time.monotonic() - started, 1.0)
+        
+        health = self.controller.health()
+        self.assertFalse(health["healthy"])
+        self.assertGreaterEqual(health["consecutive_failures"], 3)
+        self.assertIn("afplay", health["last_error"])
+    
+    def test_no_backend(self):
+        """再生コマンドがなければ再生せず、状態に反映する"""
+        controller = SystemAudioController(backends=[])
+        
+        self.assertFalse(controller.play_alarm({"file": self.sound_file, "loop": True}))
+        self.assertFalse(controller.health()["available"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import struct
+import tempfile
+import threading
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import audio_cache
+from utils.audio_cache import AudioAssetCache
+from utils.pcm_stream import load_wav
+from tests.fixtures import write_wav
+
+
+class TestAudioAssetCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.cache = AudioAssetCache(self.cache_dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_wav_is_loaded_directly(self):
+        """WAVは変換せずにそのまま使う"""
+        path = os.path.join(self.temp_dir, "alarm.wav")
+        write_wav(path)
+        
+        clip = self.cache.load(path)
+        
+        self.assertEqual(clip.frames, load_wav(path).frames)
+        self.assertIs(self.cache.load(path), clip)
+        self.assertFalse(os.path.exists(self.cache_dir))
+    
+    @unittest.skipIf(audio_cache.aifc is None, "aifcモジュールがない")
+    def test_aiff_is_converted(self):
+        """AIFFはリトルエンディアンのPCMに変換して保存する"""
+        path = os.path.join(self.temp_dir, "alarm.aiff")
+        with audio_cache.aifc.open(path, 'wb') as aiff:
+            aiff.setnchannels(1)
+            aiff.setsampwidth(2)
+            aiff.setframerate(8000)
+            aiff.writeframes(struct.pack('>3h', 1, -2, 300))
+        
+        clip = self.cache.load(path)
+        
+        self.assertEqual(struct.unpack('<3h', clip.frames), (1, -2, 300))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+    
+    def test_transcoded_once_and_reused_by_content_hash(self):
+        """外部デコーダーでの変換は一度だけで、以降は保存済みのPCMを読む"""
+        path = os.path.join(self.temp_dir, "alarm.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"fake mp3 data")
+        
+        with patch.object(audio_cache, '_available_decoders', return_value=["ffmpeg"]), \
+                patch.object(audio_cache, '_run_decoder',
+                             side_effect=lambda decoder, source, output: write_wav(output)) as mock_decoder:
+            first = self.cache.load(path)
+            second = AudioAssetCache(self.cache_dir).load(path)
+        
+        mock_decoder.assert_called_once()
+        self.assertEqual(first.frames, second.frames)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+    
+    def test_failed_decoder_falls_back_to_next(self):
+        """デコーダーが失敗したら次のデコーダーを試す"""
+        path = os.path.join(self.temp_dir, "alarm.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"fake mp3 data")
+        
+        def decode(decoder, source, output):
+            if decoder == "ffmpeg":
+                raise OSError("ffmpeg failed")
+            write_wav(output)
+        
+        with patch.object(audio_cache, '_available_decoders', return_value=["ffmpeg", "mpg123"]), \
+                patch.object(audio_cache, '_run_decoder', side_effect=decode):
+            self.assertIsNotNone(self.cache.load(path))
+        
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+    
+    def test_no_decoder(self):
+        """デコーダーがなければNone"""
+        path = os.path.join(self.temp_dir, "alarm.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"fake mp3 data")
+        
+        with patch.object(audio_cache, '_available_decoders', return_value=[]):
+            self.assertIsNone(self.cache.load(path))
+
+    
+    def test_decode_does_not_block_other_assets(self):
+        """時間のかかる変換中も別の音声は読み込め、同じ音声の同時要求は1回だけ変換する"""
+        slow_path = os.path.join(self.temp_dir, "slow.mp3")
+        with open(slow_path, 'wb') as f:
+            f.write(b"fake mp3 data")
+        wav_path = os.path.join(self.temp_dir, "alarm.wav")
+        write_wav(wav_path)
+        
+        decoding = threading.Event()
+        release = threading.Event()
+        
+        def slow_decode(decoder, source, output):
+            decoding.set()
+            release.wait(timeout=5)
+            write_wav(output)
+        
+        results = []
+        with patch.object(audio_cache, '_available_decoders', return_value=["ffmpeg"]), \
+                patch.object(audio_cache, '_run_decoder', side_effect=slow_decode) as mock_decoder:
+            threads = [threading.Thread(target=lambda: results.append(self.cache.load(slow_path))) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            try:
+                self.assertTrue(decoding.wait(timeout=2))
+                self.assertIsNotNone(self.cache.load(wav_path))
+            finally:
+                release.set()
+                for thread in threads:
+                    thread.join()
+        
+        mock_decoder.assert_called_once()
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add repository root to path for importing benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import date
+
+from benchmarks import fire_latency, loader_throughput, memory_budget, soak
+from benchmarks.problem_bank import write_problem_set
+from benchmarks.harness import percentile, summarize
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_percentile(self):
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 90), 4.6)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+        self.assertEqual(summarize([3.0, 1.0, 2.0])["max"], 3.0)
+    
+    def test_fire_latency(self):
+        """発火から画面表示・最初の音声サンプルまでを段階ごとに計測する"""
+        modes = fire_latency.run(iterations=2)
+        
+        for mode in ("cold", "warm"):
+            stages = modes[mode]
+            for stage in ("deadline_to_trigger", "deadline_to_display", "deadline_to_first_audio"):
+                self.assertEqual(stages[stage]["count"], 2)
+                self.assertGreaterEqual(stages[stage]["p50"], 0)
+        self.assertIn("warmup_margin", modes["warm"])
+    
+    def test_soak_across_dst_start(self):
+        """夏時間の開始・実行中の編集をまたいでも、すべての発火時刻で一度だけ鳴る"""
+        results = soak.run(date(2025, 3, 7), days=4)
+        
+        self.assertTrue(results["exactly_once"], results)
+        self.assertEqual(results["dst_gap_fires"], 1)
+        self.assertEqual(results["should_trigger_mismatches"], [])
+        self.assertEqual(len(results["per_day"]), 4)
+        self.assertEqual(results["snooze_timers"]["started"], results["snooze_timers"]["returned"])
+    
+    def test_soak_across_dst_end(self):
+        """夏時間の終了で2回現れる時刻でも二重に鳴らない"""
+        results = soak.run(date(2025, 10, 31), days=4)
+        
+        self.assertTrue(results["exactly_once"], results)
+        self.assertEqual(results["expected_occurrences"], results["fires"])
+    
+    def test_memory_budget(self):
+        """段階ごとにピーク・保持メモリを計測し、上限を超えた項目を報告する"""
+        results = memory_budget.measure(problems=30, alarms=5, top=3)
+        
+        self.assertEqual(tuple(results["stages"]), memory_budget.STAGES)
+        for stage in results["stages"].values():
+            self.assertGreaterEqual(stage["peak_bytes"], stage["retained_bytes"])
+            self.assertLessEqual(len(stage["top_modules"]), 3)
+        self.assertIn("models.problem", results["stages"]["problem_loader"]["top_modules"])
+        total = results["total"]
+        self.assertGreaterEqual(total["peak_bytes"], total["retained_bytes"])
+        
+        self.assertEqual(memory_budget.check_budgets(results, {"total.peak": 1024}), [])
+        violations = memory_budget.check_budgets(results, {"problem_loader.peak": 0.001, "total.retained": 1024})
+        self.assertEqual([v["budget"] for v in violations], ["problem_loader.peak"])
+
+
+
+class TestProblemBank(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_generated_problems_are_valid(self):
+        """生成した問題はすべて検証を通り、同じseedなら同じ内容になる"""
+        from question_loader import ProblemLoader, ProblemRepository
+        from utils.problem_snapshot import ProblemSnapshotCache
+        
+        path = write_problem_set(self.temp_dir, 300, seed=1, set_name="bank")
+        loader = ProblemLoader(self.temp_dir, repository=ProblemRepository(),
+                               snapshot_cache=ProblemSnapshotCache(os.path.join(self.temp_dir, "cache")))
+        
+        problems = loader.load_problem_set("bank")
+        self.assertEqual(len(problems), 300)
+        self.assertEqual(len({problem.id for problem in problems}), 300)
+        self.assertEqual({problem.difficulty.value for problem in problems}, {"easy", "medium", "hard"})
+        
+        with open(path, 'rb') as f:
+            content = f.read()
+        with open(write_problem_set(self.temp_dir, 300, seed=1, set_name="bank"), 'rb') as f:
+            self.assertEqual(f.read(), content)
+    
+    def test_loader_throughput(self):
+        results = loader_throughput.run([200], repeat=1)
+        
+        self.assertEqual(results[0]["problems"], 200)
+        self.assertGreater(results[0]["memory"]["load_problem_set"]["peak_bytes"], 0)
+        self.assertEqual(results[0]["start_session"]["pack_all_loaded"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
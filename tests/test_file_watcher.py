@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.file_watcher import FileWatcher
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "alarms.json")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("[]")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_has_changed_by_stat(self):
+        """stat比較でファイルの変更を検知する"""
+        watcher = FileWatcher(self.path)
+        self.assertFalse(watcher.has_changed())
+        
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('[{"id": "alarm_1"}]')
+        
+        self.assertTrue(watcher.has_changed())
+        self.assertFalse(watcher.has_changed())
+    
+    def test_detects_replacement_and_deletion(self):
+        """別ファイルによる置き換えや削除も検知する"""
+        watcher = FileWatcher(self.path)
+        
+        replacement = os.path.join(self.temp_dir, "alarms.json.tmp")
+        with open(replacement, 'w', encoding='utf-8') as f:
+            f.write("[]")
+        os.replace(replacement, self.path)
+        self.assertTrue(watcher.has_changed())
+        
+        os.remove(self.path)
+        self.assertTrue(watcher.has_changed())
+    
+    def test_inotify_callback(self):
+        """inotifyが使える環境では変更時にコールバックが呼ばれる"""
+        changed = threading.Event()
+        watcher = FileWatcher(self.path, on_change=changed.set)
+        watcher.start()
+        try:
+            if not watcher.uses_inotify:
+                self.skipTest("inotifyが利用できない環境")
+            
+            # 監視対象外のファイルは無視される
+            with open(os.path.join(self.temp_dir, "settings.json"), 'w', encoding='utf-8') as f:
+                f.write("{}")
+            self.assertFalse(changed.wait(timeout=0.2))
+            
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write('[{"id": "alarm_1"}]')
+            self.assertTrue(changed.wait(timeout=2))
+        finally:
+            watcher.stop()
+    
+    def test_companion_written_in_place(self):
+        """付随ファイルは開いたままの書き込みでも検知する"""
+        companion = self.path + "-wal"
+        changed = threading.Event()
+        watcher = FileWatcher(self.path, on_change=changed.set, companions=[companion])
+        watcher.start()
+        try:
+            with open(companion, 'wb') as f:
+                f.write(b"commit 1")
+                f.flush()
+                self.assertTrue(watcher.has_changed() or changed.wait(timeout=2))
+                
+                if watcher.uses_inotify:
+                    changed.clear()
+                    f.write(b"commit 2")
+                    f.flush()
+                    self.assertTrue(changed.wait(timeout=2))
+        finally:
+            watcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
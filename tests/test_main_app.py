@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+import shutil
+import tempfile
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import flet as ft
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import main
+from ui.settings_view import SettingsView
+from utils.storage import SettingsStorage
+from tests.fixtures import make_alarm
+
+
+DEADLINE = datetime(2025, 7, 7, 7, 0)
+
+
+class TestAlarmAppWarmup(unittest.TestCase):
+    def setUp(self):
+        self.page = Mock(spec=ft.Page)
+        self.page.overlay = []
+        self.page.clean = Mock()
+        self.page.add = Mock()
+        self.page.update = Mock()
+        
+        self.settings = Mock()
+        self.settings.load_settings.return_value = {"warmup_lead_seconds": 15}
+        patchers = [
+            patch.object(main, 'SettingsStorage', return_value=self.settings),
+            patch.object(main, 'AlarmManager'),
+            patch.object(main, 'MainView'),
+            patch.object(main, 'QuizView', side_effect=lambda **kwargs: Mock()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        self.app = main.AlarmApp(self.page)
+        self.manager = self.app.alarm_manager
+        self.manager.scheduler.late_tolerance = 30
+        self.manager.clock.now.return_value = DEADLINE - timedelta(seconds=60)
+    
+    def test_warmup_lead_from_settings(self):
+        """準備を始める時刻は設定の warmup_lead_seconds で決まる"""
+        self.assertEqual(main.AlarmManager.call_args.kwargs["warmup_lead"], 15)
+    
+    def test_warmed_view_is_reused(self):
+        """発火前に準備したQuizViewをそのまま表示する"""
+        alarm = make_alarm("a")
+        self.app._on_alarm_warmup(alarm, DEADLINE)
+        warmed_view = self.app._warmed_quizzes["a"][2]
+        warmed_view.prepare.assert_called_once_with(alarm.sound)
+        
+        self.manager.clock.now.return_value = DEADLINE
+        self.app._on_alarm_trigger(alarm)
+        
+        self.assertEqual(main.QuizView.call_count, 1)
+        self.assertEqual(self.app._warmed_quizzes, {})
+        warmed_view.start_alarm_sound.assert_called_once_with(alarm.sound)
+        self.page.add.assert_called_with(warmed_view.get_view.return_value)
+    
+    def test_edited_alarm_is_not_reused(self):
+        """準備後にアラームが編集されていたら画面を作り直す"""
+        self.app._on_alarm_warmup(make_alarm("a"), DEADLINE)
+        
+        self.manager.clock.now.return_value = DEADLINE
+        self.app._on_alarm_trigger(replace(make_alarm("a"), difficulty="hard"))
+        
+        self.assertEqual(main.QuizView.call_count, 2)
+        self.assertEqual(main.QuizView.call_args.kwargs["difficulty"], "hard")
+    
+    def test_expired_warmup_is_dropped(self):
+        """発火の許容時間を過ぎた準備は使わずに破棄する"""
+        alarm = make_alarm("a")
+        self.app._on_alarm_warmup(alarm, DEADLINE)
+        
+        self.manager.clock.now.return_value = DEADLINE + timedelta(seconds=31)
+        self.app._on_alarm_warmup(make_alarm("b"), DEADLINE + timedelta(minutes=1))
+        self.assertEqual(list(self.app._warmed_quizzes), ["b"])
+        
+        self.app._on_alarm_trigger(alarm)
+        self.assertEqual(main.QuizView.call_count, 3)
+    
+    def test_late_warmup_is_discarded(self):
+        """発火時刻を過ぎてから終わった準備は残さない"""
+        self.manager.clock.now.return_value = DEADLINE + timedelta(seconds=1)
+        self.app._on_alarm_warmup(make_alarm("a"), DEADLINE)
+        
+        self.assertEqual(self.app._warmed_quizzes, {})
+
+
+class TestSettingsView(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SettingsStorage(self.temp_dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_save_keeps_fields_not_on_screen(self):
+        """画面にない設定項目は保存しても消えない"""
+        self.storage.save_settings({"warmup_lead_seconds": 15, "default_volume": 0.5})
+        
+        with patch('ui.settings_view.SettingsStorage', return_value=self.storage):
+            view = SettingsView()
+        view.volume_slider.value = 0.3
+        view._save_settings(None)
+        
+        settings = self.storage.load_settings()
+        self.assertEqual(settings["warmup_lead_seconds"], 15)
+        self.assertEqual(settings["default_volume"], 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
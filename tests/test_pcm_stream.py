@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+import time
+import shutil
+import struct
+import subprocess
+import tempfile
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.audio_backends import PlayerBackend
+from utils.pcm_stream import GainStage, PcmClip, load_wav, scale_pcm
+from utils.tone_synth import FALLBACK_TONE, TONE_PATTERNS, synthesize_tone
+from utils.system_audio import SystemAudioController
+from tests.fixtures import write_wav
+
+
+class TestPcmStream(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.wav_path = os.path.join(self.temp_dir, "alarm.wav")
+        write_wav(self.wav_path, [i % 1000 for i in range(4410)], 44100)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_load_wav(self):
+        clip = load_wav(self.wav_path)
+        self.assertEqual((clip.nchannels, clip.sampwidth, clip.framerate), (1, 2, 44100))
+        self.assertEqual(len(clip.frames), 4410 * 2)
+        self.assertAlmostEqual(clip.duration, 0.1)
+        self.assertEqual(clip.chunk_bytes(0.05), 2205 * 2)
+    
+    def test_scale_pcm(self):
+        """符号付き16bitと符号なし8bitに音量を掛ける"""
+        data = struct.pack('<4h', 1000, -1000, 32767, -32768)
+        self.assertEqual(struct.unpack('<4h', scale_pcm(data, 2, 0.5)), (500, -500, 16383, -16384))
+        self.assertEqual(scale_pcm(data, 2, 1.0), data)
+        self.assertEqual(scale_pcm(bytes([0, 128, 255]), 1, 0.5), bytes([64, 128, 191]))
+    
+    def test_scale_pcm_without_audioop(self):
+        """audioopがない環境（Python 3.13以降）でも同じ結果になる"""
+        data = struct.pack('<6h', 1000, -1000, 32767, -32768, 7, -7)
+        with patch('utils.pcm_stream.audioop', None):
+            fallback = scale_pcm(data, 2, 0.3)
+            fallback_8bit = scale_pcm(bytes([0, 1, 128, 200, 255]), 1, 0.3)
+        self.assertEqual(scale_pcm(data, 2, 0.3), fallback)
+        self.assertEqual(scale_pcm(bytes([0, 1, 128, 200, 255]), 1, 0.3), fallback_8bit)
+    
+    def test_gain_stage_ramp(self):
+        """クレッシェンド中は音量が上がり、到達後は指定した音量になる"""
+        clip = PcmClip(frames=struct.pack('<10h', *([1000] * 10)), nchannels=1, sampwidth=2, framerate=10)
+        gain = GainStage(clip, volume=0.5, ramp_seconds=0.4)  # 4フレーム分
+        frames = memoryview(clip.frames)
+        
+        levels = []
+        for _ in range(2):
+            for offset in range(0, len(frames), 4):
+                levels.extend(struct.unpack('<2h', gain.process(offset, frames[offset:offset + 4])))
+        
+        self.assertEqual(levels[:4], [0, 0, 250, 250])
+        self.assertEqual(set(levels[4:]), {500})
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "ストリーミング再生はLinuxのみ")
+class TestSystemAudioStreaming(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.wav_path = os.path.join(self.temp_dir, "alarm.wav")
+        self.output_path = os.path.join(self.temp_dir, "output.raw")
+        write_wav(self.wav_path, [i % 1000 for i in range(4410)], 44100)
+        # 受け取ったPCMをファイルに書き出すだけのプレーヤー
+        backend = Mock(spec=PlayerBackend)
+        backend.name = "aplay"
+        backend.stream_command.return_value = ["sh", "-c", f"cat > '{self.output_path}'"]
+        self.controller = SystemAudioController(backends=[backend])
+    
+    def tearDown(self):
+        self.controller.stop_alarm()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_single_play_streams_whole_clip_once(self):
+        """単発再生ではPCMを一度だけ書き込む"""
+        with patch('subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            self.assertTrue(self.controller.play_alarm({"file": self.wav_path, "volume": 1.0, "loop": False}))
+            self.controller.loop_thread.join(timeout=5)
+        
+        self.assertEqual(mock_popen.call_count, 1)
+        with open(self.output_path, 'rb') as f:
+            self.assertEqual(f.read(), load_wav(self.wav_path).frames)
+    
+    def test_loop_uses_one_process_and_stops_immediately(self):
+        """ループ再生でもプレーヤーは1つだけで、停止はすぐに反映される"""
+        with patch('subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            self.controller.play_alarm({"file": self.wav_path, "loop": True})
+            
+            clip_size = len(load_wav(self.wav_path).frames)
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if os.path.exists(self.output_path) and os.path.getsize(self.output_path) > clip_size * 3:
+                    break
+                time.sleep(0.01)
+            
+            started = time.monotonic()
+            thread = self.controller.loop_thread
+            self.controller.stop_alarm()
+            thread.join(timeout=5)
+        
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(mock_popen.call_count, 1)
+        self.assertGreater(os.path.getsize(self.output_path), clip_size * 3)
+    
+    def test_volume_applied_to_stream(self):
+        """音量がプレーヤーに渡すPCMに反映される"""
+        self.controller.play_alarm({"file": self.wav_path, "volume": 0.5, "loop": False})
+        self.controller.loop_thread.join(timeout=5)
+        
+        with open(self.output_path, 'rb') as f:
+            self.assertEqual(f.read(), scale_pcm(load_wav(self.wav_path).frames, 2, 0.5))
+    
+    def test_tone_streams_without_file(self):
+        """合成音はファイルを読まずにメモリ上のPCMを流す"""
+        with patch('builtins.open', side_effect=AssertionError("ファイルを読んではいけない")):
+            self.assertTrue(self.controller.play_alarm({"tone": "chime", "volume": 1.0, "loop": False}))
+            self.controller.loop_thread.join(timeout=5)
+        
+        with open(self.output_path, 'rb') as f:
+            self.assertEqual(f.read(), synthesize_tone("chime").frames)
+    
+    def test_missing_file_falls_back_to_tone(self):
+        """音声ファイルがなくても合成音で鳴らす"""
+        missing = os.path.join(self.temp_dir, "missing.wav")
+        
+        self.assertTrue(self.controller.play_alarm({"file": missing, "volume": 1.0, "loop": False}))
+        self.controller.loop_thread.join(timeout=5)
+        
+        with open(self.output_path, 'rb') as f:
+            self.assertEqual(f.read(), synthesize_tone(FALLBACK_TONE).frames)
+        self.assertTrue(self.controller.prepare({"file": missing}))
+
+
+class TestToneSynth(unittest.TestCase):
+    def test_patterns(self):
+        """どのパターンも16bitモノラルで、無音ではない"""
+        for pattern in TONE_PATTERNS:
+            clip = synthesize_tone(pattern)
+            self.assertEqual((clip.nchannels, clip.sampwidth), (1, 2))
+            self.assertGreater(clip.duration, 0.5)
+            samples = struct.unpack(f'<{len(clip.frames) // 2}h', clip.frames)
+            self.assertGreater(max(samples), 10000)
+            self.assertLess(min(samples), -10000)
+    
+    def test_computed_once(self):
+        self.assertIs(synthesize_tone("sweep"), synthesize_tone("sweep"))
+        # 不明なパターンは既定の音にする
+        self.assertIs(synthesize_tone("unknown"), synthesize_tone(FALLBACK_TONE))
+
+
+if __name__ == '__main__':
+    unittest.main()
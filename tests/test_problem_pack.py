@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import compile_problems
+from problem_pack import ProblemPack, open_problem_pack, write_problem_pack
+from utils.problem_snapshot import ProblemSnapshotCache
+from question_loader import ProblemLoader, ProblemRepository
+from models.problem import Problem
+from tests.fixtures import quiz_problem, write_set
+
+
+class TestProblemPack(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pack_path = os.path.join(self.temp_dir, "math.pack")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_round_trip_with_indexes(self):
+        """書き込んだ問題と索引がそのまま読み出せる"""
+        problems = [
+            quiz_problem("m1", "easy", "math"),
+            quiz_problem("m2", "hard", "math"),
+            quiz_problem("s1", "easy", "理科"),
+        ]
+        self.assertEqual(write_problem_pack(self.pack_path, problems), 3)
+        
+        pack = ProblemPack(self.pack_path)
+        try:
+            self.assertEqual(len(pack), 3)
+            self.assertEqual(list(pack.by_difficulty["easy"]), [0, 2])
+            self.assertEqual(list(pack.by_category["理科"]), [2])
+            self.assertEqual(list(pack.by_type["quiz"]), [0, 1, 2])
+            self.assertEqual([p.id for p in pack.select(difficulty="easy", category="math")], ["m1"])
+            self.assertEqual(pack.problem_at(1).to_dict(), Problem.from_dict(problems[1]).to_dict())
+        finally:
+            pack.close()
+    
+    def test_decodes_only_requested_problems(self):
+        """問題を参照するまで復元しない"""
+        write_problem_pack(self.pack_path, [quiz_problem(f"m{i}") for i in range(100)])
+        
+        with patch.object(Problem, 'from_dict', wraps=Problem.from_dict) as mock_from_dict:
+            pack = ProblemPack(self.pack_path)
+            self.assertEqual(pack.problem_at(42).id, "m42")
+            pack.close()
+        
+        mock_from_dict.assert_called_once()
+    
+    def test_position_of_without_decoding(self):
+        """問題IDの位置はレコードを復元せずに引ける"""
+        problems = [quiz_problem(f"m{i}") for i in range(100)] + [quiz_problem("m42")]
+        write_problem_pack(self.pack_path, problems)
+        
+        pack = ProblemPack(self.pack_path)
+        try:
+            with patch('problem_pack.json.loads') as mock_loads, \
+                    patch.object(Problem, 'from_dict') as mock_from_dict:
+                self.assertEqual(pack.position_of("m7"), 7)
+                self.assertEqual(pack.position_of("m42"), 42)
+                self.assertEqual(pack.position_of("m99"), 99)
+                self.assertIsNone(pack.position_of("missing"))
+                self.assertIsNone(pack.position_of("m"))
+            mock_loads.assert_not_called()
+            mock_from_dict.assert_not_called()
+        finally:
+            pack.close()
+    
+    def test_empty_pack(self):
+        write_problem_pack(self.pack_path, [])
+        
+        pack = ProblemPack(self.pack_path)
+        self.assertEqual(len(pack), 0)
+        self.assertEqual(pack.select(difficulty="easy"), [])
+        self.assertIsNone(pack.position_of("m1"))
+        pack.close()
+    
+    def test_invalid_file(self):
+        """パック以外のファイルは開かない"""
+        with open(self.pack_path, 'wb') as f:
+            f.write(b"not a problem pack" * 4)
+        
+        self.assertIsNone(open_problem_pack(self.pack_path))
+    
+    def test_reopened_after_rewrite(self):
+        """パックを作り直したら新しい内容で開き直す"""
+        write_problem_pack(self.pack_path, [quiz_problem("m1")])
+        first = open_problem_pack(self.pack_path)
+        self.assertIs(open_problem_pack(self.pack_path), first)
+        
+        write_problem_pack(self.pack_path, [quiz_problem("m1"), quiz_problem("m2")])
+        self.assertEqual(len(open_problem_pack(self.pack_path)), 2)
+
+
+class TestProblemLoaderPacks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, "quiz"))
+        self.loader = ProblemLoader(self.temp_dir, repository=ProblemRepository(),
+                                    snapshot_cache=ProblemSnapshotCache(os.path.join(self.temp_dir, "cache")))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_compiled_pack_is_used(self):
+        """コンパイル済みのパックがあればJSONを解析しない"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1", "easy"), quiz_problem("m2", "hard"), {"id": "broken"}])
+        self.assertEqual(self.loader.compile_pack("math"), 2)
+        
+        with patch.object(ProblemLoader, '_parse_problem_file') as mock_parse:
+            problems = self.loader.load_problems_by_difficulty("math", "hard")
+            streamed = list(self.loader.stream_problems("math", "easy"))
+        
+        mock_parse.assert_not_called()
+        self.assertEqual([p.id for p in problems], ["m2"])
+        self.assertEqual([p.id for p in streamed], ["m1"])
+    
+    def test_stale_pack_is_ignored(self):
+        """パック作成後にJSONが変更されたらJSONから読み込む"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self.loader.compile_pack("math")
+        
+        write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        
+        self.assertIsNone(self.loader.open_pack("math"))
+        self.assertEqual([p.id for p in self.loader.load_problem_set("math")], ["m1", "m2"])
+    
+    def test_pack_only_set_is_available(self):
+        """JSONなしで配布されたパックも問題セットとして扱う"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self.loader.compile_pack("math")
+        os.remove(path)
+        
+        self.assertEqual(self.loader.get_available_problem_sets(), ["math"])
+        self.assertEqual([p.id for p in self.loader.load_problem_set("math")], ["m1"])
+    
+    def test_compile_all_skips_pack_only_sets(self):
+        """セット名を省略したコンパイルは、パックのみのセットを対象にしない"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self.loader.compile_pack("math")
+        os.remove(path)
+        write_set(self.temp_dir, "science", [quiz_problem("s1")])
+        
+        self.assertEqual(compile_problems.main(["--problems-dir", self.temp_dir]), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "quiz", "science.pack")))
+        self.assertEqual([p.id for p in self.loader.load_problem_set("math")], ["m1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
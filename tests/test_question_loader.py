@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import json
+import pickle
+import shutil
+import tempfile
+import threading
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.problem import Problem, QuizContent
+from utils.file_watcher import file_signature
+from utils.problem_snapshot import ProblemSnapshotCache
+from question_loader import ProblemLoader, ProblemRepository, iter_json_array
+from tests.fixtures import quiz_problem, write_set
+
+
+class TestProblemRepository(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, "quiz"))
+        self.repository = ProblemRepository()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def _loader(self) -> ProblemLoader:
+        return ProblemLoader(self.temp_dir, repository=self.repository,
+                             snapshot_cache=ProblemSnapshotCache(os.path.join(self.temp_dir, "cache")))
+    
+    def _fresh_loader(self) -> ProblemLoader:
+        return ProblemLoader(self.temp_dir, repository=ProblemRepository(),
+                             snapshot_cache=ProblemSnapshotCache(os.path.join(self.temp_dir, "cache")))
+    
+    def test_shared_between_loaders(self):
+        """別のローダーでも同じ解析済み問題を再利用する"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        
+        with patch.object(ProblemLoader, '_parse_problem_file', autospec=True,
+                          side_effect=ProblemLoader._parse_problem_file) as mock_parse:
+            first = self._loader().load_problem_set("math")
+            second = self._loader().load_problem_set("math")
+        
+        self.assertIs(first, second)
+        self.assertIsInstance(first, tuple)
+        self.assertEqual(mock_parse.call_count, 1)
+    
+    def test_reloads_when_file_changes(self):
+        """ファイルが更新されたら読み直す"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self.assertEqual(len(self._loader().load_problem_set("math")), 1)
+        
+        write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        self.assertEqual(len(self._loader().load_problem_set("math")), 2)
+    
+    def test_missing_set(self):
+        """存在しない問題セットは空になる"""
+        self.assertEqual(list(self._loader().load_problem_set("missing")), [])
+    
+    def test_lru_eviction(self):
+        """容量を超えると最も長く使われていないセットから破棄する"""
+        path_a = write_set(self.temp_dir, "a", [quiz_problem("a1")])
+        path_b = write_set(self.temp_dir, "b", [quiz_problem("b1")])
+        self.repository.max_bytes = os.path.getsize(path_a) + os.path.getsize(path_b) - 1
+        
+        loader = self._loader()
+        loader.load_problem_set("a")
+        loader.load_problem_set("b")
+        
+        self.assertEqual(list(self.repository._entries), [os.path.abspath(path_b)])
+    
+    def test_concurrent_loads_parse_once(self):
+        """複数スレッドから同時に読み込んでも解析は一度だけ"""
+        write_set(self.temp_dir, "math", [quiz_problem(f"m{i}") for i in range(50)])
+        results = []
+        
+        with patch.object(ProblemLoader, '_parse_problem_file', autospec=True,
+                          side_effect=ProblemLoader._parse_problem_file) as mock_parse:
+            threads = [
+                threading.Thread(target=lambda: results.append(self._loader().load_problem_set("math")))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+    
+    def test_other_sets_available_while_parsing(self):
+        """大きなセットの解析中も、他のセットの取得はロックで待たされない"""
+        path_a = write_set(self.temp_dir, "large", [quiz_problem("l1")])
+        path_b = write_set(self.temp_dir, "small", [quiz_problem("s1")])
+        self.repository.get(path_b, lambda path: [Problem.from_dict(quiz_problem("s1"))])
+        
+        parsing = threading.Event()
+        release = threading.Event()
+        
+        def slow_parse(path):
+            parsing.set()
+            release.wait(timeout=5)
+            return [Problem.from_dict(quiz_problem("l1"))]
+        
+        thread = threading.Thread(target=self.repository.get, args=(path_a, slow_parse))
+        thread.start()
+        try:
+            self.assertTrue(parsing.wait(timeout=2))
+            self.assertEqual(self.repository.get(path_b, slow_parse).problems[0].id, "s1")
+            self.assertIsNotNone(self.repository.peek(path_b))
+            self.assertIsNone(self.repository.peek(path_a))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.repository.peek(path_a).problems[0].id, "l1")
+    
+    def test_index_queries(self):
+        """難易度・カテゴリの索引で複数セットから問題を集める"""
+        write_set(self.temp_dir, "math", [
+            quiz_problem("m1", "easy"), quiz_problem("m2", "medium"), quiz_problem("m3", "medium", "algebra")
+        ])
+        write_set(self.temp_dir, "science", [quiz_problem("s1", "medium", "science"), quiz_problem("s2", "hard", "science")])
+        loader = self._loader()
+        
+        problem_set = loader.load_indexed_set("math")
+        self.assertEqual(problem_set.by_difficulty["medium"], (1, 2))
+        self.assertEqual(problem_set.by_category["algebra"], (2,))
+        self.assertEqual(problem_set.by_type["quiz"], (0, 1, 2))
+        
+        self.assertEqual([p.id for p in loader.load_problems_by_difficulty("math", "medium")], ["m2", "m3"])
+        self.assertEqual(
+            [p.id for p in loader.find_problems(["math", "science"], difficulty="medium")],
+            ["m2", "m3", "s1"]
+        )
+        self.assertEqual(
+            [p.id for p in loader.find_problems(["math", "science"], difficulty="medium", category="math")],
+            ["m2"]
+        )
+        self.assertEqual(loader.find_problems(["math"], difficulty="unknown"), [])
+    
+    def test_stream_problems_fills_cache(self):
+        """逐次読み込みで条件に合う問題を返し、最後まで読んだらキャッシュに登録する"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1", "easy"), {"id": "broken"}, quiz_problem("m2", "hard")])
+        loader = self._loader()
+        
+        self.assertEqual([p.id for p in loader.stream_problems("math", "hard")], ["m2"])
+        
+        with patch.object(ProblemLoader, '_parse_problem_file', autospec=True) as mock_parse:
+            self.assertEqual([p.id for p in loader.load_problem_set("math")], ["m1", "m2"])
+            mock_parse.assert_not_called()
+    
+    
+    def test_snapshot_skips_validation_on_cold_start(self):
+        """別プロセス相当（キャッシュが空）でもスナップショットから読み込む"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2", "hard")])
+        self._loader().load_problem_set("math")
+        
+        self.repository.invalidate()
+        with patch.object(ProblemLoader, '_validate_problem') as mock_validate:
+            problems = self._loader().load_problem_set("math")
+            streamed = list(self._fresh_loader().stream_problems("math", "hard"))
+        
+        mock_validate.assert_not_called()
+        self.assertEqual([p.id for p in problems], ["m1", "m2"])
+        self.assertEqual([p.id for p in streamed], ["m2"])
+    
+    def test_stale_snapshot_is_rebuilt(self):
+        """内容が変わったらスナップショットを使わず解析し直す"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self._loader().load_problem_set("math")
+        
+        write_set(self.temp_dir, "math", [quiz_problem("m9")])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.repository.invalidate()
+        
+        self.assertEqual([p.id for p in self._loader().load_problem_set("math")], ["m9"])
+        self.repository.invalidate()
+        with patch.object(ProblemLoader, '_validate_problem') as mock_validate:
+            self.assertEqual([p.id for p in self._loader().load_problem_set("math")], ["m9"])
+        mock_validate.assert_not_called()
+    
+    def test_stale_snapshot_is_not_unpickled(self):
+        """元ファイルと署名が一致しないスナップショットは問題の一覧まで読み込まない"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        self._loader().load_problem_set("math")
+        
+        write_set(self.temp_dir, "math", [quiz_problem("m9")])
+        cache = ProblemSnapshotCache(os.path.join(self.temp_dir, "cache"))
+        loaded = []
+        original_load = pickle.load
+        
+        def load(f):
+            loaded.append(original_load(f))
+            return loaded[-1]
+        
+        with patch('utils.problem_snapshot.pickle.load', side_effect=load), \
+                patch('utils.problem_snapshot.file_sha256') as mock_hash:
+            self.assertIsNone(cache.load_matching(path, file_signature(path)))
+        
+        # 読み込んだのはヘッダーだけで、問題は復元していない
+        self.assertEqual(len(loaded), 1)
+        self.assertNotIn("problems", loaded[0])
+        self.assertNotIn("'m1'", repr(loaded[0]))
+        mock_hash.assert_not_called()
+    
+    def test_stream_without_snapshot_does_not_prehash(self):
+        """スナップショットがなければ元ファイルを先に読み込まず、解析しながらハッシュを計算する"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        
+        with patch('utils.problem_snapshot.file_sha256') as mock_hash:
+            self.assertEqual([p.id for p in self._loader().stream_problems("math")], ["m1", "m2"])
+            mock_hash.assert_not_called()
+        
+        self.repository.invalidate()
+        with patch.object(ProblemLoader, '_validate_problem') as mock_validate:
+            self.assertEqual([p.id for p in self._fresh_loader().stream_problems("math")], ["m1", "m2"])
+        mock_validate.assert_not_called()
+    
+    def test_file_changed_while_streaming(self):
+        """読み込み中にファイルが変わった場合はスナップショットを保存しない"""
+        path = write_set(self.temp_dir, "math", [quiz_problem("m1"), quiz_problem("m2")])
+        
+        stream = self._loader().stream_problems("math")
+        self.assertEqual(next(stream).id, "m1")
+        write_set(self.temp_dir, "math", [quiz_problem("m9")])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        list(stream)
+        
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "cache")))
+        self.repository.invalidate()
+        self.assertEqual([p.id for p in self._fresh_loader().stream_problems("math")], ["m9"])
+    
+    def test_corrupt_snapshot_is_ignored(self):
+        """壊れたスナップショットは無視して解析する"""
+        write_set(self.temp_dir, "math", [quiz_problem("m1")])
+        self._loader().load_problem_set("math")
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        for filename in os.listdir(cache_dir):
+            with open(os.path.join(cache_dir, filename), 'wb') as f:
+                f.write(b"broken")
+        
+        self.repository.invalidate()
+        self.assertEqual([p.id for p in self._loader().load_problem_set("math")], ["m1"])
+
+
+class TestProblemModel(unittest.TestCase):
+    def test_quiz_content_parsed_once(self):
+        """クイズの内容は読み込み時に解析され、元の辞書は保持しない"""
+        data = quiz_problem("m1")
+        problem = Problem.from_dict(data)
+        
+        self.assertIsInstance(problem.content, QuizContent)
+        self.assertEqual(problem.content.correct_answers, ("a",))
+        self.assertEqual(problem.to_dict(), data)
+    
+    def test_compact_and_immutable(self):
+        """__dict__を持たず変更できない。カテゴリ・選択肢IDは共有される"""
+        first = Problem.from_dict(json.loads(json.dumps(quiz_problem("m1"))))
+        second = Problem.from_dict(json.loads(json.dumps(quiz_problem("m2"))))
+        
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertFalse(hasattr(first.content.options[0], "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.title = "変更"
+        self.assertIs(first.category, second.category)
+        self.assertIs(first.content.options[0].id, second.content.options[0].id)
+    
+    
+    def test_answer_lookups_are_cached(self):
+        """正解の集合と選択肢IDの索引は一度だけ作られ、採点に使われる"""
+        content = Problem.from_dict(quiz_problem("m1")).content
+        
+        self.assertIs(content.correct_answer_set, content.correct_answer_set)
+        self.assertIs(content.options_by_id, content.options_by_id)
+        self.assertEqual(content.options_by_id["b"].content, "不正解")
+        self.assertTrue(content.is_correct({"a"}))
+        self.assertTrue(content.is_correct(["a"]))
+        self.assertFalse(content.is_correct(["a", "b"]))
+        self.assertFalse(content.is_correct(set()))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "data.json")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def _write(self, text: str):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    def test_elements_across_chunk_boundaries(self):
+        """チャンク境界で要素が分割されていても正しく解析する"""
+        data = [quiz_problem(f"q{i}") for i in range(20)]
+        self._write(json.dumps(data, ensure_ascii=False, indent=2))
+        
+        read = []
+        self.assertEqual(list(iter_json_array(self.path, chunk_size=7, on_read=read.append)), data)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(b"".join(read), f.read())
+    
+    def test_yields_before_reaching_end(self):
+        """ファイル末尾が壊れていても先頭の要素は先に返される"""
+        self._write('[{"id": 1}, {"id": 2}, {"id": ')
+        
+        elements = iter_json_array(self.path, chunk_size=4)
+        self.assertEqual(next(elements), {"id": 1})
+        self.assertEqual(next(elements), {"id": 2})
+        with self.assertRaises(ValueError):
+            next(elements)
+    
+    def test_empty_and_invalid(self):
+        """空配列と配列以外"""
+        self._write(" [ ] ")
+        self.assertEqual(list(iter_json_array(self.path)), [])
+        
+        self._write('{"id": 1}')
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
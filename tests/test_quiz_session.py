@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import random
+import shutil
+import tempfile
+from datetime import datetime
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from question_loader import ProblemLoader, ProblemRepository, ProblemSet
+from quiz_manager import QuizSession
+from problem_sampler import ProblemSampler, selection_weight
+from models.problem import AnswerStats, Problem
+from utils.fenwick import FenwickTree
+from utils.storage import HistoryStorage, ProblemStatsStorage
+from utils.problem_snapshot import ProblemSnapshotCache
+from tests.fixtures import quiz_problem, write_set
+
+
+class TestProblemSampler(unittest.TestCase):
+    def test_draws_each_candidate_once(self):
+        """複数の集合にまたがる候補を重複なく取り出す"""
+        first = ProblemSet([Problem.from_dict(quiz_problem(f"a{i}")) for i in range(50)])
+        second = ProblemSet([Problem.from_dict(quiz_problem(f"b{i}")) for i in range(7)])
+        sampler = ProblemSampler([(first, range(0, 50, 2)), (second, range(7)), (first, ())], random.Random(3))
+        sampler.set_weight("a10", 5.0)
+        sampler.set_weight("a11", 5.0)  # 候補に含まれない問題は無視される
+        
+        self.assertEqual(sampler.size, 32)
+        drawn = []
+        while sampler.remaining():
+            drawn.append(sampler.draw().id)
+        self.assertIsNone(sampler.draw())
+        self.assertEqual(sorted(drawn), sorted([f"a{i}" for i in range(0, 50, 2)] + [f"b{i}" for i in range(7)]))
+    
+    
+    def test_weighted_draws(self):
+        """重みに比例した確率で選ばれる"""
+        problems = ProblemSet([Problem.from_dict(quiz_problem(f"p{i}")) for i in range(20)])
+        rng = random.Random(7)
+        first_draws = []
+        for _ in range(400):
+            sampler = ProblemSampler([(problems, range(20))], rng)
+            sampler.set_weight("p3", 20.0)
+            sampler.set_weight("p4", 0.05)
+            first_draws.append(sampler.draw().id)
+        
+        # p3は約20/39.05、p4は約0.05/39.05の確率
+        self.assertGreater(first_draws.count("p3"), 160)
+        self.assertLess(first_draws.count("p4"), 5)
+    
+    def test_selection_weight(self):
+        """間違えた問題は重く、正解した問題は軽くなる"""
+        wrong_twice = AnswerStats().recorded(False, datetime(2025, 7, 7)).recorded(False, datetime(2025, 7, 8))
+        correct = AnswerStats().recorded(True, datetime(2025, 7, 7))
+        self.assertEqual(selection_weight(AnswerStats()), 1.0)
+        self.assertEqual(selection_weight(wrong_twice), 3.0)
+        self.assertLess(selection_weight(correct), 1.0)
+        self.assertGreater(selection_weight(wrong_twice.recorded(True, datetime(2025, 7, 9))), 0)
+
+
+class TestFenwickTree(unittest.TestCase):
+    def test_prefix_sums_and_find(self):
+        """重みの変更後も累積和と位置の検索が一致する"""
+        tree = FenwickTree(13)
+        weights = [1.0] * 13
+        for index, weight in ((0, 0.0), (5, 4.0), (12, 2.5), (5, 0.5), (7, 0.0)):
+            tree.set_weight(index, weight)
+            weights[index] = weight
+        
+        self.assertAlmostEqual(tree.total(), sum(weights))
+        for count in range(14):
+            self.assertAlmostEqual(tree.prefix_sum(count), sum(weights[:count]))
+        for index, weight in enumerate(weights):
+            if weight:
+                start = sum(weights[:index])
+                self.assertEqual(tree.find(start), index)
+                self.assertEqual(tree.find(start + weight * 0.99), index)
+        self.assertEqual(len(tree._weights), 4)
+
+
+class TestQuizSession(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, "quiz"))
+        self.history = HistoryStorage(os.path.join(self.temp_dir, "storage"))
+        self.stats = ProblemStatsStorage(os.path.join(self.temp_dir, "storage"))
+        write_set(self.temp_dir, "math", [quiz_problem(f"m{i}") for i in range(30)] + [quiz_problem("hard", "hard")])
+        write_set(self.temp_dir, "science", [quiz_problem(f"s{i}") for i in range(5)])
+    
+    def tearDown(self):
+        self.stats.flush()
+        shutil.rmtree(self.temp_dir)
+    
+    def _session(self, problem_sets=("math", "science")) -> QuizSession:
+        session = QuizSession(list(problem_sets), "easy", problems_dir=self.temp_dir,
+                              history_storage=self.history, stats_storage=self.stats)
+        session.problem_loader = ProblemLoader(self.temp_dir, repository=ProblemRepository(),
+                                               snapshot_cache=ProblemSnapshotCache(os.path.join(self.temp_dir, "cache")))
+        return session
+    
+    def _walk_problem_ids(self, session: QuizSession) -> list:
+        problem_ids = []
+        while session.has_more_problems():
+            problem_ids.append(session.get_current_problem().id)
+            session.current_problem_index += 1
+        return problem_ids
+    
+    def test_session_draws_every_problem_once(self):
+        """最初の問題が決まった後、残りの問題も重複なく一度ずつ出題される"""
+        session = self._session()
+        session.start_session()
+        self.assertIsNotNone(session.get_current_problem())
+        
+        problem_ids = self._walk_problem_ids(session)
+        self.assertEqual(len(problem_ids), 35)
+        self.assertEqual(len(set(problem_ids)), 35)
+        self.assertNotIn("hard", problem_ids)
+    
+    def test_cached_sets_are_sampled_lazily(self):
+        """キャッシュ済みのセットでは、開始時に選ぶのは出題する1問だけ"""
+        session = self._session()
+        for problem_set in ("math", "science"):
+            session.problem_loader.load_indexed_set(problem_set)
+        
+        with patch.object(ProblemSet, 'problem_at', autospec=True, side_effect=ProblemSet.problem_at) as mock_problem_at:
+            session.start_session()
+            self.assertEqual(mock_problem_at.call_count, 1)
+        self.assertEqual(len(session.problems), 1)
+        self.assertEqual(session.get_session_stats()["total_problems"], 35)
+    
+    def test_incorrect_answers_walk_through_problems(self):
+        """不正解のたびに次の問題へ進み、履歴に記録される"""
+        session = self._session(["science"])
+        session.start_session()
+        
+        answered = 0
+        while session.has_more_problems():
+            self.assertFalse(session.submit_answer(["b"]))
+            answered += 1
+        
+        self.assertEqual(answered, 5)
+        self.assertEqual(len(self.history.load_history()), 5)
+        self.assertEqual({problem_id: stats.streak for problem_id, stats in self.stats.load_stats().items()},
+                         {f"s{i}": -1 for i in range(5)})
+    
+    def test_recently_missed_problems_come_first(self):
+        """直近に間違えた問題が優先され、正解した問題は避けられる"""
+        for _ in range(3):
+            self.stats.record_answer("m7", False)
+        for problem_id in [f"m{i}" for i in range(20)] + [f"s{i}" for i in range(5)]:
+            if problem_id != "m7":
+                self.stats.record_answer(problem_id, True)
+        # 回答集計は保存され、新しいセッションでも使われる
+        self.stats.flush()
+        self.stats = ProblemStatsStorage(self.stats.storage_dir)
+        
+        random.seed(11)
+        first_ids = []
+        for _ in range(100):
+            session = self._session()
+            for problem_set in ("math", "science"):
+                session.problem_loader.load_indexed_set(problem_set)
+            session.start_session()
+            first_ids.append(session.get_current_problem().id)
+        
+        # 重みはm7が4、未回答の10問が1ずつ、正解した24問が1/4ずつ
+        self.assertGreater(first_ids.count("m7"), 10)
+        answered_correctly = {f"m{i}" for i in range(20) if i != 7} | {f"s{i}" for i in range(5)}
+        self.assertLess(sum(1 for problem_id in first_ids if problem_id in answered_correctly), 50)
+    
+    def test_correct_answer_completes_session(self):
+        """正解するとセッションが完了する"""
+        session = self._session()
+        session.start_session()
+        session.get_current_handler().render(None, session.get_current_problem())
+        self.assertTrue(session.submit_answer(["a"]))
+        self.assertTrue(session.is_session_complete())
+    
+    def test_no_problems(self):
+        """該当する問題がない場合"""
+        session = self._session(["missing"])
+        session.start_session()
+        self.assertIsNone(session.get_current_problem())
+        self.assertFalse(session.has_more_problems())
+    
+    def test_start_from_compiled_packs(self):
+        """問題パックがあれば、最初に復元するのは出題する1問だけ"""
+        session = self._session()
+        for problem_set in ("math", "science"):
+            session.problem_loader.compile_pack(problem_set)
+        
+        with patch.object(Problem, 'from_dict', wraps=Problem.from_dict) as mock_from_dict:
+            session.start_session()
+            self.assertEqual(mock_from_dict.call_count, 1)
+        
+        problem_ids = self._walk_problem_ids(session)
+        self.assertEqual(len(problem_ids), 35)
+        self.assertEqual(len(set(problem_ids)), 35)
+
+
+if __name__ == '__main__':
+    unittest.main()
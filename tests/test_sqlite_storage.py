@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.file_watcher import FileWatcher
+from utils.sqlite_storage import SqliteStorage, migrate_json_to_sqlite, sqlite_db_path
+from models.problem import AnswerStats
+from utils.storage import AlarmStorage, SettingsStorage, HistoryStorage, ProblemStatsStorage
+from tests.fixtures import make_alarm
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.backend = SqliteStorage(os.path.join(self.temp_dir, "test.db"))
+    
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_wal_mode(self):
+        """WALモードで開かれる"""
+        mode = self.backend._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+    
+    def test_alarm_storage_with_sqlite_backend(self):
+        """AlarmStorageから差分で保存・削除できる"""
+        storage = AlarmStorage(self.temp_dir, save_delay=0, backend=self.backend)
+        storage.save_alarm(make_alarm("alarm_1"))
+        storage.save_alarm(make_alarm("alarm_2", "08:00"))
+        storage.save_alarm(make_alarm("alarm_1", "06:00"))
+        storage.delete_alarm("alarm_2")
+        
+        alarms = self.backend.load_alarms()
+        self.assertEqual([(a.id, a.time) for a in alarms], [("alarm_1", "06:00")])
+    
+    def test_detects_external_commits(self):
+        """別の接続からの変更を検知して読み直す"""
+        storage = AlarmStorage(self.temp_dir, save_delay=0, backend=self.backend)
+        storage.save_alarm(make_alarm("alarm_1"))
+        self.assertEqual(len(storage.load_alarms()), 1)
+        
+        other = SqliteStorage(self.backend.path)
+        other.save_alarms([make_alarm("alarm_2")], ["alarm_2"], [])
+        other.close()
+        
+        self.assertEqual([a.id for a in storage.load_alarms()], ["alarm_1", "alarm_2"])
+    
+    def test_watcher_detects_external_commits(self):
+        """WALに書かれた別の接続からのコミットも監視で検知する"""
+        storage = AlarmStorage(self.temp_dir, save_delay=0, backend=self.backend)
+        storage.save_alarm(make_alarm("alarm_1"))
+        watcher = FileWatcher(storage.alarms_file, companions=storage.companion_files)
+        
+        other = SqliteStorage(self.backend.path)
+        other.save_alarms([make_alarm("alarm_2")], ["alarm_2"], [])
+        self.assertTrue(watcher.has_changed())
+        other.close()
+    
+    def test_settings_and_history(self):
+        """設定と回答履歴を保存できる"""
+        settings = SettingsStorage(self.temp_dir, backend=self.backend)
+        settings.save_settings({"default_volume": 0.5, "problem_sets": ["math"]})
+        self.assertEqual(settings.load_settings(), {"default_volume": 0.5, "problem_sets": ["math"]})
+        
+        history = HistoryStorage(self.temp_dir, backend=self.backend)
+        history.record_answer("q1", False, datetime(2025, 7, 7, 7, 0))
+        history.record_answer("q2", True, datetime(2025, 7, 7, 7, 1))
+        history.record_answer("q1", True, datetime(2025, 7, 8, 7, 0))
+        self.assertEqual(
+            [entry["correct"] for entry in history.load_history("q1")],
+            [False, True]
+        )
+        self.assertEqual(len(history.load_history()), 3)
+    
+    def test_problem_stats(self):
+        """回答集計はまとめて保存され、別の接続からも読める"""
+        stats = ProblemStatsStorage(self.temp_dir, backend=self.backend)
+        stats.record_answer("q1", False, datetime(2025, 7, 7, 7, 0))
+        stats.record_answer("q1", False, datetime(2025, 7, 8, 7, 0))
+        stats.record_answer("q2", True, datetime(2025, 7, 8, 7, 1))
+        self.assertEqual(stats.get_stats("q1").wrong, 2)
+        self.assertEqual(stats.write_count, 0)
+        stats.flush()
+        self.assertEqual(stats.write_count, 1)
+        
+        reloaded = ProblemStatsStorage(self.temp_dir, backend=SqliteStorage(self.backend.path)).load_stats()
+        self.assertEqual(reloaded["q1"], AnswerStats(correct=0, wrong=2, streak=-2, last_answered_at="2025-07-08T07:00:00"))
+        self.assertEqual(reloaded["q2"].streak, 1)
+
+
+class TestMigration(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_migrate_json_files(self):
+        """JSONファイルの内容がSQLiteへ移行され、以降はSQLiteが使われる"""
+        with open(os.path.join(self.temp_dir, "alarms.json"), 'w', encoding='utf-8') as f:
+            json.dump([make_alarm("alarm_1").to_dict(), make_alarm("alarm_2").to_dict()], f)
+        with open(os.path.join(self.temp_dir, "settings.json"), 'w', encoding='utf-8') as f:
+            json.dump({"default_volume": 0.3}, f)
+        ProblemStatsStorage(self.temp_dir, save_delay=0).record_answer("q1", True, datetime(2025, 7, 7, 7, 0))
+        
+        counts = migrate_json_to_sqlite(self.temp_dir)
+        self.assertEqual(counts, {"alarms": 2, "settings": 1, "history": 0, "problem_stats": 1})
+        
+        db_path = sqlite_db_path(self.temp_dir)
+        with sqlite3.connect(db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM alarms").fetchone()[0], 2)
+        
+        storage = AlarmStorage(self.temp_dir)
+        self.assertIsInstance(storage.backend, SqliteStorage)
+        self.assertEqual([a.id for a in storage.load_alarms()], ["alarm_1", "alarm_2"])
+        self.assertEqual(SettingsStorage(self.temp_dir).load_settings(), {"default_volume": 0.3})
+        self.assertEqual(ProblemStatsStorage(self.temp_dir).get_stats("q1").correct, 1)
+        storage.backend.close()
+    
+    def test_migrate_only_once(self):
+        """移行済みの場合は上書きしない"""
+        migrate_json_to_sqlite(self.temp_dir)
+        with self.assertRaises(FileExistsError):
+            migrate_json_to_sqlite(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import json
+import shutil
+import tempfile
+from dataclasses import FrozenInstanceError, replace
+from datetime import datetime
+
+# Add src to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.storage import AlarmStorage, HistoryStorage, get_alarm_storage
+from tests.fixtures import make_alarm
+
+
+class TestAlarmStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = AlarmStorage(self.temp_dir, save_delay=0)
+    
+    def tearDown(self):
+        self.storage.flush()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_save_and_load(self):
+        """保存したアラームをIDで取得できる"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        self.storage.save_alarm(make_alarm("alarm_2", "08:00"))
+        self.storage.save_alarm(make_alarm("alarm_1", "06:00"))
+        
+        self.assertEqual([a.id for a in self.storage.load_alarms()], ["alarm_1", "alarm_2"])
+        self.assertEqual(self.storage.load_alarm("alarm_1").time, "06:00")
+        self.assertIsNone(self.storage.load_alarm("missing"))
+        
+        with open(self.storage.alarms_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 2)
+    
+    def test_reads_disk_only_when_file_changes(self):
+        """プロセス内の書き込み後はファイルを読み直さない"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        
+        with patch.object(self.storage.backend, 'load_alarms', wraps=self.storage.backend.load_alarms) as mock_read:
+            self.storage.load_alarm("alarm_1")
+            self.storage.save_alarm(make_alarm("alarm_2"))
+            self.storage.load_alarms()
+            mock_read.assert_not_called()
+            
+            # 外部からの変更は検知して読み直す
+            with open(self.storage.alarms_file, 'w', encoding='utf-8') as f:
+                json.dump([make_alarm("external").to_dict()], f)
+            self.assertEqual([a.id for a in self.storage.load_alarms()], ["external"])
+            mock_read.assert_called_once()
+    
+    def test_returned_alarms_are_immutable(self):
+        """取得したアラームは変更できず、変更したものを保存するまでキャッシュは変わらない"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        
+        alarm = self.storage.load_alarm("alarm_1")
+        with self.assertRaises(FrozenInstanceError):
+            alarm.time = "09:00"
+        edited = replace(alarm, time="09:00")
+        self.assertEqual(self.storage.load_alarm("alarm_1").time, "07:00")
+        
+        self.storage.save_alarm(edited)
+        self.assertEqual(self.storage.load_alarm("alarm_1").time, "09:00")
+    
+    def test_delete_alarm(self):
+        """削除したアラームは取得できない"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        self.storage.delete_alarm("alarm_1")
+        self.assertEqual(self.storage.load_alarms(), [])
+    
+    def test_debounced_writes_are_coalesced(self):
+        """遅延時間内の変更は1回の書き込みにまとめられる"""
+        storage = AlarmStorage(self.temp_dir, save_delay=60)
+        for i in range(5):
+            storage.save_alarm(make_alarm(f"alarm_{i}"))
+        storage.delete_alarm("alarm_0")
+        
+        self.assertEqual(storage.write_count, 0)
+        self.assertFalse(os.path.exists(storage.alarms_file))
+        self.assertEqual(len(storage.load_alarms()), 4)
+        
+        storage.flush()
+        self.assertEqual(storage.write_count, 1)
+        with open(storage.alarms_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 4)
+        self.assertEqual(os.listdir(self.temp_dir), ["alarms.json"])
+    
+    def test_unchanged_alarm_is_not_written(self):
+        """内容が変わらない保存では書き込まない"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        self.assertEqual(self.storage.write_count, 1)
+    
+    def test_failed_write_keeps_original_file(self):
+        """書き込みに失敗しても元のファイルは残る"""
+        self.storage.save_alarm(make_alarm("alarm_1"))
+        
+        with patch('utils.storage_backends.json.dump', side_effect=OSError("disk full")):
+            self.storage.save_alarm(make_alarm("alarm_2"))
+        
+        with open(self.storage.alarms_file, 'r', encoding='utf-8') as f:
+            self.assertEqual([a["id"] for a in json.load(f)], ["alarm_1"])
+        self.assertEqual(os.listdir(self.temp_dir), ["alarms.json"])
+
+    def test_failed_write_is_retried(self):
+        """書き込みに失敗した変更は時間をおいて書き直される"""
+        self.storage.retry_delay = 0.05
+        with patch('utils.storage_backends.json.dump', side_effect=OSError("disk full")):
+            self.storage.save_alarm(make_alarm("alarm_1"))
+        self.assertEqual(self.storage.write_count, 0)
+    
+        retry = self.storage._save_timer
+        self.assertIsNotNone(retry)
+        retry.join(timeout=5)
+    
+        self.assertEqual(self.storage.write_count, 1)
+        with open(self.storage.alarms_file, 'r', encoding='utf-8') as f:
+            self.assertEqual([a["id"] for a in json.load(f)], ["alarm_1"])
+    
+    def test_shared_storage(self):
+        """同じディレクトリには同じインスタンスが返される"""
+        self.assertIs(get_alarm_storage(self.temp_dir), get_alarm_storage(self.temp_dir))
+
+
+class TestHistoryStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = HistoryStorage(self.temp_dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_answers_are_appended(self):
+        """回答は1行ずつ追記され、既存の行は書き換えない"""
+        self.history.record_answer("q1", False, datetime(2025, 7, 7, 7, 0))
+        path = self.history.backend.path
+        with open(path, 'r', encoding='utf-8') as f:
+            first_line = f.read()
+        
+        self.history.record_answer("q2", True, datetime(2025, 7, 7, 7, 1))
+        self.history.record_answer("q1", True, datetime(2025, 7, 8, 7, 0))
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        self.assertTrue(content.startswith(first_line))
+        self.assertEqual(len(content.splitlines()), 3)
+        
+        self.assertEqual([entry["correct"] for entry in self.history.load_history("q1")], [False, True])
+        self.assertEqual(len(self.history.load_history()), 3)
+    
+    def test_skips_truncated_line(self):
+        """書き込み途中で途切れた行は読み飛ばし、続く回答は別の行に追記する"""
+        self.history.record_answer("q1", True, datetime(2025, 7, 7, 7, 0))
+        with open(self.history.backend.path, 'a', encoding='utf-8') as f:
+            f.write('{"problem_id": "q2", "corr')
+        self.history.record_answer("q3", True, datetime(2025, 7, 7, 7, 2))
+        self.assertEqual([entry["problem_id"] for entry in self.history.load_history()], ["q1", "q3"])
+
+
+if __name__ == '__main__':
+    unittest.main()